@@ -22,16 +22,34 @@ blank in the puzzle grid.
 
 You can also input your puzzle directly via the command line. Run `./run.py` in the terminal, then type out the 
 puzzle string. Press Ctrl+D on your keyboard when finished to see the solution.
+
+Batch Mode:
+
+Run `python ./run.py --batch corpus.txt` to solve a corpus with one puzzle per line, in the common 81-character
+format with '.' or '0' for blanks. Anything after the first 81 characters of a line (such as a rating or source)
+is treated as a comment, as are blank lines and lines starting with '#'. Solutions are printed one per line, in
+the same order as the input, followed by a throughput and latency summary on stderr.
+
+* `--workers N` solves the puzzles in N processes
+* `--format line` (the default) prints the solved grid (or the partially solved grid, with '.' for open cells)
+* `--format jsonl` prints a JSON object per puzzle, including the solve time and any comment
 """
 
+import argparse
+import fileinput
+import json
+import multiprocessing
 import sys
+import time
 import sudoku
-import fileinput
+
+LINE_CELLS = frozenset('0123456789.')
 
 def solve_lines(puzzle_lines):
-    solver = sudoku.Solver(sudoku.ClassicContext())
+    context = sudoku.ClassicContext()
+    solver = sudoku.Solver(context)
     try:
-        puzzle = sudoku.Puzzle.parse('\n'.join(puzzle_lines))
+        puzzle = context.Puzzle.parse('\n'.join(puzzle_lines))
     except Exception as err:
         print('Error reading puzzle:', err)
         return
@@ -45,13 +63,112 @@ def solve_lines(puzzle_lines):
         print('Solved!' if solved else 'Not solved...')
         print(puzzle if solved else puzzle.debug_string)
 
-with fileinput.input() as puzzle_file:
-    puzzle_lines = []
-    for line in puzzle_file:
-        if fileinput.isfirstline():
-            # We've started a new file
-            if puzzle_lines:
-                solve_lines(puzzle_lines)
-                puzzle_lines = []
-        puzzle_lines.append(line)
-    solve_lines(puzzle_lines)
\ No newline at end of file
+
+def solve_files(files):
+    with fileinput.input(files) as puzzle_file:
+        puzzle_lines = []
+        for line in puzzle_file:
+            if fileinput.isfirstline():
+                # We've started a new file
+                if puzzle_lines:
+                    solve_lines(puzzle_lines)
+                    puzzle_lines = []
+            puzzle_lines.append(line)
+        solve_lines(puzzle_lines)
+
+
+def read_corpus(files):
+    "Yield `(puzzle, comment)` for each puzzle line of the files, skipping blank lines and '#' comments"
+    with fileinput.input(files) as corpus:
+        for line in corpus:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            yield line[:81], line[81:].strip(' \t,;|#')
+
+
+_solver = None # One solver per process, reused for every puzzle solved in that process
+
+def solve_corpus_line(item):
+    "Solve one corpus puzzle, returning a dict describing the result"
+    global _solver
+    if _solver is None:
+        _solver = sudoku.Solver(sudoku.ClassicContext())
+    elif _solver.transposition_table is not None:
+        # Each puzzle starts with an empty transposition table, so puzzles don't share entries
+        _solver.transposition_table.clear()
+    line, comment = item
+    result = {'puzzle': line, 'solution': None, 'solved': False, 'error': None, 'seconds': 0.0}
+    if comment:
+        result['comment'] = comment
+    if len(line) != 81 or not LINE_CELLS.issuperset(line):
+        result['error'] = 'Puzzle lines must start with 81 digits, using 0 or . for blanks'
+        return result
+    start = time.perf_counter()
+    try:
+        puzzle = _solver.variant_context.Puzzle.from_line(line)
+        result['solved'] = _solver.solve(puzzle).success
+        result['solution'] = puzzle.to_line()
+    except sudoku.SudokuError as err:
+        result['error'] = err.error_message
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def format_result(result, output_format):
+    if output_format == 'jsonl':
+        return json.dumps(result)
+    if result['error'] is not None:
+        return f"error: {result['error']}"
+    return result['solution']
+
+
+def print_summary(latencies, solved, errors, elapsed, file=sys.stderr):
+    count = len(latencies)
+    print(f"{count} puzzles: {solved} solved, {count - solved - errors} unsolved, {errors} errors", file=file)
+    if not count:
+        return
+    latencies = sorted(latencies)
+    percentile = lambda fraction: latencies[min(count - 1, int(fraction * count))] * 1000
+    print(f"{elapsed:.3f}s elapsed, {count / elapsed if elapsed else 0:.1f} puzzles/s", file=file)
+    print(
+        f"latency (ms): mean {sum(latencies) / count * 1000:.3f}, p50 {percentile(0.5):.3f}, "
+        f"p99 {percentile(0.99):.3f}, max {latencies[-1] * 1000:.3f}", file=file)
+
+
+def solve_corpus(files, workers=1, output_format='line', output=sys.stdout):
+    "Solve every puzzle line of the files, printing the results in input order, followed by a summary"
+    start = time.perf_counter()
+    latencies = []
+    solved = errors = 0
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        items = read_corpus(files)
+        results = pool.imap(solve_corpus_line, items, chunksize=64) if pool else map(solve_corpus_line, items)
+        for result in results:
+            latencies.append(result['seconds'])
+            solved += result['solved']
+            errors += result['error'] is not None
+            print(format_result(result, output_format), file=output)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    print_summary(latencies, solved, errors, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve sudoku puzzles")
+    parser.add_argument('files', nargs='*', help="Puzzle files to read; reads stdin if none are given")
+    parser.add_argument('--batch', action='store_true', help="Read one 81-character puzzle per line")
+    parser.add_argument('--workers', type=int, default=1, help="Number of processes to solve with in batch mode")
+    parser.add_argument('--format', choices=('line', 'jsonl'), default='line', help="Output format in batch mode")
+    args = parser.parse_args(argv)
+    if args.batch:
+        solve_corpus(args.files, args.workers, args.format)
+    else:
+        solve_files(args.files)
+
+
+if __name__ == '__main__':
+    main()
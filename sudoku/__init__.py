@@ -1,7 +1,9 @@
 from . import utils
 from .model import Puzzle, House, Row, Column, Cell
-from .exception import SudokuError
+from .exception import SudokuError, Contradiction, SearchTimeout
 from .solver import Solution, Solver
+from .transposition import TranspositionTable
+from .cache import SolveCache
 from .stepper import Stepper, Step, StepUnit, StepUnitSetBuilder
 from . import algorithms
 from .variant_context import VariantContext, ClassicContext
\ No newline at end of file
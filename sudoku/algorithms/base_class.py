@@ -14,10 +14,13 @@ class Algorithm:
             raise ValueError(f'Algorithm names must be unique; "{name}" has already been registered')
         Algorithm.registry[name] = self
 
-    def run(self, puzzle, stepper):
+    def run(self, puzzle, stepper, batch=False):
         """
         Run the algorithm, recording any applicable steps in the stepper.
 
+        If `batch` is True, single-step algorithms will keep going after their first step, 
+        recording every finding from the pass as a separate step.
+
         Returns True if the algorithm modified the puzzle, False otherwise
         """
         raise NotImplementedError('Algorithm base class should be extended, or use the algorithm decorator')
@@ -49,17 +52,20 @@ def algorithm(difficulty, multistep=False):
     way through before re-running the basic algorithms, and is allowed to make multi-step modifications to the puzzle.
     Not that, regardless of whether the algorithm is single-step or multi-step, you should use `yield` instead of
     `return`. The `yield` acts like a `return` in this context, unless the value yielded is None.
+
+    Single-step algorithms may still be run to completion by the solver's batch mode, so later yields must
+    remain valid after the earlier steps have been applied to the puzzle.
     """
     def decorator(generator_function):
         class AlgorithmFromDecorator(Algorithm):
-            def run(self, puzzle, stepper):
+            def run(self, puzzle, stepper, batch=False):
                 modified = False
                 for step_units in generator_function(puzzle):
                     if step_units is None:
                         continue
                     stepper.record_step(self.name, step_units)
                     modified = True
-                    if not multistep:
+                    if not (multistep or batch):
                         break
                 return modified
         AlgorithmFromDecorator.__doc__ = generator_function.__doc__
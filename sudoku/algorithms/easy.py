@@ -2,11 +2,11 @@
 A set of very basic algorithms, just above the fundamentals, that begin to take multiples into consideration
 """
 
-from ..utils import all_equal
+from ..utils import values_to_mask, mask_to_values, candidate_masks, POPCOUNT
 from .base_class import algorithm
 from ..stepper import StepUnitSetBuilder, StepUnit, PLACE, ELIMINATE, SOURCE
 from ..model import Puzzle
-import math
+import itertools
 
 __all__ = [
     'find_locked_candidates_squares',
@@ -46,27 +46,18 @@ def find_locked_candidates_squares(puzzle: Puzzle):
     ╠═══╪═══╪═══╬═══╪═══╪═══╬
     ```
     where x represents a possible location for a given value.
-    """
-    for square in puzzle.squares:
-        for possible in range(1, 10):
-            cells = square.get_cells_with_possible(possible)
-            if all_equal(*cells, key=lambda cell: square.index(cell)[0]):
-                #All in same row
-                house = cells[0].row      
-            elif all_equal(*cells, key=lambda cell: square.index(cell)[1]):
-                #All in same column
-                house = cells[0].column
-            else:
-                continue
-            # All the cells are aligned; see if they eliminate anything
-            step_units = StepUnitSetBuilder(puzzle)
-            step_units.add_source_cells(*cells, value=possible)
-            for cell in house:
-                if cell not in square.cells and cell.is_open and cell.has_possible(possible):
-                    cell.remove_possible(possible)
-                    step_units.add_eliminated_cells(cell, value=possible)
-            yield step_units.final()
 
+    The same applies to any region which crosses another house in two or more cells, such as
+    jigsaw regions or windows; these are taken from the intersections of the constraint graph.
+    """
+    cells = puzzle.flat_cells
+    masks = candidate_masks(puzzle)
+    for intersection, square_rest, line_rest in puzzle.constraint_graph.intersections:
+        intersection_mask = _union_mask(masks, intersection)
+        # Values in the intersection which are nowhere else in the square, but are elsewhere in the line
+        pointing_mask = intersection_mask & ~_union_mask(masks, square_rest) & _union_mask(masks, line_rest)
+        for possible in mask_to_values(pointing_mask):
+            yield _eliminate_locked_candidates(puzzle, possible, cells, intersection, line_rest)
                 
 
 
@@ -101,23 +92,33 @@ def find_locked_candidates_rows_columns(puzzle: Puzzle):
     ```
     where x represents a possible location for a given value.
     """
-    for house in (*puzzle.rows, *puzzle.columns):
-        for possible in range(1, 10):
-            cells = house.get_cells_with_possible(possible)
-            if len(cells) < 2: continue # Hidden single, leave that for the appropriate algorithm
-            squares_seen = set()
-            for cell in cells:
-                index = house.index(cell)
-                squares_seen.add(math.floor(index/3))
-            if len(squares_seen) == 1:
-                # All values are in the same square
-                step_units = StepUnitSetBuilder(puzzle)
-                step_units.add_source_cells(*cells, value=possible)
-                for cell in cells[0].square:
-                    if cell not in cells and cell.is_open and cell.has_possible(possible):
-                        cell.remove_possible(possible)
-                        step_units.add_eliminated_cells(cell, value=possible)
-                yield step_units.final()
+    cells = puzzle.flat_cells
+    masks = candidate_masks(puzzle)
+    for intersection, square_rest, line_rest in puzzle.constraint_graph.intersections:
+        intersection_mask = _union_mask(masks, intersection)
+        # Values in the intersection which are nowhere else in the line, but are elsewhere in the square
+        claiming_mask = intersection_mask & ~_union_mask(masks, line_rest) & _union_mask(masks, square_rest)
+        for possible in mask_to_values(claiming_mask):
+            yield _eliminate_locked_candidates(puzzle, possible, cells, intersection, square_rest)
+
+
+def _union_mask(masks, indices):
+    mask = 0
+    for index in indices:
+        mask |= masks[index]
+    return mask
+
+
+def _eliminate_locked_candidates(puzzle, value, cells, intersection, targets):
+    "Remove the value from the target cells, with the intersection cells that have it as the source"
+    step_units = StepUnitSetBuilder(puzzle)
+    step_units.add_source_cells(*(cells[index] for index in intersection if cells[index].has_possible(value)), value=value)
+    for index in targets:
+        cell = cells[index]
+        if cell.has_possible(value):
+            cell.remove_possible(value)
+            step_units.add_eliminated_cells(cell, value=value)
+    return step_units.final()
 
 
 @algorithm(difficulty=2)
@@ -150,32 +151,38 @@ def find_hidden_multiples(puzzle: Puzzle):
     where a, b, and c are possible values and '...' represents any number 
     of values besides those three.
     """
-    for house in puzzle.iter_houses():
-        # Here we build a mapping of cell indices of all cells which contain a set of possibility values to
-        # the possibility values that all those cells contain. E.g. and entry `(1, 4, 6): {3, 5, 7}` indicates
-        # That the cells at indices 1, 4, and 6 all have the possibility of being a 3, 5, or 7, and no other
-        # cells have the possibility of being any of those values
-        mapping={}
-        
-        for value in range(1, 10):
-            cells = house.get_cells_with_possible(value)
-            indices = tuple(house.index(cell) for cell in cells)
-            if indices in mapping:
-                mapping[indices].add(value)
-            else:
-                mapping[indices] = {value,}
-        
-        for indices, values in mapping.items():
-            if len(indices) == len(values):
-                #Eligible
-                cells = [house[index] for index in indices]
+    # Smaller subsets are easier to spot, so look for all the pairs before any triples or quads
+    for size in MULTIPLE_SIZES:
+        for house in puzzle.iter_houses():
+            # Bitmasks of the positions in the house which can contain each value. Values with more 
+            # positions than the subset size can't be part of it, and values with a single position 
+            # are hidden singles, so they are left out of the search.
+            position_masks = {}
+            for value in range(1, 10):
+                mask = 0
+                for index, cell in enumerate(house):
+                    if value in cell.possible:
+                        mask |= 1 << index
+                if 2 <= POPCOUNT[mask] <= size:
+                    position_masks[value] = mask
+            if len(position_masks) < size:
+                continue
+
+            for values in itertools.combinations(position_masks, size):
+                union = 0
+                for value in values:
+                    union |= position_masks[value]
+                if POPCOUNT[union] != size:
+                    continue
+                # Eligible
+                cells = [house.cells[index] for index in mask_to_values(union)]
                 step_units = StepUnitSetBuilder(puzzle)
                 step_units.add_source_cells(*cells, values=values)
                 for cell in cells:
-                    if cell.possible != values:
-                        removed_values = cell.possible.difference(values)
+                    removed_values = cell.possible.difference(values)
+                    if removed_values:
                         cell.limit_possible(*values)
-                        step_units.add_eliminated_cells(cell, values=removed_values)
+                        step_units.add_eliminated_cells(cell, values=sorted(removed_values))
                 yield step_units.final()
 
 
@@ -209,26 +216,38 @@ def find_naked_multiples(puzzle: Puzzle):
     where a and b are possible values and '...' represents 
     any values besides those two.
     """
-    
-    for house in puzzle.iter_houses():
-        mapping = {}
-        for cell in house:
-            p = tuple(cell.possible)
-            if p in mapping:
-                mapping[p].append(cell)
-            else:
-                mapping[p] = [cell]
-        
-        for possible, cells in mapping.items():
-            if len(possible) == len(cells):
-                #Eligible
+
+    # Smaller subsets are easier to spot, so look for all the pairs before any triples or quads
+    for size in MULTIPLE_SIZES:
+        for house in puzzle.iter_houses():
+            # Bitmasks of the candidates of each open cell, leaving out any cells with more 
+            # candidates than the subset size, as they can't be part of it
+            candidate_masks = {}
+            for index, cell in enumerate(house):
+                if cell.is_open and 2 <= len(cell.possible) <= size:
+                    candidate_masks[index] = values_to_mask(cell.possible)
+            if len(candidate_masks) < size:
+                continue
+
+            for indices in itertools.combinations(candidate_masks, size):
+                union = 0
+                for index in indices:
+                    union |= candidate_masks[index]
+                if POPCOUNT[union] != size:
+                    continue
+                # Eligible
+                possible = mask_to_values(union)
                 step_units = StepUnitSetBuilder(puzzle)
-                step_units.add_source_cells(*cells, values=possible)
-                for cell in house:
-                    if cell not in cells:
+                step_units.add_source_cells(*(house.cells[index] for index in indices), values=possible)
+                for index, cell in enumerate(house):
+                    if index not in indices:
                         removed_values = cell.possible.intersection(possible)
-                        cell.remove_possible(*removed_values)
                         if removed_values:
-                            step_units.add_eliminated_cells(cell, values=removed_values)
+                            cell.remove_possible(*removed_values)
+                            step_units.add_eliminated_cells(cell, values=sorted(removed_values))
                 yield step_units.final()
 
+
+# The sizes of naked and hidden subsets to search for. Quints and larger are always 
+# complemented by a smaller subset of the opposite kind in the same house.
+MULTIPLE_SIZES = (2, 3, 4)
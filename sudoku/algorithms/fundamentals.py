@@ -5,6 +5,7 @@ elimination and finding singles.
 from .base_class import algorithm
 from ..stepper import StepUnitSetBuilder, StepUnit, PLACE
 from ..model import Puzzle
+from ..utils import values_to_mask
 
 __all__ = [
     'eliminate_possibilities',
@@ -21,13 +22,17 @@ def eliminate_possibilities(puzzle: Puzzle):
     This performs basic elimination based on filled cells in the house,
     without applying more complex logic
     """
+    cells = puzzle.flat_cells
+    peers = puzzle.constraint_graph.peers
     for filled_cell in puzzle.iter_cells(skip_open_cells=True):
+        value = filled_cell.value
         step_units = StepUnitSetBuilder(puzzle)
-        step_units.add_source_cells(filled_cell, value=filled_cell.value)
-        for empty_cell in puzzle.iter_cells(central_call=filled_cell, skip_full_cells=True):
-            if empty_cell.has_possible(filled_cell.value):
-                empty_cell.remove_possible(filled_cell.value)
-                step_units.add_eliminated_cells(empty_cell, value=filled_cell.value)
+        step_units.add_source_cells(filled_cell, value=value)
+        for index in peers[filled_cell._index]:
+            empty_cell = cells[index]
+            if value in empty_cell.possible: # Full cells have no possibilities
+                empty_cell.remove_possible(value)
+                step_units.add_eliminated_cells(empty_cell, value=value)
         yield step_units.final()
 
                     
@@ -39,9 +44,9 @@ def find_naked_singles(puzzle: Puzzle):
     cells to their only possible value
     """
     
-    for cell in puzzle.iter_cells(skip_full_cells=True):
+    for cell in puzzle.open_cells:
         if len(cell.possible) == 1:
-            cell.value = cell.possible.pop()
+            cell.value = next(iter(cell.possible))
             yield (StepUnit(*puzzle.index(cell), (cell.value,), PLACE),)
 
     
@@ -52,11 +57,26 @@ def find_hidden_singles(puzzle: Puzzle):
     location in their row, column, or square which can contain a certain 
     value. If so, sets those cells to that exclusive value.
     """
-    for house in puzzle.iter_houses():
-        for value in range(1, 10):
-            if house.has_value_set(value):
-                continue
-            cells = house.get_cells_with_possible(value) #Note: Skips full cells
-            if len(cells) == 1: #i.e. There is only one cell in house that can be value
-                cells[0].value = value
-                yield (StepUnit(*puzzle.index(cells[0]), (value,), PLACE),)
+    cells = puzzle.flat_cells
+    for house in puzzle.constraint_graph.houses:
+        # Find the values which are a candidate in exactly one cell of the house, and not yet placed
+        placed = once = more = 0
+        for index in house:
+            cell = cells[index]
+            if cell.is_full:
+                placed |= 1 << cell.value
+            else:
+                mask = values_to_mask(cell.possible)
+                more |= once & mask
+                once |= mask
+        hidden = once & ~more & ~placed
+        while hidden:
+            bit = hidden & -hidden
+            hidden ^= bit
+            value = bit.bit_length() - 1
+            for index in house:
+                cell = cells[index]
+                if value in cell.possible:
+                    cell.value = value
+                    yield (StepUnit(*puzzle.index(cell), (value,), PLACE),)
+                    break
@@ -2,15 +2,18 @@
 The entry level of more advanced algorithms
 """
 
-from ..utils import  candidate_coordinate_plot
+from ..utils import candidate_position_masks, mask_to_values, shares_house, BivalueIndex, POPCOUNT
 from .base_class import algorithm
 from ..stepper import StepUnitSetBuilder
 from ..model import Puzzle
+import itertools
 
 __all__ = [
     'find_x_wing',
-    # 'find_y_wing',
-    # 'find_swordfish',
+    'find_swordfish',
+    'find_jellyfish',
+    'find_y_wing',
+    'find_xy_chain',
 ]
 
 
@@ -72,46 +75,71 @@ def find_x_wing(puzzle: Puzzle):
     ║ x │ x │   ║   │   │   ║   │ x │ x ║
     ╚═══╧═══╧═══╩═══╧═══╧═══╩═══╧═══╧═══╝
     """
-    # TODO this algorithm could probably be tweaked to also find swordfishes, though it might complicate the logic
+    yield from _find_fish(puzzle, 2)
+
+
+@algorithm(difficulty=6)
+def find_swordfish(puzzle: Puzzle):
+    """
+    A swordfish is the three-line version of an x-wing. If, for some value, the only candidates in 
+    three rows all lie within the same three columns, then the value must be placed in those columns 
+    within those rows, and it can be removed from every other cell in the three columns. The same 
+    applies with rows and columns swapped.
+
+    Not every row needs a candidate in all three columns; each only needs two or three of them.
+    """
+    yield from _find_fish(puzzle, 3)
+
+
+@algorithm(difficulty=7)
+def find_jellyfish(puzzle: Puzzle):
+    """
+    A jellyfish is the four-line version of an x-wing or swordfish. If, for some value, the only 
+    candidates in four rows all lie within the same four columns, the value can be removed from every 
+    other cell in those four columns. The same applies with rows and columns swapped.
+    """
+    yield from _find_fish(puzzle, 4)
+
+
+def _find_fish(puzzle, size):
+    """
+    Find fish (x-wings, swordfish, jellyfish) with the given number of base lines, for all values 
+    and both orientations, using the candidate position bitmasks for the whole grid.
+    """
+    row_masks, column_masks = candidate_position_masks(puzzle)
     for value in range(1, 10):
-        row_plot = candidate_coordinate_plot(puzzle.rows, value)
-        col_plot = candidate_coordinate_plot(puzzle.columns, value)
-        # For the purpose of this code, we define the "main axis" as the axis that the houses travel along, 
-        # e.g the vertical axis for rows, and the horizontal axis for columns, and the "secondary axis" as
-        # the axis running along the house itself, e.g. the horizontal axis for rows, and the vertical for
-        # columns.
-        for plot in (row_plot, col_plot):
-            # This is a list of indices for houses (along the primary axis) which have only two cells which can contain the value
-            len_2_indices = [house_index for house_index, cell_indices in enumerate(plot) if len(cell_indices) == 2]
-            # This is a set of frozensets which each contain cell indices (on the secondary axis) which can contain the value
-            seen_index_sets = set()
-            for primary_loop_main_axis_index in len_2_indices: # primary x-wing detection loop
-                if plot[primary_loop_main_axis_index] in seen_index_sets:
-                    # We've seen this exact same set of 2 cell indices before. This means we've found an x-wing!
-                    # Now we can eliminate values from other cells in the secondary axis
-                    step_units = StepUnitSetBuilder(puzzle)
-                    cross_axis_houses = puzzle.columns if plot is row_plot else puzzle.rows
-                    for cross_axis_cell_index in plot[primary_loop_main_axis_index]:
-                        cross_axis_house = cross_axis_houses[cross_axis_cell_index]
-                        for main_axis_cell_index, main_axis_cell in enumerate(cross_axis_house):
-                            # We loop through cells along the secondary axis, eliminating the value from all but the source cells
-                            if plot[primary_loop_main_axis_index] == plot[main_axis_cell_index]:
-                                # This is one of the source cells, don't modify it, only record it
-                                step_units.add_source_cells(main_axis_cell, value=value)
-                            elif main_axis_cell.has_possible(value):
-                                # This is not a source cell and needs to be modified
-                                main_axis_cell.remove_possible(value)
-                                step_units.add_eliminated_cells(main_axis_cell, value=value)
-                    yield step_units.final()
-                    break
-
-                else:
-                    # Potential x-wing, we're not sure yet, save it for the next loop
-                    seen_index_sets.add(frozenset(plot[primary_loop_main_axis_index]))
-
-
-
-def find_y_wing(puzzle):
+        # The "base" houses are those in which the candidates are confined, and the "cover" houses
+        # are the houses crossing them, from which the value can be eliminated.
+        for base_masks, base_houses, cover_houses in (
+            (row_masks[value], puzzle.rows, puzzle.columns),
+            (column_masks[value], puzzle.columns, puzzle.rows),
+        ):
+            # Houses with a single candidate are hidden singles, and houses with more than `size` 
+            # candidates can never be part of a fish of this size
+            base_indices = [index for index, mask in enumerate(base_masks) if 2 <= POPCOUNT[mask] <= size]
+            for combination in itertools.combinations(base_indices, size):
+                cover_mask = 0
+                for base_index in combination:
+                    cover_mask |= base_masks[base_index]
+                if POPCOUNT[cover_mask] != size:
+                    continue
+                step_units = StepUnitSetBuilder(puzzle)
+                for base_index in combination:
+                    base_house = base_houses[base_index]
+                    step_units.add_source_cells(
+                        *(base_house[position] for position in mask_to_values(base_masks[base_index])), 
+                        value=value)
+                for cover_index in mask_to_values(cover_mask):
+                    for position, cell in enumerate(cover_houses[cover_index]):
+                        if position not in combination and cell.has_possible(value):
+                            cell.remove_possible(value)
+                            step_units.add_eliminated_cells(cell, value=value)
+                yield step_units.final()
+
+
+
+@algorithm(difficulty=5)
+def find_y_wing(puzzle: Puzzle):
     """
     A y-wing takes three cells, a "stem" and two "branches". Each branch shares either a row, column, or square 
     with the stem. The branch is limited to exactly two possible values: a and b. The first branch cell is also 
@@ -152,4 +180,84 @@ def find_y_wing(puzzle):
     ║   │        │   ║   │        │   ║
     ╠═══╪════════╪═══╬═══╪════════╪═══╬
     """
-    return False # TODO
\ No newline at end of file
+    index = BivalueIndex.for_puzzle(puzzle)
+    for stem in index.cells:
+        # Cells may have lost candidates since the index was built, if earlier steps have been applied
+        if len(stem.possible) != 2:
+            continue
+        a, b = stem.possible
+        for first_branch in index.peers(stem):
+            if len(first_branch.possible) != 2 or a not in first_branch.possible or b in first_branch.possible:
+                continue
+            c, = first_branch.possible.difference((a,))
+            for second_branch in index.peers_with_pair(stem, (b, c)):
+                if second_branch.possible != {b, c}:
+                    continue
+                yield _eliminate_from_common_peers(puzzle, c, first_branch, stem, second_branch)
+
+
+@algorithm(difficulty=7)
+def find_xy_chain(puzzle: Puzzle):
+    """
+    An xy-chain is a longer version of a y-wing. It is a chain of bivalue cells, where each cell 
+    shares a house with the next, and each neighboring pair of cells shares a candidate. The first 
+    cell contains x, and each link in the chain passes on the candidate that the previous cell did 
+    not receive. If the last cell's remaining candidate is also x, then either the first or the 
+    last cell must be x, and x can be eliminated from any cell which shares a house with both.
+
+    For example, the chain [x, a] -> [a, b] -> [b, c] -> [c, x] shows that either the first or last 
+    cell must be x, since if the first is a, then the second is b, then the third is c, and the 
+    last is x.
+
+    Shorter chains are always tried first.
+    """
+    index = BivalueIndex.for_puzzle(puzzle)
+    peers = {id(cell): index.peers(cell) for cell in index.cells}
+    # One breadth-first search for each start cell and choice of x, all advanced a link at a 
+    # time. Each search visits a (cell, candidate passed on) state at most once; any longer 
+    # chain reaching the same state could only lead to the same eliminations.
+    searches = []
+    for start in index.cells:
+        if len(start.possible) != 2:
+            continue
+        for x in tuple(start.possible):
+            link, = start.possible.difference((x,))
+            searches.append((x, {(id(start), link)}, [((start,), link)]))
+    for length in range(2, MAX_XY_CHAIN_LENGTH + 1):
+        for x, visited, frontier in searches:
+            next_frontier = []
+            for chain, link in frontier:
+                for cell in peers[id(chain[-1])]:
+                    if len(cell.possible) != 2 or link not in cell.possible or cell in chain:
+                        continue
+                    next_link, = cell.possible.difference((link,))
+                    if (id(cell), next_link) in visited:
+                        continue
+                    visited.add((id(cell), next_link))
+                    # Shorter chains are y-wings, or eliminate nothing
+                    if next_link == x and length >= 4:
+                        result = _eliminate_from_common_peers(puzzle, x, *chain, cell)
+                        if result is not None:
+                            yield result
+                    next_frontier.append((chain + (cell,), next_link))
+            frontier[:] = next_frontier
+
+
+# Longer chains are both harder for humans to find and more expensive to search for
+MAX_XY_CHAIN_LENGTH = 8
+
+
+def _eliminate_from_common_peers(puzzle, value, *chain):
+    """
+    Remove the value from every cell which shares a house with both the first and last cells of 
+    the chain (excluding the chain cells themselves)
+    """
+    start, end = chain[0], chain[-1]
+    step_units = StepUnitSetBuilder(puzzle)
+    for cell in chain:
+        step_units.add_source_cells(cell, values=sorted(cell.possible))
+    for cell in puzzle.iter_cells(central_call=start, skip_full_cells=True):
+        if cell not in chain and cell.has_possible(value) and shares_house(cell, end):
+            cell.remove_possible(value)
+            step_units.add_eliminated_cells(cell, value=value)
+    return step_units.final()
\ No newline at end of file
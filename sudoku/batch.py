@@ -0,0 +1,198 @@
+"""
+A vectorized engine for running the fundamental algorithms over many classic puzzles at once.
+
+This mirrors `eliminate_possibilities`, `find_naked_singles`, and `find_hidden_singles`, but
+holds N puzzles as an `(N, 81, 9)` boolean candidate array and applies each algorithm to the
+whole batch with a handful of array operations. It is useful for quickly sorting a large corpus
+into puzzles that fall to singles alone and puzzles that need the full solver.
+
+This module requires NumPy, which is an optional dependency.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .stepper import StepUnit, PLACE
+
+__all__ = [
+    'CandidateBatch',
+    'house_incidence',
+    'peer_incidence',
+]
+
+_incidence_cache = {}
+
+
+def house_incidence():
+    """
+    Get a `(27, 81)` array where entry `[h, c]` is 1 if cell `c` is in house `h`. Houses are
+    ordered as the 9 rows, then the 9 columns, then the 9 squares.
+    """
+    if 'houses' not in _incidence_cache:
+        houses = np.zeros((27, 81), dtype=np.uint8)
+        for cell in range(81):
+            row, column = divmod(cell, 9)
+            houses[row, cell] = 1
+            houses[9 + column, cell] = 1
+            houses[18 + (row // 3) * 3 + column // 3, cell] = 1
+        houses.setflags(write=False)
+        _incidence_cache['houses'] = houses
+    return _incidence_cache['houses']
+
+
+def peer_incidence():
+    "Get an `(81, 81)` array where entry `[a, b]` is 1 if cells `a` and `b` share a house"
+    if 'peers' not in _incidence_cache:
+        houses = house_incidence().astype(np.int32)
+        peers = ((houses.T @ houses) > 0).astype(np.uint8)
+        np.fill_diagonal(peers, 0)
+        peers.setflags(write=False)
+        _incidence_cache['peers'] = peers
+    return _incidence_cache['peers']
+
+
+class CandidateBatch:
+    """
+    The state of N classic puzzles, stored as arrays.
+
+    `values` is an `(N, 81)` array of placed digits, with 0 for open cells. `candidates` is an
+    `(N, 81, 9)` boolean array, where `candidates[n, c, d]` is True if digit `d + 1` is still a
+    candidate for cell `c` of puzzle `n`. Cells are numbered left to right, top to bottom.
+
+    Every placement made by the batch is remembered in `placements`, one list per puzzle, as
+    `(algorithm_name, cell, digit)` tuples in the order they were made.
+    """
+    def __init__(self, values, candidates=None):
+        if np is None:
+            raise ImportError("The batch engine requires NumPy; install it with `pip install numpy`")
+        self.values = np.array(values, dtype=np.int8).reshape(-1, 81)
+        if candidates is None:
+            candidates = np.ones(self.values.shape + (9,), dtype=bool)
+        self.candidates = np.array(candidates, dtype=bool).reshape(-1, 81, 9)
+        self.candidates[self.values > 0] = False
+        self.placements = [[] for _ in range(len(self))]
+
+
+    @classmethod
+    def from_puzzles(cls, puzzles):
+        "Build a batch from puzzle objects, including their current candidates"
+        values = np.zeros((len(puzzles), 81), dtype=np.int8)
+        candidates = np.zeros((len(puzzles), 81, 9), dtype=bool)
+        for index, puzzle in enumerate(puzzles):
+            for cell_index, cell in enumerate(puzzle.iter_cells()):
+                if cell.is_full:
+                    values[index, cell_index] = cell.value
+                else:
+                    for candidate in cell.possible:
+                        candidates[index, cell_index, candidate - 1] = True
+        return cls(values, candidates)
+
+
+    @classmethod
+    def from_lines(cls, lines):
+        "Build a batch from 81-character puzzle strings, with any non-digit or '0' as a blank"
+        values = np.zeros((len(lines), 81), dtype=np.int8)
+        for index, line in enumerate(lines):
+            digits = [int(char) if char.isdigit() else 0 for char in line[:81]]
+            if len(digits) != 81:
+                raise ValueError(f"Puzzle line {index} has {len(digits)} cells, expected 81")
+            values[index] = digits
+        return cls(values)
+
+
+    def __len__(self):
+        return self.values.shape[0]
+
+
+    def _placed(self):
+        "One-hot `(N, 81, 9)` encoding of the placed values"
+        return self.values[:, :, None] == np.arange(1, 10, dtype=np.int8)
+
+
+    def eliminate_possibilities(self):
+        "Remove every candidate which is already placed in one of the cell's houses. Returns the number removed."
+        seen = np.einsum('ab,nbd->nad', peer_incidence(), self._placed().astype(np.uint8)) > 0
+        removed = self.candidates & seen
+        self.candidates &= ~seen
+        return int(removed.sum())
+
+
+    def find_naked_singles(self):
+        """
+        Find open cells with exactly one candidate. Returns an `(N, 81)` array of the digits
+        to place, with 0 where there is no naked single.
+        """
+        singles = (self.values == 0) & (self.candidates.sum(axis=2) == 1)
+        return np.where(singles, self.candidates.argmax(axis=2) + 1, 0).astype(np.int8)
+
+
+    def find_hidden_singles(self):
+        """
+        Find cells which are the only place in one of their houses for a digit. Returns an
+        `(N, 81)` array of the digits to place, with 0 where there is no hidden single.
+        """
+        houses = house_incidence()
+        counts = np.einsum('hc,ncd->nhd', houses, self.candidates.astype(np.uint8))
+        placed = np.einsum('hc,ncd->nhd', houses, self._placed().astype(np.uint8)) > 0
+        hidden = (counts == 1) & ~placed
+        cell_hidden = (np.einsum('hc,nhd->ncd', houses, hidden.astype(np.uint8)) > 0) & self.candidates
+        found = cell_hidden.any(axis=2)
+        return np.where(found, cell_hidden.argmax(axis=2) + 1, 0).astype(np.int8)
+
+
+    def place(self, digits, algorithm_name):
+        "Place the digits from an `(N, 81)` array (0 meaning no placement). Returns the number placed."
+        puzzle_indices, cell_indices = np.nonzero(digits)
+        for index, cell_index in zip(puzzle_indices.tolist(), cell_indices.tolist()):
+            self.placements[index].append((algorithm_name, cell_index, int(digits[index, cell_index])))
+        mask = digits > 0
+        self.values[mask] = digits[mask]
+        self.candidates[mask] = False
+        return len(puzzle_indices)
+
+
+    def step(self):
+        """
+        Run one pass of elimination, naked singles, and hidden singles over the whole batch.
+        Returns the number of values placed.
+        """
+        self.eliminate_possibilities()
+        placed = self.place(self.find_naked_singles(), 'find_naked_singles')
+        self.eliminate_possibilities()
+        placed += self.place(self.find_hidden_singles(), 'find_hidden_singles')
+        return placed
+
+
+    def run(self, max_passes=None):
+        "Repeatedly step until nothing more can be placed. Returns the number of passes that made progress."
+        passes = 0
+        while max_passes is None or passes < max_passes:
+            if not self.step():
+                break
+            passes += 1
+        self.eliminate_possibilities()
+        return passes
+
+
+    @property
+    def solved(self):
+        "An `(N,)` boolean array of which puzzles have every cell filled"
+        return (self.values > 0).all(axis=1)
+
+
+    @property
+    def broken(self):
+        "An `(N,)` boolean array of which puzzles have an open cell with no candidates left"
+        return ((self.values == 0) & ~self.candidates.any(axis=2)).any(axis=1)
+
+
+    def to_array(self, index):
+        "Get the values of one puzzle as a 9x9 list, with None for open cells"
+        return [[value or None for value in row] for row in self.values[index].reshape(9, 9).tolist()]
+
+
+    def record_steps(self, index, stepper):
+        "Record the placements made in one puzzle of the batch as steps in a stepper"
+        for algorithm_name, cell_index, digit in self.placements[index]:
+            stepper.record_step(algorithm_name, (StepUnit(*divmod(cell_index, 9), (digit,), PLACE),))
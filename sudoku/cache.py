@@ -0,0 +1,124 @@
+"""
+A cache of solve results, keyed on the canonical form of the puzzle.
+
+Many puzzles are the same puzzle in disguise (see `Puzzle.canonicalize`). The cache stores the
+logical solve of the canonical puzzle once, and the solver replays it through the inverse
+transform for any equivalent puzzle it sees afterwards.
+
+Entries are held in an in-memory LRU, optionally backed by an on-disk sqlite database so that
+results survive between processes.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Tuple
+import json
+import sqlite3
+
+from .stepper import StepUnit
+
+
+@dataclass(frozen=True)
+class CachedSolve:
+    """
+    The result of running the solver algorithms on a canonical puzzle.
+
+    `grid` is the 81-character canonical grid after the algorithms finished ('0' for any cell
+    left open), and `steps` is the list of `(algorithm_name, step_units)` tuples which were
+    recorded along the way, in canonical coordinates.
+    """
+    grid: str
+    steps: Tuple[Tuple[str, Tuple[StepUnit]]]
+
+    @property
+    def success(self):
+        return '0' not in self.grid
+
+    def to_json(self):
+        return json.dumps({
+            'grid': self.grid,
+            'steps': [
+                [algorithm, [[unit.row, unit.column, list(unit.values), unit.mode] for unit in step_units]]
+                for algorithm, step_units in self.steps
+            ],
+        })
+
+    @classmethod
+    def from_json(cls, string):
+        data = json.loads(string)
+        return cls(data['grid'], tuple(
+            (algorithm, tuple(StepUnit(row, column, tuple(values), mode) for row, column, values, mode in step_units))
+            for algorithm, step_units in data['steps']
+        ))
+
+
+def transform_steps(steps, transform):
+    "Map a sequence of `(algorithm_name, step_units)` tuples through a `GridTransform`"
+    return tuple(
+        (algorithm, tuple(
+            StepUnit(*transform.map_coords(unit.row, unit.column), tuple(transform.map_value(value) for value in unit.values), unit.mode)
+            for unit in step_units
+        ))
+        for algorithm, step_units in steps
+    )
+
+
+class SolveCache:
+    """
+    A size-bounded cache mapping keys (built from canonical puzzle forms) to `CachedSolve` objects.
+
+    If `path` is given, entries are also written to a sqlite database at that location, which
+    is consulted when an entry is not found in memory. The database is trimmed to at most
+    `max_disk_size` entries, dropping the oldest first.
+    """
+    def __init__(self, max_size=10_000, path=None, max_disk_size=1_000_000):
+        self.max_size = max_size
+        self.max_disk_size = max_disk_size
+        self._entries = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS solves (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def get(self, key):
+        "Get the cached entry for the key, or None if there isn't one"
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM solves WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = CachedSolve.from_json(row[0])
+                self._remember(key, entry)
+                return entry
+        return None
+
+
+    def put(self, key, entry):
+        "Add an entry to the cache"
+        self._remember(key, entry)
+        if self._db is not None:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO solves (key, value) VALUES (?, ?)", (key, entry.to_json()))
+                self._db.execute(
+                    "DELETE FROM solves WHERE rowid <= (SELECT MAX(rowid) FROM solves) - ?",
+                    (self.max_disk_size,))
+
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
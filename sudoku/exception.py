@@ -1,19 +1,55 @@
 class SudokuError(Exception):
+    """
+    An error in the puzzle or the solve process.
+
+    The full message includes a rendering of the puzzle, which is relatively expensive to
+    build, so it is only built when the error is displayed. Note that it shows the puzzle as
+    it is at that time, rather than when the error was raised.
+    """
     def __init__(self, error_message, puzzle, cell=None, stepper=None):
-        msg=[error_message, 
-             "Puzzle:",
-             str(puzzle)]
-        
+        Exception.__init__(self, error_message)
+        self.error_message = error_message
+        self.puzzle = puzzle
         self.cell = cell
-        if cell is not None:
+        self.stepper = stepper
+
+
+    def __reduce__(self):
+        # The default reduction would call the constructor with `self.args` (just the message)
+        return type(self), (self.error_message, self.puzzle, self.cell, self.stepper)
+
+
+    def __str__(self):
+        msg=[self.error_message,
+             "Puzzle:",
+             str(self.puzzle)]
+
+        if self.cell is not None:
             msg.extend((
                 "Problem Cell Details:",
-                "\tCoordinates (row, col): {}".format(puzzle.index(cell)),
-                "\tValue: {}".format(cell.value),
-                "\tPossible Values: {}".format(cell.possible)
+                "\tCoordinates (row, col): {}".format(self.puzzle.index(self.cell)),
+                "\tValue: {}".format(self.cell.value),
+                "\tPossible Values: {}".format(self.cell.possible)
                 ))
-        
-        self.stepper = stepper
-        if stepper is not None:
+
+        if self.stepper is not None:
             msg.append("Additional details about the solve process can be found by examining the `stepper` attribute of this exception")
-        Exception.__init__(self, "\n".join(msg))
\ No newline at end of file
+        return "\n".join(msg)
+
+
+class Contradiction(SudokuError):
+    """
+    The puzzle has reached a state with no solution, such as an open cell with no possible
+    values left.
+
+    When brute forcing, most branches end in a contradiction, so the solver can report these
+    as a status instead of raising them; see `Solver.solve`.
+    """
+
+
+class SearchTimeout(Exception):
+    """
+    A search (brute forcing, or counting solutions) was given a deadline, which passed before 
+    the search finished. This is not a `SudokuError`, as it says nothing about the puzzle, so 
+    searches never mistake it for a dead branch.
+    """
@@ -5,4 +5,4 @@ digit appears in that row. For example, a 7 in row 2 column 1 means there is a 1
 """
 from .algorithms import *
 from .context import Index159Context, Classic159Context
-from .pointer import PointerHouse
\ No newline at end of file
+from .pointer import PointerHouse, Pointer
\ No newline at end of file
@@ -5,51 +5,50 @@ A set of very basic algorithms, just above the fundamentals, that begin to take
 from ...algorithms.base_class import algorithm
 from ...stepper import StepUnitSetBuilder
 from ...model import Puzzle
+from ...utils import POPCOUNT, values_to_mask, mask_to_values
 
 __all__ = [
     'apply_pointers_forward',
     'apply_pointers_backward',
     'apply_pointer_possibilities_forward',
     'apply_pointer_possibilities_backward',
+    'apply_pointer_triads',
 ]
 
 
     
-@algorithm(difficulty=1)
+@algorithm(difficulty=1, multistep=True)
 def apply_pointers_forward(puzzle: Puzzle):
     """
     This technique looks for set values in pointer cells, and applies the appropriate value in the indexed house
     """
-    for pointer_house in puzzle.pointer_houses:
-        for pointer_cell, indexed_house in pointer_house.iter_pointers():
-            if pointer_cell.is_full:
-                indexed_cell = indexed_house[pointer_cell.value - 1] # Convert 1-indexed to 0-indexed
-                if indexed_cell.is_open:
-                    indexed_cell.value = pointer_house.value
-                    step_units = StepUnitSetBuilder(puzzle)
-                    step_units.add_source_cells(pointer_cell, value=pointer_cell.value)
-                    step_units.add_placed_value(indexed_cell, indexed_cell.value)
-                    yield step_units.final()
+    for pointer in puzzle.pointers:
+        if pointer.cell.is_full:
+            indexed_cell = pointer.target(pointer.cell.value)
+            if indexed_cell.is_open:
+                indexed_cell.value = pointer.value
+                step_units = StepUnitSetBuilder(puzzle)
+                step_units.add_source_cells(pointer.cell, value=pointer.cell.value)
+                step_units.add_placed_value(indexed_cell, indexed_cell.value)
+                yield step_units.final()
 
 
 
 
 
-@algorithm(difficulty=1)
+@algorithm(difficulty=1, multistep=True)
 def apply_pointers_backward(puzzle: Puzzle):
     """
     This technique looks through indexed houses for the pointer values, an sets the pointer cell to the corresponding value
     """
-    for pointer_house in puzzle.pointer_houses:
-        for pointer_cell, indexed_house in pointer_house.iter_pointers():
-            if pointer_cell.is_open:
-                for index, indexed_cell in enumerate(indexed_house):
-                    if indexed_cell.value == pointer_house.value:
-                        pointer_cell.value = index + 1 # Convert 0-index to 1-index
-                        step_units = StepUnitSetBuilder(puzzle)
-                        step_units.add_source_cells(indexed_cell, value=indexed_cell.value)
-                        step_units.add_placed_value(pointer_cell, pointer_cell.value)
-                        yield step_units.final()
+    for indexed_cell in puzzle.iter_cells(skip_open_cells=True):
+        for pointer, index in indexed_cell.indexed_by:
+            if indexed_cell.value == pointer.value and pointer.cell.is_open:
+                pointer.cell.value = index
+                step_units = StepUnitSetBuilder(puzzle)
+                step_units.add_source_cells(indexed_cell, value=indexed_cell.value)
+                step_units.add_placed_value(pointer.cell, pointer.cell.value)
+                yield step_units.final()
 
 
 
@@ -58,16 +57,15 @@ def apply_pointer_possibilities_forward(puzzle: Puzzle):
     """
     For each pointer cell, limit the possible locations of the pointer house value to cells that could be indexed by the pointer cell
     """
-    for pointer_house in puzzle.pointer_houses:
-        for pointer_cell, indexed_house in pointer_house.iter_pointers():
-            if pointer_cell.is_open:
-                step_units = StepUnitSetBuilder(puzzle)
-                step_units.add_source_cells(pointer_cell, values=pointer_cell.possible)
-                for index, indexed_cell in enumerate(indexed_house):
-                    if (index + 1) not in pointer_cell.possible and pointer_house.value in indexed_cell.possible:
-                        indexed_cell.remove_possible(pointer_house.value)
-                        step_units.add_eliminated_cells(indexed_cell, value=pointer_house.value)
-                yield step_units.final()
+    for pointer in puzzle.pointers:
+        if pointer.cell.is_open:
+            step_units = StepUnitSetBuilder(puzzle)
+            step_units.add_source_cells(pointer.cell, values=pointer.cell.possible)
+            for index, indexed_cell in enumerate(pointer.indexed_cells, 1):
+                if index not in pointer.cell.possible and pointer.value in indexed_cell.possible:
+                    indexed_cell.remove_possible(pointer.value)
+                    step_units.add_eliminated_cells(indexed_cell, value=pointer.value)
+            yield step_units.final()
 
 
 
@@ -78,19 +76,92 @@ def apply_pointer_possibilities_backward(puzzle: Puzzle):
     """
     For each indexed cell that cannot be the pointer value, eliminate their index from the appropriate pointer cell's values
     """
-    for pointer_house in puzzle.pointer_houses:
-        for pointer_cell, indexed_house in pointer_house.iter_pointers():
-            if pointer_cell.is_open:
-                step_units = StepUnitSetBuilder(puzzle)
-                for index, indexed_cell in enumerate(indexed_house):
-                    if pointer_house.value not in indexed_cell.possible and (index + 1) in pointer_cell.values:
-                        pointer_cell.remove_possible(index + 1)
-                        step_units.add_source_cells(indexed_cell)
-                        step_units.add_eliminated_cells(pointer_cell, value=index + 1)
-                yield step_units.final()
+    for pointer in puzzle.pointers:
+        if pointer.cell.is_open:
+            step_units = StepUnitSetBuilder(puzzle)
+            for index, indexed_cell in enumerate(pointer.indexed_cells, 1):
+                if pointer.value not in indexed_cell.possible and indexed_cell.value != pointer.value and index in pointer.cell.possible:
+                    pointer.cell.remove_possible(index)
+                    step_units.add_source_cells(indexed_cell, values=sorted(indexed_cell.possible))
+                    step_units.add_eliminated_cells(pointer.cell, value=index)
+            yield step_units.final()
+
+
+
+TRIAD_MASKS = (
+    values_to_mask((1, 2, 3)),
+    values_to_mask((4, 5, 6)),
+    values_to_mask((7, 8, 9)),
+)
+
+
+@algorithm(difficulty=3)
+def apply_pointer_triads(puzzle: Puzzle):
+    """
+    Within each square, the three pointer cells of a pointer column must take exactly one value
+    from each of the triads (1, 2, 3), (4, 5, 6), and (7, 8, 9). If it were not so, two of the 
+    pointers would place their value in the same square. E.g. if row 1 column 1 was a 4 and row
+    2 column 1 was a 6, that would place a 1 in both row 1 column 4 and row 2 column 6, which
+    are in the same square.
+
+    The triads therefore behave like digits in a three-cell house: if one or two pointer cells
+    are limited to as many triads, those triads can be removed from the others, and if a triad 
+    can only go in one of the pointer cells, that cell is limited to the triad.
+    """
+    for triad in puzzle.pointer_triads:
+        cells = [pointer.cell for pointer in triad]
+        triad_masks = [_triads_of(cell) for cell in cells]
+
+        # Naked triads: a group of cells which between them can only take as many triads
+        for group in ((0,), (1,), (2,), (0, 1), (0, 2), (1, 2)):
+            group_mask = 0
+            for index in group:
+                group_mask |= triad_masks[index]
+            if POPCOUNT[group_mask] != len(group):
+                continue
+            removed = _triad_values(group_mask)
+            step_units = StepUnitSetBuilder(puzzle)
+            for index in group:
+                step_units.add_source_cells(cells[index], values=_values_of(cells[index]))
+            for index, cell in enumerate(cells):
+                if index not in group and cell.is_open and cell.possible & removed:
+                    step_units.add_eliminated_cells(cell, values=sorted(cell.possible & removed))
+                    cell.remove_possible(*removed)
+                    triad_masks[index] = _triads_of(cell)
+            yield step_units.final()
+
+        # Hidden triads: a triad which can only go in one of the cells
+        for triad_index in range(3):
+            holders = [index for index, mask in enumerate(triad_masks) if mask >> triad_index & 1]
+            if len(holders) == 1:
+                cell = cells[holders[0]]
+                allowed = cell.possible & _triad_values(1 << triad_index)
+                if cell.is_open and cell.possible != allowed:
+                    step_units = StepUnitSetBuilder(puzzle)
+                    for other in cells:
+                        if other is not cell:
+                            step_units.add_source_cells(other, values=_values_of(other))
+                    step_units.add_eliminated_cells(cell, values=sorted(cell.possible - allowed))
+                    cell.limit_possible(*allowed)
+                    triad_masks[holders[0]] = _triads_of(cell)
+                    yield step_units.final()
+
+
+def _values_of(cell):
+    "Get the cell's value, or its candidates if it is open, in order"
+    return (cell.value,) if cell.is_full else sorted(cell.possible)
+
+
+def _triads_of(cell):
+    "Get a 3-bit mask of which triads the cell's value or candidates fall into"
+    mask = values_to_mask(_values_of(cell))
+    return sum(1 << index for index, triad_mask in enumerate(TRIAD_MASKS) if mask & triad_mask)
 
 
-# TODO within each square, the three pointer cells in that square have exactly 1 value from each of these three sets: (1, 2, 3), 
-# (4, 5, 6), (7, 8, 9). If it were not so, then there would be more than one of the same digit in a square. E.g. if row 1 column 1 
-# was a 4, and row 2 column 1 was a 6, that would place a 1 in both row 1 column 4 and row 2 column 6; both of which are in the 
-# same square.
\ No newline at end of file
+def _triad_values(triads):
+    "Get the set of values in the triads of a 3-bit triad mask"
+    mask = 0
+    for index, triad_mask in enumerate(TRIAD_MASKS):
+        if triads >> index & 1:
+            mask |= triad_mask
+    return set(mask_to_values(mask))
@@ -1,4 +1,4 @@
-from .pointer import PointerHouse
+from .pointer import PointerHouse, Pointer
 from ...variant_context import VariantContext, HybridContext, ClassicContext
 from .algorithms import *
 
@@ -9,9 +9,20 @@ class Index159Context(VariantContext):
             apply_pointers_forward,
             apply_pointers_backward,
             apply_pointer_possibilities_forward,
-            apply_pointer_possibilities_backward
+            apply_pointer_possibilities_backward,
+            apply_pointer_triads,
         ]
     
+    def add_constraints(self, builder, feature_map):
+        # Each pointer is (pointer cell, indexed cells, pointer value), with the cells as flat indices
+        for pointer_value in (1, 5, 9):
+            for row in range(9):
+                builder.add_relation('pointers', (
+                    row * 9 + pointer_value - 1, # convert 1-index to 0-index
+                    tuple(row * 9 + column for column in range(9)),
+                    pointer_value,
+                ))
+
     def init_features(self, puzzle, feature_map):
         pointer_houses = []
         for pointer_value in (1, 5, 9):
@@ -21,12 +32,27 @@ class Index159Context(VariantContext):
                 pointer_value
             ))
         puzzle._features['pointer_houses'] = pointer_houses
+
+        # Index the pointers both ways: from each pointer cell to the cells it indexes, and from
+        # each indexed cell back to the pointers (and the pointer values) which would select it
+        cells = puzzle.flat_cells
+        pointers = [
+            Pointer(cells[pointer_cell], tuple(cells[index] for index in indexed_cells), value)
+            for pointer_cell, indexed_cells, value in puzzle.constraint_graph.relations['pointers']
+        ]
+        puzzle._features['pointers'] = pointers
+        for pointer in pointers:
+            pointer.cell._features['pointer'] = pointer
+            for index, indexed_cell in enumerate(pointer.indexed_cells):
+                indexed_cell._features.setdefault('indexed_by', []).append((pointer, index + 1))
+        # The pointers of each pointer column within each band, which must take one value from 
+        # each of the triads (1, 2, 3), (4, 5, 6), and (7, 8, 9)
+        puzzle._features['pointer_triads'] = [pointers[start:start + 3] for start in range(0, len(pointers), 3)]
     
     def check_puzzle(self, puzzle):
-        for pointer_house in puzzle.pointer_houses:
-            for pointer_cell, indexed_house in pointer_house.iter_pointers():
-                if pointer_cell.is_full and indexed_house[pointer_cell.value - 1].value != pointer_house.value:
-                    return False, indexed_house[pointer_cell.value - 1]
+        for pointer in puzzle.pointers:
+            if pointer.cell.is_full and pointer.target(pointer.cell.value).value != pointer.value:
+                return False, pointer.target(pointer.cell.value)
         return True, None
 
 
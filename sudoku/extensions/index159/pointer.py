@@ -1,3 +1,23 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass(frozen=True, eq=False)
+class Pointer:
+    """
+    A single pointer: a cell whose value gives the position, within the indexed cells, of 
+    the pointer value. E.g. a 7 in the pointer cell of row 2 column 1 places a 1 in the 7th
+    cell of row 2.
+    """
+    cell: object
+    indexed_cells: Tuple[object]
+    value: int
+
+    def target(self, index):
+        "Get the indexed cell for a (1-indexed) pointer cell value"
+        return self.indexed_cells[index - 1]
+
+
 class PointerHouse:
     def __init__(self, point_from, point_to, value):
         """
@@ -13,4 +33,4 @@ class PointerHouse:
         """
         Iterate over the pointers in this house, as well asa the house the each respective pointer indexes into.
         """
-        return zip(self.point_from, self.point_to)
\ No newline at end of file
+        return zip(self.point_from, self.point_to)
@@ -0,0 +1,9 @@
+"""
+Jigsaw sudoku replaces the 3x3 squares with nine irregularly-shaped regions of nine cells.
+
+The regions are given as a layout string of 81 region labels, one per cell (see `JigsawLayout`).
+The regions take the place of the squares, so `puzzle.squares` and `cell.square` refer to them, 
+and the classic algorithms apply to them unchanged.
+"""
+from .layout import JigsawLayout
+from .context import JigsawContext
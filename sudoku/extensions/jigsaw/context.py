@@ -0,0 +1,59 @@
+from .layout import JigsawLayout
+from ...variant_context import VariantContext, ClassicContext
+from ...model import Row, Column, Region
+
+
+class JigsawContext(VariantContext):
+    """
+    Rows and columns as in classic sudoku, with jigsaw regions in place of the squares. The
+    layout is given to the puzzle as `jigsaw_layout`, either as a string or a `JigsawLayout`.
+    """
+    def get_algorithms(self, description):
+        # None of the classic algorithms depend on the squares being square
+        return ClassicContext().get_algorithms(description)
+    
+    def topology_key(self, feature_map):
+        return self._layout(feature_map).key
+    
+    def add_constraints(self, builder, feature_map):
+        for row in range(9):
+            builder.add_house('row', (row * 9 + column for column in range(9)))
+        for column in range(9):
+            builder.add_house('column', (row * 9 + column for row in range(9)))
+        for region in self._layout(feature_map).regions:
+            builder.add_house('region', region)
+    
+    def init_features(self, puzzle, feature_map):
+        rows = [Row(*row) for row in puzzle.cells]
+        columns = [Column(*column) for column in zip(*puzzle.cells)]
+        regions = [
+            Region('region', *(puzzle.flat_cells[index] for index in region))
+            for region in self._layout(feature_map).regions
+        ]
+        puzzle._features['rows'] = rows
+        puzzle._features['columns'] = columns
+        puzzle._features['squares'] = regions
+        puzzle._features['regions'] = regions
+        puzzle._features['jigsaw_layout'] = self._layout(feature_map)
+
+        for row in rows:
+            for cell in row:
+                cell._features['row'] = row
+        for column in columns:
+            for cell in column:
+                cell._features['column'] = column
+        for region in regions:
+            for cell in region:
+                cell._features['square'] = region
+    
+    def check_puzzle(self, puzzle):
+        return puzzle.check()
+    
+    @staticmethod
+    def _layout(feature_map):
+        layout = feature_map.get('jigsaw_layout')
+        if layout is None:
+            raise ValueError("A jigsaw puzzle must be given a `jigsaw_layout`")
+        if isinstance(layout, JigsawLayout):
+            return layout
+        return JigsawLayout.parse(layout)
@@ -0,0 +1,67 @@
+from collections import OrderedDict
+
+
+class JigsawLayout:
+    """
+    The regions of a jigsaw puzzle, parsed from a layout string.
+
+    The layout string has one label per cell, from left to right and top to bottom, with each
+    region's cells sharing a label. Whitespace is ignored, so the layout may be written as a
+    9x9 grid. Any characters may be used as labels, so long as there are nine of them, each used
+    for exactly nine cells.
+
+    Layouts are interned: parsing the same layout twice (even written differently) returns the
+    same object. Use `JigsawLayout.parse` rather than the constructor.
+    """
+    _interned = OrderedDict()
+    max_interned = 4096
+
+    def __init__(self, key):
+        "`key` is the normalized layout, with the regions relabeled 1 to 9 in order of their first cell"
+        self.key = key
+        regions = {}
+        for index, label in enumerate(key):
+            regions.setdefault(label, []).append(index)
+        self.regions = tuple(tuple(cells) for cells in regions.values())
+        self.cell_regions = tuple(int(label) - 1 for label in key)
+
+
+    @classmethod
+    def parse(cls, layout):
+        "Parse a layout string, returning the shared layout object for it"
+        key = cls.normalize(layout)
+        interned = cls._interned
+        found = interned.get(key)
+        if found is not None:
+            interned.move_to_end(key)
+            return found
+        found = interned[key] = cls(key)
+        if len(interned) > cls.max_interned:
+            interned.popitem(last=False)
+        return found
+
+
+    @staticmethod
+    def normalize(layout):
+        """
+        Check that a layout string is valid, and relabel the regions 1 to 9 in order of their
+        first cell, so that equivalent layouts have the same key
+        """
+        labels = ''.join(layout.split())
+        if len(labels) != 81:
+            raise ValueError(f"Jigsaw layout must have exactly 81 cells, received {len(labels)}")
+        relabel = {}
+        for label in labels:
+            if label not in relabel:
+                relabel[label] = str(len(relabel) + 1)
+        if len(relabel) != 9:
+            raise ValueError(f"Jigsaw layout must have exactly 9 regions, received {len(relabel)}")
+        key = ''.join(relabel[label] for label in labels)
+        for label in relabel.values():
+            if key.count(label) != 9:
+                raise ValueError(f"Each jigsaw region must have exactly 9 cells, region {label} has {key.count(label)}")
+        return key
+
+
+    def __str__(self):
+        return '\n'.join(self.key[row * 9:row * 9 + 9] for row in range(9))
@@ -5,4 +5,7 @@ rows, columns, and squares.
 Cages have a sum value listed in them, which all cells in the cage must add up to. 
 Additionally, cells in cages are not allowed to have any repeated digits, even when
 such would otherwise be allowed by normal sudoku rules.
-"""
\ No newline at end of file
+"""
+from .algorithms import *
+from .context import KillerContext, ClassicKillerContext
+from .cage import Cage, parse_cages, find_virtual_cages
@@ -1,4 +1,116 @@
+"""
+Algorithms for the killer sudoku variant, which work from the sums of the cages
+"""
+import weakref
+
+from ...algorithms.base_class import algorithm
+from ...exception import Contradiction
+from ...stepper import StepUnitSetBuilder
+from ...model import Puzzle
+from ...utils import values_to_mask, mask_to_values, union_masks
 from .utils import calculate_cage_combinations, calculate_cage_possibilities
+from .cage import Cage, find_virtual_cages
+
+__all__ = [
+    'limit_cage_possibilities',
+    'apply_cage_combinations',
+    'apply_rule_of_45',
+]
+
+
+@algorithm(difficulty=1, multistep=True)
+def limit_cage_possibilities(puzzle: Puzzle):
+    """
+    Limit every cell in a cage to the digits which appear in at least one combination of 
+    unique digits with the right count and sum for the cage. For example, the cells of a
+    two-cell cage with a sum of 4 can only be 1 or 3.
+    """
+    for cage in puzzle.cages:
+        possibilities = calculate_cage_possibilities(cage.sum, cage.cell_count)
+        step_units = StepUnitSetBuilder(puzzle)
+        for cell in cage:
+            if cell.is_open:
+                removed = cell.possible.difference(possibilities)
+                if removed:
+                    cell.limit_possible(*possibilities)
+                    step_units.add_eliminated_cells(cell, values=sorted(removed))
+        yield step_units.final()
+
+
+@algorithm(difficulty=2, multistep=True)
+def apply_cage_combinations(puzzle: Puzzle):
+    """
+    Rule out any combination of digits for a cage which can't be fit into the cage's cells,
+    given their current candidates, then limit each cell to the digits it could take in one 
+    of the remaining combinations.
+
+    For example, a three-cell cage with a sum of 10 could be {1, 2, 7}, {1, 3, 6}, {1, 4, 5}, 
+    or {2, 3, 5}. If one of the cells can only be a 7, only {1, 2, 7} remains, so the other two
+    cells can only be a 1 or a 2.
+    """
+    for cage in puzzle.cages:
+        yield _apply_combinations(puzzle, cage)
+
+
+@algorithm(difficulty=3, multistep=True)
+def apply_rule_of_45(puzzle: Puzzle):
+    """
+    Every row, column, and square sums to 45. Subtracting the sums of the cages which lie
+    wholly inside a group of houses gives the sum of the remaining cells in those houses; 
+    likewise, subtracting 45 for each house from the sums of the cages which cover the houses
+    gives the sum of the cells which stick out of the houses. When those cells can't repeat a
+    digit, they can be treated as a cage of their own.
+
+    For example, if the cages wholly inside a row sum to 37 and leave two cells of the row 
+    uncovered, those two cells must sum to 8, so they can't contain a 4, 8, or 9.
+    """
+    for cage in _virtual_cages(puzzle):
+        yield _apply_combinations(puzzle, cage)
+
+
+def _apply_combinations(puzzle, cage):
+    "Prune the cage's combinations and limit its cells accordingly, returning the step units for the change"
+    cage.domain.prune(cage.candidate_masks())
+    if not cage.domain.combinations:
+        raise Contradiction('Cage has no remaining combinations for a sum of {}'.format(cage.sum), puzzle, cage.cells[0])
+    step_units = StepUnitSetBuilder(puzzle)
+    step_units.add_source_cells(*cage.cells, values=mask_to_values(union_masks(cage.domain.combinations)))
+    for cell, mask in zip(cage.cells, cage.domain.cell_masks):
+        if cell.is_open:
+            allowed = mask_to_values(mask)
+            removed = cell.possible.difference(allowed)
+            if removed:
+                cell.limit_possible(*allowed)
+                step_units.add_eliminated_cells(cell, values=sorted(removed))
+    return step_units.final()
+
+
+def _virtual_cages(puzzle):
+    """
+    Get the cages derived from the rule of 45 (see `find_virtual_cages`). Where they are 
+    depends only on the layout of the puzzle, so that is found once for each constraint graph, 
+    and shared by every puzzle with the graph.
+    """
+    graph = puzzle.constraint_graph
+    layout = _virtual_cage_layouts.get(graph)
+    if layout is None:
+        regions = []
+        for houses in (graph.houses_of_kind('row'), graph.houses_of_kind('column')):
+            # Runs of adjacent rows or columns, since those are the unions a solver would look at
+            for start in range(len(houses)):
+                for end in range(start + 1, len(houses) + 1):
+                    regions.append((values_to_mask(index for house in houses[start:end] for index in house), 45 * (end - start)))
+        for square in graph.houses_of_kind('square'):
+            regions.append((values_to_mask(square), 45))
+        layout = _virtual_cage_layouts[graph] = tuple(
+            (cage_sum, mask_to_values(mask))
+            for cage_sum, mask in find_virtual_cages(regions, graph.relations.get('cages', ()), graph.peer_masks)
+        )
+    cells = puzzle.flat_cells
+    return [Cage(cage_sum, *(cells[index] for index in indices)) for cage_sum, indices in layout]
+
+_virtual_cage_layouts = weakref.WeakKeyDictionary() # The `(sum, cell indices)` of each virtual cage, by graph
+
 
 def eliminate_cage_possibilities(*cages):
     for cage in cages:
@@ -8,29 +120,14 @@ def eliminate_cage_possibilities(*cages):
 
 
 def evaluate_permutations(*cages):
+    "Prune the feasible assignments of each cage against the current candidates of its cells"
     for cage in cages:
-        for index, permutation in reversed(enumerate(cage.permutations)):
-            for cell, value in zip(cage.cells, permutation):
-                if not cell.has_possible(value, True):
-                    cage.permutations.pop(index)
+        cage.domain.prune(cage.candidate_masks())
 
 
 def apply_permutations(*cages):
+    "Limit the candidates of each cage cell to the digits it can take in some feasible assignment"
     for cage in cages:
-        if cage.permutations:
-            for cell_possibility_sets in zip(*cage.permutations):
-                for cell, possibility_set in zip(cage.cells, cell_possibility_sets):
-                    cell.limit_possible(*possibility_set)
-
-
-# TODO 45 rule: any row, column, or square can be thought of as a cage with 9 cells and a 
-# sum of 45. Intersections between the killer cages and the ordinary sudoku houses can 
-# subdivide cages to provide additional insights. For example, if some number of cages
-# are all contained in the same house, then the combined total of all those cages can
-# be subtracted from 45 to get the sum of a new imaginary cage which includes all the 
-# cells in the house that were not in one of those original cages. A cage that straddles
-# the boundary between two house can also provide a similar insight so long as all the 
-# other cages in the house exactly fill the house.
-#
-# These conditions are pretty easy for a human to see, but I'm still working out how to
-# make a computer do them.
\ No newline at end of file
+        for cell, mask in zip(cage.cells, cage.domain.cell_masks):
+            if cell.is_open:
+                cell.limit_possible(*mask_to_values(mask))
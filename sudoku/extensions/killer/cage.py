@@ -1,11 +1,102 @@
-from itertools import permutations
-from .utils import calculate_cage_combinations
+from ...utils import values_to_mask
+from .utils import cage_combination_masks
+
+
+class CageDomain:
+    """
+    The feasible digit assignments for the cells of a cage.
+
+    Rather than listing every permutation (which runs to hundreds of thousands of tuples for
+    large cages), the domain is stored as the digit combinations which can still be assigned
+    to the cage, as bitmasks, and the digits each cell can still take, as one bitmask per cell. 
+    Both are pruned against the cells' candidates by `prune`.
+    """
+    def __init__(self, cage_sum, cell_count):
+        self.combinations = list(cage_combination_masks(cage_sum, cell_count))
+        self.cell_masks = [0] * cell_count
+        for combination in self.combinations:
+            for index in range(cell_count):
+                self.cell_masks[index] |= combination
+    
+
+    def prune(self, candidate_masks):
+        """
+        Drop any combinations which can no longer be assigned to the cells, given a bitmask of 
+        the candidates of each cell, and recalculate the digits that each cell can take.
+
+        Returns True if the domain changed.
+        """
+        cell_count = len(candidate_masks)
+        combinations = []
+        cell_masks = [0] * cell_count
+        for combination in self.combinations:
+            supports = _supported_digits(combination, candidate_masks)
+            if supports is not None:
+                combinations.append(combination)
+                for index in range(cell_count):
+                    cell_masks[index] |= supports[index]
+        changed = combinations != self.combinations or cell_masks != self.cell_masks
+        self.combinations = combinations
+        self.cell_masks = cell_masks
+        return changed
+
+
+def _supported_digits(combination, candidate_masks):
+    """
+    Work out which digits of the combination each cell can take, in some assignment of all the
+    digits in the combination to the cells, one digit per cell. Returns None if there is no
+    such assignment.
+
+    This works through the cells in order, tracking the sets of digits (as bitmasks) which the 
+    cells so far could have used up, then does the same backwards from the last cell. A cell 
+    can take a digit if the digits used before it and the digits used after it can be made to 
+    fit around it.
+    """
+    cell_count = len(candidate_masks)
+    options = [candidates & combination for candidates in candidate_masks]
+
+    forward = [{0}]
+    for index in range(cell_count):
+        forward.append(_extend(forward[-1], options[index]))
+    if combination not in forward[-1]:
+        return None
+
+    backward = [{0}]
+    for index in reversed(range(cell_count)):
+        backward.append(_extend(backward[-1], options[index]))
+    backward.reverse() # backward[i] now holds the digits used by cells i onwards
+
+    supports = []
+    for index in range(cell_count):
+        supported = 0
+        after = backward[index + 1]
+        for before in forward[index]:
+            remaining = combination & ~before
+            for digit in range(1, 10):
+                bit = 1 << digit
+                if options[index] & remaining & bit and remaining ^ bit in after:
+                    supported |= bit
+        supports.append(supported)
+    return supports
+
+
+def _extend(used_sets, options):
+    "Extend each set of used digits with each of the given options, where not already used"
+    extended = set()
+    for used in used_sets:
+        available = options & ~used
+        while available:
+            bit = available & -available
+            extended.add(used | bit)
+            available ^= bit
+    return extended
+
 
 class Cage:
     def __init__(self, sum, *cells):
         self.sum = sum
         self.cells = cells
-        self.permutations = permutations(calculate_cage_combinations(sum, len(cells)))
+        self.domain = CageDomain(sum, len(cells))
     
     @property
     def cell_count(self):
@@ -22,3 +113,107 @@ class Cage:
     
     def index(self, cell):
         return self.cells.index(cell)
+    
+
+    def candidate_masks(self):
+        "Get the candidates of each cell in the cage as bitmasks, treating placed values as the only candidate"
+        return [
+            1 << cell.value if cell.is_full else values_to_mask(cell.possible)
+            for cell in self.cells
+        ]
+
+
+def parse_cages(layout, sums):
+    """
+    Parse cages from the compact killer clue format.
+
+    `layout` is a string of 81 cage labels, one per cell, from left to right and top to bottom.
+    Whitespace is ignored, so the layout may be written as a 9x9 grid. A `.` marks a cell which
+    is not in any cage. `sums` gives the sum for each label, either as a mapping or as a string 
+    of `label=sum` pairs separated by whitespace or commas, e.g. `"a=3 b=15 c=22"`.
+
+    Returns a list of `(sum, coordinates)` tuples, in order of each cage's first cell.
+    """
+    labels = ''.join(layout.split())
+    if len(labels) != 81:
+        raise ValueError(f"Cage layout must have exactly 81 cells, received {len(labels)}")
+    if isinstance(sums, str):
+        sums = dict(pair.split('=') for pair in sums.replace(',', ' ').split())
+    sums = {label: int(value) for label, value in sums.items()}
+
+    cages = {}
+    for index, label in enumerate(labels):
+        if label != '.':
+            cages.setdefault(label, []).append(divmod(index, 9))
+    missing = set(cages).difference(sums)
+    if missing:
+        raise ValueError(f"No sum given for cages: {', '.join(sorted(missing))}")
+    return [(sums[label], coordinates) for label, coordinates in cages.items()]
+
+
+def find_virtual_cages(regions, cages, peer_masks):
+    """
+    Apply the rule of 45 to find "virtual" cages: groups of cells whose sum is known, even 
+    though they are not one of the puzzle's cages.
+
+    Any row, column, or square must sum to 45, so any `n` of them which don't overlap act as a
+    cage summing to `45 * n`. `regions` gives these as `(cell_mask, total)` tuples, with cells as
+    bitmasks of flat indices (`row * 9 + column`). For each region:
+
+    * The cells of the region which are not in a cage wholly inside the region (the "innies")
+      must sum to the region total, less the sums of the cages wholly inside it.
+    * If every cell of the region is in a cage, the cells of those cages which stick out of the
+      region (the "outies") must sum to the total of the cages, less the region total.
+
+    `cages` gives the puzzle's cages as `(sum, cell_indices)` tuples, as in the constraint
+    graph's 'cages' relation. `peer_masks` gives, for each flat cell index, the bitmask of the cell's peers. Virtual cages
+    are only kept if their cells are all peers of each other, since the cage combination 
+    machinery relies on the digits in a cage being unique.
+
+    Returns a list of `(sum, cell_mask)` tuples, leaving out any which match a real cage or a
+    whole region.
+    """
+    # Index each cell to the cage containing it, so only the cages overlapping a region are visited
+    cage_masks = [(values_to_mask(cells), cage_sum) for cage_sum, cells in cages]
+    cell_cages = {}
+    for cage_index, (cage_mask, _) in enumerate(cage_masks):
+        for cell_index in _mask_indices(cage_mask):
+            cell_cages[cell_index] = cage_index
+
+    found = {mask: None for mask, _ in cage_masks}
+    virtual_cages = []
+    for region, total in regions:
+        overlapping = {cell_cages[index] for index in _mask_indices(region) if index in cell_cages}
+        inside_mask = inside_sum = 0
+        covering_mask = covering_sum = 0
+        for cage_index in overlapping:
+            cage_mask, cage_sum = cage_masks[cage_index]
+            covering_mask |= cage_mask
+            covering_sum += cage_sum
+            if cage_mask & ~region == 0:
+                inside_mask |= cage_mask
+                inside_sum += cage_sum
+        derived = [(total - inside_sum, region & ~inside_mask)]
+        if covering_mask & region == region:
+            derived.append((covering_sum - total, covering_mask & ~region))
+        for cage_sum, mask in derived:
+            if mask and mask != region and mask not in found and _mutual_peers(mask, peer_masks):
+                found[mask] = cage_sum
+                virtual_cages.append((cage_sum, mask))
+    return virtual_cages
+
+
+def _mask_indices(mask):
+    "Iterate over the indices of the set bits in a mask"
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def _mutual_peers(mask, peer_masks):
+    "Check whether every cell in the mask is a peer of every other cell in the mask"
+    for index in _mask_indices(mask):
+        if mask & ~(1 << index) & ~peer_masks[index]:
+            return False
+    return True
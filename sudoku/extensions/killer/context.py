@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from .cage import Cage, parse_cages
+from ...variant_context import VariantContext, HybridContext, ClassicContext
+from .algorithms import *
+
+class KillerContext(VariantContext):
+    # Topology keys of recently seen compact clues, so they are only parsed once
+    _parsed_clues = OrderedDict()
+
+    def get_algorithms(self, description):
+        #TODO actually use the description to filter algorithms
+        return [
+            limit_cage_possibilities,
+            apply_cage_combinations,
+            apply_rule_of_45,
+        ]
+
+    def topology_key(self, feature_map):
+        """
+        Cages may be given either as `cages`, a list of `(sum, coordinates)` tuples, or in the
+        compact clue format as `cage_layout` and `cage_sums` (see `parse_cages`).
+        """
+        if 'cage_layout' not in feature_map:
+            return self._cage_key(feature_map.get('cages', ()))
+        sums = feature_map.get('cage_sums', {})
+        clues = (feature_map['cage_layout'], sums if isinstance(sums, str) else tuple(sorted(sums.items())))
+        parsed = KillerContext._parsed_clues
+        key = parsed.get(clues)
+        if key is not None:
+            parsed.move_to_end(clues)
+            return key
+        key = parsed[clues] = self._cage_key(parse_cages(feature_map['cage_layout'], sums))
+        if len(parsed) > self.max_cached_graphs:
+            parsed.popitem(last=False)
+        return key
+
+    @staticmethod
+    def _cage_key(cage_clues):
+        return tuple((cage_sum, tuple(row * 9 + column for row, column in coordinates)) for cage_sum, coordinates in cage_clues)
+
+    def add_constraints(self, builder, feature_map):
+        caged = set()
+        for cage_sum, cells in self.topology_key(feature_map):
+            if caged.intersection(cells):
+                raise ValueError(f"Cell at {divmod(min(caged.intersection(cells)), 9)} is in more than one cage")
+            caged.update(cells)
+            builder.add_group('cage', cells)
+            builder.add_relation('cages', (cage_sum, cells))
+
+    def init_features(self, puzzle, feature_map):
+        cages = []
+        for cage_sum, cells in puzzle.constraint_graph.relations.get('cages', ()):
+            cage = Cage(cage_sum, *(puzzle.flat_cells[index] for index in cells))
+            for cell in cage:
+                cell._features['cage'] = cage
+                cell._features.setdefault('extra_peer_groups', []).append(cage)
+            cages.append(cage)
+        puzzle._features['cages'] = cages
+
+    def check_puzzle(self, puzzle):
+        for cage in puzzle.cages:
+            seen = set()
+            for cell in cage:
+                if cell.is_full:
+                    if cell.value in seen:
+                        return False, cell
+                    seen.add(cell.value)
+            if len(seen) == cage.cell_count and sum(seen) != cage.sum:
+                return False, cage.cells[-1]
+        return True, None
+
+
+class ClassicKillerContext(HybridContext):
+    def __init__(self):
+        super().__init__(ClassicContext(), KillerContext())
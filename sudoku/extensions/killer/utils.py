@@ -1,66 +1,89 @@
-from functools import lru_cache
+from ...utils import values_to_mask, mask_to_values, union_masks
+
+ALL_DIGITS = 0b1111111110 # Bits 1 through 9, one for each digit
+
+
+def _build_combination_tables():
+    """
+    Build tables of every set of unique digits, keyed by (sum, digit count). There are only
+    511 non-empty sets of digits in total, so this is cheap enough to do once at import.
+    """
+    masks = {}
+    # Combinations are listed in lexicographic order of their sorted digits
+    for digits in sorted(mask_to_values(subset << 1) for subset in range(1, 1 << 9)):
+        masks.setdefault((sum(digits), len(digits)), []).append(values_to_mask(digits))
+    masks = {key: tuple(value) for key, value in masks.items()}
+    combinations = {
+        key: tuple(frozenset(mask_to_values(mask)) for mask in value)
+        for key, value in masks.items()
+    }
+    possibilities = {key: union_masks(value) for key, value in masks.items()}
+    return masks, combinations, possibilities
+
+
+_COMBINATION_MASKS, _COMBINATIONS, _POSSIBILITY_MASKS = _build_combination_tables()
+
+
+def cage_combination_masks(cage_sum, cell_count):
+    """
+    Get all possible sets of unique digits that could work for a cage with the given sum and
+    cell count, as bitmasks with bit `d` set for each digit `d` in the set.
+    """
+    return _COMBINATION_MASKS.get((cage_sum, cell_count), ())
+
+
+def cage_possibility_mask(cage_sum, cell_count):
+    "Get the union of all the digits that could appear in a cage with the given sum and cell count, as a bitmask"
+    return _POSSIBILITY_MASKS.get((cage_sum, cell_count), 0)
+
 
-@lru_cache()
 def calculate_cage_combinations(cage_sum, cell_count):
     """
     Calculates all possible sets of unique digits that could work for a cage with the given
     sum and cell count.
 
-    This function uses an lru cache rather than doing combinations afresh every time,
-    and also has optimizations in place to quickly cut out the upper and lower bounds of
-    the possible combinations, so performance is actually pretty good
+    The combinations for every sum and cell count are precomputed, so this is just a lookup.
     """
-    return tuple(frozenset(perm) for perm in _calculate_cage_combinations(cage_sum, cell_count))
-
-
-def _calculate_cage_combinations(cage_sum, cell_count, digits = [1, 2, 3, 4, 5, 6, 7, 8, 9]):
-    if len(digits) < cell_count:
-        return
-    max_sum = sum(digits[-cell_count:])
-    min_sum = sum(digits[:cell_count])
-    if cage_sum < min_sum or cage_sum > max_sum:
-        return
-    if cell_count == 1:
-        if cage_sum in digits:
-            yield set((cage_sum,))
-        else:
-            return
-
-    for digit in digits:
-        partial_sum = cage_sum - digit
-        if partial_sum <= 0:
-            break
-        remaining_digits = [d for d in digits if d > digit]
-        if not remaining_digits:
-            break
-        for combination in _calculate_cage_combinations(partial_sum, cell_count-1, remaining_digits):
-            combination.add(digit)
-            if len(combination) == cell_count:
-                yield combination
+    return _COMBINATIONS.get((cage_sum, cell_count), ())
+
+
+def calculate_cage_possibilities(cage_sum, cell_count):
+    "Calculates the set of all digits that could appear in a cage with the given sum and cell count"
+    return frozenset(mask_to_values(cage_possibility_mask(cage_sum, cell_count)))
+
+
+def filter_combination_masks(masks, *, forbid=0, allow=ALL_DIGITS, require=0):
+    """
+    Given an iterable of combination bitmasks, filter out any combinations which contain forbidden
+    digits, contain digits that are not allowed, or are missing required digits. All the parameters
+    are bitmasks.
+    """
+    disallowed = ~allow | forbid
+    return tuple(mask for mask in masks if not mask & disallowed and mask & require == require)
+
+
+def combination_masks_to_possibilities(masks):
+    "Given an iterable of combination bitmasks, compute the bitmask of candidates for the cells within the cage"
+    return union_masks(masks)
 
 
 def combinations_to_possibilities(combinations):
     """
-    Given an iterable of sets representing possible combinations for a cage, compute 
+    Given an iterable of sets representing possible combinations for a cage, compute
     the candidate values for the cells withing the cage
     """
-    possibilities = set()
-    for combination in combinations:
-        possibilities = possibilities.union(combination)
-    return frozenset(possibilities)
+    return frozenset(mask_to_values(combination_masks_to_possibilities(map(values_to_mask, combinations))))
 
 
 def filter_combinations(combinations, *, forbid=None, allow=None, require=None):
     """
     Given an iterable of sets representing possible combinations for a cage, filter
-    the results based on parameters
+    the results based on parameters. An empty `allow` allows every digit.
     """
-    allowed_digits = set(allow or range(1, 10))
-    if forbid is not None:
-        allowed_digits = allowed_digits.difference(forbid)
-    
-    combinations = filter(lambda combination: allowed_digits.intersection(combination) == combination, combinations)
-    if require is not None:
-        required_digits = set(require)
-        combinations = filter(lambda combination: combination.intersection(required_digits) == required_digits, combinations)
-    return tuple(combinations)
+    masks = filter_combination_masks(
+        map(values_to_mask, combinations),
+        forbid=values_to_mask(forbid or ()),
+        allow=values_to_mask(allow) if allow else ALL_DIGITS,
+        require=values_to_mask(require or ()),
+    )
+    return tuple(frozenset(mask_to_values(mask)) for mask in masks)
@@ -0,0 +1,13 @@
+"""
+Variants which add extra regions to the grid. Like the rows, columns, and squares, each
+extra region has nine cells, which must contain every digit exactly once.
+
+* Diagonals (Sudoku X): the two main diagonals of the grid
+* Windows (Windoku): four extra 3x3 squares, offset one cell in from each corner
+* Asterisk: the nine cells r2c5, r3c3, r3c7, r5c2, r5c5, r5c8, r7c3, r7c7, and r8c5
+* Relative positions (Disjoint Groups): the cells at the same position within each square
+
+These need no algorithms of their own; the regions are added to the constraint graph and to
+`Puzzle.iter_houses`, so the classic algorithms apply to them just like the other houses.
+"""
+from .context import *
@@ -0,0 +1,101 @@
+from ...variant_context import VariantContext, HybridContext, ClassicContext
+from ...model import Region
+
+__all__ = [
+    'ExtraRegionContext',
+    'DiagonalContext',
+    'WindowContext',
+    'AsteriskContext',
+    'RelativePositionContext',
+    'ClassicDiagonalContext',
+    'ClassicWindowContext',
+    'ClassicAsteriskContext',
+    'ClassicRelativePositionContext',
+]
+
+
+class ExtraRegionContext(VariantContext):
+    """
+    A base class for variants which add extra regions of nine cells. Subclasses set `kind`, 
+    the name of the puzzle feature which will hold the regions, and `regions`, a sequence of 
+    regions given as the (row, column) coordinates of their cells.
+    """
+    kind = None
+    regions = ()
+
+    def get_algorithms(self, description):
+        # The classic algorithms work on every house, including the extra regions
+        return []
+    
+    def add_constraints(self, builder, feature_map):
+        for region in self.regions:
+            builder.add_house(self.kind, (row * 9 + column for row, column in region))
+    
+    def init_features(self, puzzle, feature_map):
+        regions = [Region(self.kind, *(puzzle.cells[row][column] for row, column in region)) for region in self.regions]
+        puzzle._features[self.kind + 's'] = regions
+        puzzle._features.setdefault('extra_houses', []).extend(regions)
+        for region in regions:
+            for cell in region:
+                cell._features.setdefault('extra_peer_groups', []).append(region)
+    
+    def check_puzzle(self, puzzle):
+        for region in getattr(puzzle, self.kind + 's'):
+            seen = set()
+            for cell in region:
+                if cell.is_full:
+                    if cell.value in seen:
+                        return False, cell
+                    seen.add(cell.value)
+        return True, None
+
+
+class DiagonalContext(ExtraRegionContext):
+    kind = 'diagonal'
+    regions = (
+        tuple((index, index) for index in range(9)),
+        tuple((index, 8 - index) for index in range(9)),
+    )
+
+
+class WindowContext(ExtraRegionContext):
+    kind = 'window'
+    regions = tuple(
+        tuple((Y + y, X + x) for y in range(3) for x in range(3))
+        for Y in (1, 5) for X in (1, 5)
+    )
+
+
+class AsteriskContext(ExtraRegionContext):
+    kind = 'asterisk'
+    regions = (
+        ((1, 4), (2, 2), (2, 6), (4, 1), (4, 4), (4, 7), (6, 2), (6, 6), (7, 4)),
+    )
+
+
+class RelativePositionContext(ExtraRegionContext):
+    kind = 'position'
+    regions = tuple(
+        tuple((Y + y, X + x) for Y in range(0, 9, 3) for X in range(0, 9, 3))
+        for y in range(3) for x in range(3)
+    )
+
+
+class ClassicDiagonalContext(HybridContext):
+    def __init__(self):
+        super().__init__(ClassicContext(), DiagonalContext())
+
+
+class ClassicWindowContext(HybridContext):
+    def __init__(self):
+        super().__init__(ClassicContext(), WindowContext())
+
+
+class ClassicAsteriskContext(HybridContext):
+    def __init__(self):
+        super().__init__(ClassicContext(), AsteriskContext())
+
+
+class ClassicRelativePositionContext(HybridContext):
+    def __init__(self):
+        super().__init__(ClassicContext(), RelativePositionContext())
@@ -0,0 +1,190 @@
+"""
+Reading and writing large puzzle corpora.
+
+Corpora are stored in the fixed-width line format: each record is a puzzle as 81 cells
+(see `Puzzle.from_line`) followed by a newline, so record `i` always starts at byte
+`i * record_size`. The reader maps the file into memory rather than reading it, so opening
+a corpus is free regardless of its size, any record can be read directly, and several
+processes can each map the same file (e.g. each reading their own `shard`) without copying it.
+"""
+import mmap
+import os
+
+from .variant_context import ClassicContext
+
+RECORD_SIZE = 82 # 81 cells and a newline
+
+__all__ = [
+    'RECORD_SIZE',
+    'CorpusReader',
+    'CorpusWriter',
+    'shard_range',
+]
+
+
+def shard_range(count, shard, shards):
+    """
+    Split `count` records into `shards` contiguous ranges of nearly equal size, and get the
+    range of record indices for shard number `shard` (counting from 0)
+    """
+    if not 0 <= shard < shards:
+        raise ValueError(f"Shard {shard} is out of range for {shards} shards")
+    return range(count * shard // shards, count * (shard + 1) // shards)
+
+
+class CorpusReader:
+    """
+    Random access to the records of a fixed-width corpus file, through a memory map.
+
+    Indexing the reader gives the 81 cells of a record as bytes. Puzzles are only built when
+    asked for, by `puzzle` or `iter_puzzles`, using the `Puzzle` class of `context` (classic
+    sudoku by default). The last record may omit its line ending. If the file uses '\\r\\n' line
+    endings, pass a `record_size` of 83.
+    """
+    def __init__(self, path, record_size=RECORD_SIZE, context=None):
+        if record_size < 81:
+            raise ValueError(f"Records must hold at least 81 cells, received a record size of {record_size}")
+        self.path = path
+        self.record_size = record_size
+        self.context = context if context is not None else ClassicContext()
+        self._ending = b'\r\n'[-(record_size - 81):] if record_size > 81 else b''
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap can't map an empty file
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._count = -(-size // record_size)
+        if 0 < size % record_size < 81:
+            self.close()
+            raise ValueError(f"{path} is not made of {record_size}-byte records ({size} bytes)")
+
+
+    def __len__(self):
+        return self._count
+
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"Record {index} is out of range for a corpus of {self._count} records")
+        return self._record(index * self.record_size)
+
+
+    def __iter__(self):
+        return self.iter_records()
+
+
+    def iter_records(self, start=0, stop=None):
+        "Yield the cells of each record from `start` up to (not including) `stop`, as bytes"
+        stop = self._count if stop is None else min(stop, self._count)
+        record_size = self.record_size
+        for offset in range(start * record_size, stop * record_size, record_size):
+            yield self._record(offset)
+
+
+    def _record(self, offset):
+        "Get the cells of the record at `offset`, checking that it ends with a line ending (or the end of the file)"
+        data = self._map
+        ending = data[offset + 81:offset + self.record_size]
+        if ending != self._ending and (ending or offset + 81 != len(data)):
+            raise ValueError(
+                f"Record {offset // self.record_size} of {self.path} does not end with a line ending "
+                f"(found {ending!r} after its 81 cells)")
+        return data[offset:offset + 81]
+
+
+    def puzzle(self, index, **feature_map):
+        "Build the puzzle for a single record"
+        return self.context.Puzzle.from_line(self[index], **feature_map)
+
+
+    def iter_puzzles(self, start=0, stop=None, **feature_map):
+        "Yield a puzzle for each record from `start` up to (not including) `stop`, building each as it is reached"
+        Puzzle = self.context.Puzzle
+        for record in self.iter_records(start, stop):
+            yield Puzzle.from_line(record, **feature_map)
+
+
+    def shard(self, shard, shards):
+        "Get the range of record indices for one of `shards` workers; see `shard_range`"
+        return shard_range(self._count, shard, shards)
+
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = b''
+        self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+
+class CorpusWriter:
+    """
+    Writes puzzles (or 81-character lines) as fixed-width records, buffering the output so
+    that the file is written in large blocks.
+
+    `file` may be a path, which is opened for writing (or appending, if `append` is True), or
+    a binary file object. Records are only guaranteed to be written after `flush` or `close`.
+    """
+    def __init__(self, file, buffer_size=1 << 20, append=False, blank='.'):
+        if isinstance(file, (str, bytes, os.PathLike)):
+            self._file = open(file, 'ab' if append else 'wb')
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self.buffer_size = buffer_size
+        self.blank = blank
+        self._buffer = bytearray()
+        self.count = 0 # The number of records written
+
+
+    def write(self, puzzle):
+        "Write one record, given a puzzle, or its cells as a string or bytes"
+        if isinstance(puzzle, str):
+            line = puzzle.encode('ascii')
+        elif isinstance(puzzle, (bytes, bytearray, memoryview)):
+            line = bytes(puzzle)
+        else:
+            line = puzzle.to_line(self.blank).encode('ascii')
+        if len(line) != 81:
+            raise ValueError(f"Expected 81 cells, received {len(line)}")
+        self._buffer += line
+        self._buffer += b'\n'
+        self.count += 1
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+
+    def write_all(self, puzzles):
+        for puzzle in puzzles:
+            self.write(puzzle)
+
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,3 +1,5 @@
 from .cell import Cell
-from .house import Row, Column, Square, House
+from .house import Row, Column, Square, Region, House
 from .puzzle import Puzzle
+from .symmetry import GridTransform
+from .constraint_graph import ConstraintGraph, ConstraintGraphBuilder
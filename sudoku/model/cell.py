@@ -1,4 +1,4 @@
-from ..exception import SudokuError
+from ..exception import Contradiction
 
 class Cell:
     "One cell of the puzzle"
@@ -6,6 +6,7 @@ class Cell:
 
 
     def __init__(self, value=None, possible=None, puzzle=None, coords=None):
+        self._features = {}
         if self.variant_context is None:
             if puzzle is not None and puzzle.variant_context is not None:
                 self.variant_context = puzzle.variant_context
@@ -17,22 +18,30 @@ class Cell:
         self._value = value
         self._puzzle = puzzle
         self._coords = coords
+        # Flat index of the cell within the grid, used for incremental puzzle bookkeeping
+        self._index = coords[0] * 9 + coords[1] if coords else None
 
         if self._value is None:
             self.possible = set(possible or range(1, 10))
         else:
             self.possible=set()
-
-        self._features = {}
     
 
     def __getattr__(self, name):
+        if name.startswith('__'):
+            # Special method lookups (e.g. by copy or pickle) are never features
+            raise AttributeError(name)
         try:
             features = object.__getattribute__(self, '_features')
+        except AttributeError:
+            features = None # _features is not yet defined
+        if features is not None:
             if name in features:
                 return features[name]
-        except AttributeError:
-            pass # _features is not yet defined
+            # The puzzle builds the cell features the first time any feature is used
+            puzzle = self.__dict__.get('_puzzle')
+            if puzzle is not None and puzzle._load_features():
+                return getattr(self, name)
         raise AttributeError(f"No object property or cell feature '{name}'")
     
 
@@ -87,9 +96,13 @@ class Cell:
     
     def remove_possible(self, *values):
         "Safely removes value from cell.possible"
-        self.possible.difference_update(values)
+        removed = self.possible.intersection(values)
+        if removed:
+            self.possible.difference_update(removed)
+            if self._puzzle is not None:
+                self._puzzle._candidates_removed(self, removed)
         if not self.possible and not self.value:
-            raise SudokuError('Cell has no possible values, {} removed'.format(values), self.puzzle, self)
+            raise Contradiction('Cell has no possible values, {} removed'.format(values), self.puzzle, self)
     
 
     def limit_possible(self, *values):
@@ -98,7 +111,11 @@ class Cell:
         
         This will only remove possibilities, never add them.
         """
-        self.possible.intersection_update(values)
+        removed = self.possible.difference(values)
+        if removed:
+            self.possible.difference_update(removed)
+            if self._puzzle is not None:
+                self._puzzle._candidates_removed(self, removed)
     
 
     def has_possible(self, value, true_on_actual_value=False):
@@ -119,14 +136,46 @@ class Cell:
     @value.setter
     def value(self, value):
         "Sets the value, and clears the possible set"
+        old_value = self._value
         self._value = value
+        if self._puzzle is not None:
+            self._puzzle._value_changed(self, old_value, self.possible)
         self.possible.clear()
     
 
+    def clear(self):
+        """
+        Erase the cell's value, and restore every candidate which isn't already placed in one of
+        the cell's peers
+        """
+        self.value = None
+        if self._puzzle is not None:
+            cells = self._puzzle.flat_cells
+            placed = {cells[index]._value for index in self._puzzle.constraint_graph.peers[self._index]}
+        else:
+            placed = set()
+        added = set(range(1, 10)).difference(placed)
+        if added:
+            self.possible.update(added)
+            if self._puzzle is not None:
+                self._puzzle._candidates_added(self, added)
+    
+
     @property
     def houses(self):
         h=[]  
         if self.row: h.append(self.row)
         if self.column: h.append(self.column)
         if self.square: h.append(self.square)
-        return h
\ No newline at end of file
+        return h
+    
+
+    @property
+    def peer_groups(self):
+        """
+        All the groups of cells this cell belongs to which cannot contain a repeated value: the
+        cell's houses, plus any extra groups (such as killer cages) registered by variant contexts
+        in the `extra_peer_groups` feature.
+        """
+        houses = self.houses # Loads the features, if needed
+        return houses + list(self._features.get('extra_peer_groups', ()))
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+The compiled constraints of a variant, as plain integer index tables.
+
+Cells are referred to by their flat index (`row * 9 + column`), so a single graph can be
+shared by every puzzle of the same variant (and, for variants such as killer, the same layout).
+Variant contexts describe their constraints to a `ConstraintGraphBuilder` once, and the
+resulting `ConstraintGraph` is cached by the context (see `VariantContext.constraint_graph`).
+"""
+
+import itertools
+
+# The kinds of house which are straight lines across the grid
+LINE_KINDS = ('row', 'column')
+
+_serials = itertools.count()
+
+
+class ConstraintGraph:
+    """
+    The immutable constraint tables for a variant.
+
+    * `houses`: groups of 9 cells which must contain every digit exactly once, such as rows,
+      columns, squares, and extra regions. `house_kinds` gives the kind of each house.
+    * `groups`: other groups of cells which cannot repeat a digit, but need not contain every
+      digit, such as killer cages. `group_kinds` gives the kind of each group.
+    * `relations`: variant-specific relations between cells which aren't simple peer
+      relations (such as the pointers of Index 159), keyed by kind.
+    * `peers`: for each cell, the sorted indices of every other cell it shares a house or group with.
+    * `peer_masks`: the same as `peers`, as bitmasks with bit `i` set for cell `i`.
+    * `cell_houses`: for each cell, the indices (into `houses`) of the houses containing it.
+    * `peer_groups`: the houses followed by the groups; every collection of cells which cannot
+      repeat a digit. `cell_peer_groups` gives, for each cell, the indices of those containing it.
+    * `intersections`: every pair of houses which share two or more cells, as tuples of 
+      `(intersection, first_rest, second_rest)`, giving the shared cells, the other cells of the
+      first house, and the other cells of the second house. The first house is never a row or 
+      column, so for classic sudoku these are the 54 intersections of a square with a line.
+    * `serial`: a number unique to this graph within the process, for use in cache keys.
+    """
+    def __init__(self, houses=(), house_kinds=(), groups=(), group_kinds=(), relations=None):
+        self.houses = tuple(tuple(house) for house in houses)
+        self.house_kinds = tuple(house_kinds)
+        self.groups = tuple(tuple(group) for group in groups)
+        self.group_kinds = tuple(group_kinds)
+        self.relations = {kind: tuple(items) for kind, items in (relations or {}).items()}
+        self.serial = next(_serials)
+
+        self.peer_groups = self.houses + self.groups
+        peer_masks = [0] * 81
+        cell_peer_groups = [[] for _ in range(81)]
+        for group_index, group in enumerate(self.peer_groups):
+            mask = 0
+            for index in group:
+                mask |= 1 << index
+                cell_peer_groups[index].append(group_index)
+            for index in group:
+                peer_masks[index] |= mask
+        self.peer_masks = tuple(mask & ~(1 << index) for index, mask in enumerate(peer_masks))
+        self.peers = tuple(
+            tuple(other for other in range(81) if mask >> other & 1)
+            for mask in self.peer_masks
+        )
+        self.cell_peer_groups = tuple(tuple(groups) for groups in cell_peer_groups)
+        self.cell_houses = tuple(
+            tuple(group for group in groups if group < len(self.houses))
+            for groups in self.cell_peer_groups
+        )
+        self.intersections = self._build_intersections()
+
+
+    def _build_intersections(self):
+        house_sets = [set(house) for house in self.houses]
+        intersections = []
+        for first, first_kind in enumerate(self.house_kinds):
+            if first_kind in LINE_KINDS:
+                continue
+            for second, second_kind in enumerate(self.house_kinds):
+                # Pairs of houses which are both not lines are only taken once, in order
+                if second == first or (second < first and second_kind not in LINE_KINDS):
+                    continue
+                intersection = house_sets[first] & house_sets[second]
+                if len(intersection) >= 2:
+                    intersections.append((
+                        tuple(sorted(intersection)),
+                        tuple(sorted(house_sets[first] - intersection)),
+                        tuple(sorted(house_sets[second] - intersection)),
+                    ))
+        return tuple(intersections)
+
+
+    def houses_of_kind(self, kind):
+        "Get the houses of the given kind (e.g. 'row'), in the order they were added"
+        return tuple(house for house, house_kind in zip(self.houses, self.house_kinds) if house_kind == kind)
+
+
+    def are_peers(self, first, second):
+        "Check whether two cells (given by flat index) share a house or group"
+        return bool(self.peer_masks[first] >> second & 1)
+
+
+
+class ConstraintGraphBuilder:
+    "Collects constraints from one or more variant contexts, to be compiled into a `ConstraintGraph`"
+    def __init__(self):
+        self.houses = []
+        self.house_kinds = []
+        self.groups = []
+        self.group_kinds = []
+        self.relations = {}
+
+
+    def add_house(self, kind, cells):
+        "Add a group of 9 cells (as flat indices) which must contain every digit exactly once"
+        cells = tuple(cells)
+        if len(cells) != 9 or len(set(cells)) != 9:
+            raise ValueError(f"A {kind} house must have exactly nine distinct cells, received {cells}")
+        if cells not in self.houses:
+            self.houses.append(cells)
+            self.house_kinds.append(kind)
+        return self
+
+
+    def add_group(self, kind, cells):
+        "Add a group of cells (as flat indices) which cannot repeat a digit"
+        cells = tuple(cells)
+        if len(set(cells)) != len(cells) or len(cells) > 9:
+            raise ValueError(f"A {kind} group must have at most nine distinct cells, received {cells}")
+        self.groups.append(cells)
+        self.group_kinds.append(kind)
+        return self
+
+
+    def add_relation(self, kind, relation):
+        "Add a variant-specific relation, which is stored in the graph as given"
+        self.relations.setdefault(kind, []).append(relation)
+        return self
+
+
+    def compile(self):
+        return ConstraintGraph(self.houses, self.house_kinds, self.groups, self.group_kinds, self.relations)
@@ -95,3 +95,11 @@ class Column(House):
             cell.column=self
 
 
+
+
+
+class Region(House):
+    "An extra house added by a variant, such as a diagonal or window, which must also contain each digit once"
+    def __init__(self, kind, *cells):
+        super().__init__(*cells)
+        self.kind = kind
@@ -1,5 +1,8 @@
 import itertools
+import re
 from copy import deepcopy, copy
+from .zobrist import VALUE_KEYS, hash_candidates
+from .symmetry import canonical_form
 
 class Puzzle:
     "The entire puzzle"
@@ -26,20 +29,47 @@ class Puzzle:
             ]) 
             for row_index, row in enumerate(puzzle_array)
         ])
+        self._flat_cells = tuple(cell for row in self.cells for cell in row)
         self._features = {}
-        self.variant_context.init_features(self, feature_map)
+        self._rehash()
+        self._bivalue_cells = {cell for row in self.cells for cell in row if len(cell.possible) == 2}
+        self._changed_cells = set() # Cells to recheck on the next incremental `find_conflicts`
+        # Bit `i` is set while cell `i` is open; see `open_cells`
+        open_indices = [cell._index for cell in self._flat_cells if cell._value is None]
+        self._open_mask = sum(1 << index for index in open_indices)
+        self._open_count = len(open_indices)
+        # The constraint graph is shared with other puzzles of the same variant. The features 
+        # (houses, cages, etc.) are only built if something asks for them; see `_load_features`.
+        self.constraint_graph = self.variant_context.constraint_graph(feature_map)
+        self._pending_feature_map = feature_map
     
 
     def __getattr__(self, name):
+        if name.startswith('__'):
+            # Special method lookups (e.g. by copy or pickle) are never features
+            raise AttributeError(name)
         try:
             features = object.__getattribute__(self, '_features')
+        except AttributeError:
+            features = None # _features is not yet defined
+        if features is not None:
             if name in features:
                 return features[name]
-        except AttributeError:
-            pass # _features is not yet defined
+            if self._load_features():
+                return getattr(self, name)
         raise AttributeError(f"No object property or puzzle feature '{name}'")
     
 
+    def _load_features(self):
+        "Initialize the puzzle's features, if that hasn't been done yet. Returns True if they were loaded by this call."
+        feature_map = self.__dict__.get('_pending_feature_map')
+        if feature_map is None:
+            return False
+        self._pending_feature_map = None
+        self.variant_context.init_features(self, feature_map)
+        return True
+    
+
     def __setattr__(self, name, value):
         try:
             is_feature = name in object.__getattribute__(self, '_features')
@@ -53,7 +83,7 @@ class Puzzle:
     
 
     @classmethod
-    def parse(cls, string):
+    def parse(cls, string, **feature_map):
         """
         Parse a puzzle string into a puzzle.
 
@@ -68,31 +98,144 @@ class Puzzle:
         4____6917
         62___7___
         _37_1__62
+
+        or all on one line, as 81 characters. Spaces and box-drawing characters are ignored, 
+        as are blank lines. Any character other than the digits 1 to 9 is a blank. Raises 
+        ValueError if the puzzle is not 9 rows of 9 cells.
+        """
+        string = string.translate(_PARSE_TABLE)
+        if not string.isascii():
+            string = _NON_ASCII.sub('.', string)
+        lines = [line for line in string.split('\n') if line]
+        if len(lines) != 1 and (len(lines) != 9 or any(len(line) != 9 for line in lines)):
+            raise ValueError(f"Expected 9 rows of 9 cells, or a single line of 81 cells; received rows of length {[len(line) for line in lines]}")
+        return cls.from_line(''.join(lines), **feature_map)
+    
+
+    @classmethod
+    def from_line(cls, line, **feature_map):
+        """
+        Create a puzzle from 81 cells, from left to right, top to bottom. `line` may be a string,
+        or a bytes-like object such as a record read from a file. Any character other than the
+        digits 1 to 9 (commonly '.' or '0') is a blank.
         """
-        string = (string.strip()
-            .replace('│', '')
-            .replace('║', '')
-            .replace('─', '')
-            .replace('═', '')
-            .replace('┼', '')
-            .replace('╬', '')
-            .replace('╪', '')
-            .replace('╫', '')
-            .replace('╔', '')
-            .replace('╗', '')
-            .replace('╚', '')
-            .replace('╝', '')
-            .replace(' ', '')
-        )
+        if not isinstance(line, str):
+            line = bytes(line).decode('latin-1')
+        if len(line) != 81:
+            raise ValueError(f"Expected 81 cells, received {len(line)}")
+        digits = _LINE_DIGITS
+        return cls([[digits.get(char) for char in line[start:start + 9]] for start in range(0, 81, 9)], **feature_map)
+    
+
+    def to_line(self, blank='.'):
+        "The puzzle as a line of 81 characters, from left to right, top to bottom, with `blank` for open cells"
+        return ''.join([blank if cell._value is None else str(cell._value) for cell in self._flat_cells])
+    
+    
+    def _rehash(self):
+        "Recompute the state hashes from scratch"
+        value_hash = 0
+        candidate_hash = 0
+        for row in self.cells:
+            for cell in row:
+                if cell.value is not None:
+                    value_hash ^= VALUE_KEYS[cell._index][cell.value]
+                candidate_hash ^= hash_candidates(cell._index, cell.possible)
+        self._value_hash = value_hash
+        self._candidate_hash = candidate_hash
+    
+
+    def _value_changed(self, cell, old_value, cleared_candidates):
+        "Called by a cell when its value is set, before its candidates are cleared"
+        self._changed_cells.add(cell._index)
+        bit = 1 << cell._index
+        if (cell._value is None) != bool(self._open_mask & bit):
+            self._open_mask ^= bit
+            self._open_count += 1 if cell._value is None else -1
+        keys = VALUE_KEYS[cell._index]
+        if old_value is not None:
+            self._value_hash ^= keys[old_value]
+        if cell.value is not None:
+            self._value_hash ^= keys[cell.value]
+        self._candidate_hash ^= hash_candidates(cell._index, cleared_candidates)
+        self._bivalue_cells.discard(cell)
+    
+
+    def _candidates_removed(self, cell, removed):
+        "Called by a cell after candidates have been removed from it"
+        if not cell.possible:
+            self._changed_cells.add(cell._index)
+        self._candidate_hash ^= hash_candidates(cell._index, removed)
+        if len(cell.possible) == 2:
+            self._bivalue_cells.add(cell)
+        else:
+            self._bivalue_cells.discard(cell)
+    
+
+    def _candidates_added(self, cell, added):
+        "Called by a cell after candidates have been restored to it"
+        self._changed_cells.add(cell._index)
+        self._candidate_hash ^= hash_candidates(cell._index, added)
+        if len(cell.possible) == 2:
+            self._bivalue_cells.add(cell)
+        else:
+            self._bivalue_cells.discard(cell)
+    
+
+    @property
+    def state_hash(self):
+        """
+        A 64-bit Zobrist hash of the current puzzle state, covering both the placed values and
+        the remaining candidates of every cell. 
         
-        return cls(list(filter(
-            lambda item: bool(item), # filter any blank lines out
-            map(
-                lambda row: list(map( # Convert numbers to ints, anything else to blanks (ignoring whitespace)
-                    lambda cell: int(cell) if cell.isnumeric() else None, 
-                    row.strip())), 
-                string.splitlines())
-            )))
+        The hash is maintained incrementally as values are placed and candidates are removed, 
+        so reading it is free. Modifying `cell.possible` directly (rather than through 
+        `remove_possible` or `limit_possible`) bypasses this bookkeeping.
+        """
+        return self._value_hash ^ self._candidate_hash
+    
+
+    @property
+    def flat_cells(self):
+        "All 81 cells as a flat tuple, from left to right, top to bottom"
+        return self._flat_cells
+    
+
+    @property
+    def bivalue_cells(self):
+        """
+        The set of open cells with exactly two candidates remaining. This is maintained 
+        incrementally, in the same way as `state_hash`.
+        """
+        return self._bivalue_cells
+    
+
+    @property
+    def open_cells(self):
+        """
+        A list of the open cells, from left to right, top to bottom. The open cells are tracked
+        as values are placed, so this doesn't need to check every cell.
+        """
+        cells = self._flat_cells
+        open_cells = []
+        mask = self._open_mask
+        while mask:
+            low_bit = mask & -mask
+            open_cells.append(cells[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return open_cells
+    
+
+    @property
+    def open_count(self):
+        "The number of open cells"
+        return self._open_count
+    
+
+    @property
+    def value_hash(self):
+        "Like `state_hash`, but only covering the placed values, ignoring candidates"
+        return self._value_hash
     
     
     def iter_cells(self, skip_full_cells=False, skip_open_cells=False, central_call=None):
@@ -102,33 +245,33 @@ class Puzzle:
         If `skip_full_cells` is True, skips any cell which already has a value in it. 
         
         If `central_call` is given, only iterates over cells in the same row, column, 
-        or square as that cell (not including the central cell itself). 
+        square, or other group of cells which cannot share a value (such as a killer cage) 
+        as that cell (not including the central cell itself). 
         
-        When `central_call` is given, cells are in no particular order. If `central_call` 
-        is not given, cells are given in order from left to right, top to bottom.
+        In either case, cells are given in order from left to right, top to bottom.
         """
         if central_call is None:
-            for row in self.rows:
-                for cell in row:
-                    if skip_full_cells and cell.is_full:
-                        continue
-                    if skip_open_cells and cell.is_open:
-                        continue
-                    yield cell
+            if skip_full_cells and not skip_open_cells:
+                yield from self.open_cells
+                return
+            cells = self._flat_cells
         else:
-            cells=set(central_call.row.cells+central_call.column.cells+central_call.square.cells)
-            cells.remove(central_call)
-            for cell in cells:
-                if skip_full_cells and cell.is_full:
-                    continue
-                if skip_open_cells and cell.is_open:
-                    continue
-                yield cell
+            cells = [self._flat_cells[index] for index in self.constraint_graph.peers[central_call._index]]
+        for cell in cells:
+            if skip_full_cells and cell.is_full:
+                continue
+            if skip_open_cells and cell.is_open:
+                continue
+            yield cell
     
     
     def iter_houses(self):
-        "Iterates over all rows, columns, and squares"
-        return itertools.chain(self.rows, self.columns, self.squares)
+        """
+        Iterates over all rows, columns, and squares, followed by any extra houses (such as 
+        diagonals or windows) which variant contexts register in the `extra_houses` feature
+        """
+        houses = itertools.chain(self.rows, self.columns, self.squares) # Loads the features, if needed
+        return itertools.chain(houses, self._features.get('extra_houses', ()))
     
     
     def update(self, other):
@@ -140,16 +283,44 @@ class Puzzle:
     
     def index(self, cell):
         "Returns the global coordinates of the cell"
+        if cell._puzzle is self and cell._index is not None:
+            return divmod(cell._index, 9)
         return (self.rows.index(cell.row), cell.row.cells.index(cell))
     
     
     def __getitem__(self, coords):
         row, column = coords
-        return self.rows[row][column]
+        return self.cells[row][column]
     
     
     def copy(self):
         return deepcopy(self)
+
+
+    def __deepcopy__(self, memo):
+        # The constraint graph is shared between puzzles, so copies share it too
+        graph = self.__dict__.get('constraint_graph')
+        memo[id(graph)] = graph
+        new = object.__new__(type(self))
+        memo[id(self)] = new
+        for name, value in self.__dict__.items():
+            object.__setattr__(new, name, deepcopy(value, memo))
+        return new
+    
+
+    def canonicalize(self):
+        """
+        Map the placed values of this puzzle onto the canonical representative of its 
+        classic sudoku symmetry class (digit relabeling, row/column permutations within 
+        bands/stacks, band/stack permutations, and transposition). Candidates are ignored.
+
+        Returns a tuple `(canonical, transform)`, where `canonical` is an 81-character string
+        with '0' for blanks, and `transform` is the `GridTransform` that maps this puzzle onto
+        it. Use `transform.inverse()` to map from the canonical form back to this puzzle.
+
+        This is only meaningful for variants whose rules are preserved by these transforms.
+        """
+        return canonical_form([[cell.value for cell in row] for row in self.cells])
     
     
     def __str__(self):
@@ -170,27 +341,106 @@ class Puzzle:
     def is_solved(self):
         "Returns True if all the cells in the puzzle are filled. "
         "Does not check if solution is valid. Use check for that."
-        for cell in self.iter_cells():
-            if cell.is_open:
-                return False
-        return True
+        return self._open_count == 0
     
     def check(self):
-        "Checks to make sure all values in puzzle are acceptable."
-        "Does not check if puzzle is actually solved. Use isSolved for that."
-        for cell in self.iter_cells():
-            if cell.is_open:
-                if not 1 <= len(cell.possible) <= 9:
-                    return False, cell
-            
-            else:
-                if not cell.value_valid:
-                    return False, cell
-                
-                for other_cell in self.iter_cells(central_call=cell):
-                    if cell.value==other_cell.value:
-                        return False, cell
+        """
+        Checks to make sure all values in puzzle are acceptable: no value repeats within a
+        house (or any other group of cells which can't repeat a value, such as a killer cage), 
+        every value is a valid digit, and every open cell still has a possible value.
+
+        Does not check if puzzle is actually solved. Use is_solved for that.
+
+        Returns `(True, None)`, or `(False, cell)` with the first problem cell from left to
+        right, top to bottom. Use `find_conflicts` to get every problem cell.
+        """
+        cells = self._flat_cells
+        for cell in cells:
+            if (not cell.possible) if cell._value is None else (not cell.value_valid):
+                return False, self.find_conflicts()[0]
+        for group in self.constraint_graph.peer_groups:
+            seen = 0
+            for index in group:
+                value = cells[index]._value
+                if value is not None:
+                    if seen >> value & 1:
+                        return False, self.find_conflicts()[0]
+                    seen |= 1 << value
         return True, None
+    
+
+    def find_conflicts(self, incremental=False):
+        """
+        Find every problem cell in the puzzle: cells whose value repeats within a house or 
+        group, cells with an invalid value, and open cells with no possible values left. 
+        Returns a list of the cells, from left to right, top to bottom.
+
+        If `incremental` is True, only the houses and groups containing cells which changed
+        since the last incremental call are checked, and the results for the rest are reused.
+        This is much cheaper when only a few cells change between checks, such as when 
+        validating after each edit. Changes made by assigning `cell.possible` directly are 
+        not tracked; use `cell.clear()` to erase a cell. A call which is not incremental does
+        not affect what the next incremental call will check.
+        """
+        graph = self.constraint_graph
+        cells = self._flat_cells
+        state = self.__dict__.get('_conflict_state') if incremental else None
+        if state is None:
+            group_conflicts, bad_cells = {}, set()
+            groups, changed = range(len(graph.peer_groups)), range(81)
+        else:
+            group_conflicts, bad_cells = state
+            changed = self._changed_cells
+            groups = {group for index in changed for group in graph.cell_peer_groups[index]}
+            self._changed_cells = set()
+
+        for group_index in groups:
+            seen = repeated = 0
+            for index in graph.peer_groups[group_index]:
+                value = cells[index]._value
+                if value is not None:
+                    repeated |= seen & (1 << value)
+                    seen |= 1 << value
+            if repeated:
+                group_conflicts[group_index] = frozenset(
+                    index for index in graph.peer_groups[group_index]
+                    if cells[index]._value is not None and repeated >> cells[index]._value & 1
+                )
+            else:
+                group_conflicts.pop(group_index, None)
+        for index in changed:
+            cell = cells[index]
+            if (not cell.possible) if cell._value is None else (not cell.value_valid):
+                bad_cells.add(index)
+            else:
+                bad_cells.discard(index)
+
+        if incremental:
+            self._conflict_state = (group_conflicts, bad_cells)
+        return [cells[index] for index in sorted(bad_cells.union(*group_conflicts.values()))]
+
+
+def _build_parse_table():
+    """
+    Build the translation table for `Puzzle.parse`: deletes whitespace (other than newlines) 
+    and box-drawing characters, keeps the digits 1 to 9, and turns any other ASCII character 
+    into '.'. Other characters are left to `Puzzle.parse`, so the table has a fixed size.
+    """
+    table = {}
+    # Every whitespace character is below U+3001
+    for code in itertools.chain(range(0x3001), range(0x2500, 0x2580)):
+        char = chr(code)
+        if char == '\n' or char in '123456789':
+            continue # Kept as is
+        elif char.isspace() or 0x2500 <= code <= 0x257F:
+            table[code] = None
+        elif code < 0x80:
+            table[code] = '.'
+    return table
+
+_PARSE_TABLE = _build_parse_table()
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+_LINE_DIGITS = {str(digit): digit for digit in range(1, 10)}
 
 
 PUZZLE_FORMAT_STRING="""\
@@ -0,0 +1,286 @@
+"""
+Tools for mapping a classic sudoku grid onto a canonical representative of its symmetry class.
+
+The validity of a classic sudoku grid is preserved by relabeling the digits, permuting the
+rows within a band (or the columns within a stack), permuting the bands (or stacks), and
+transposing the grid. Two puzzles related by any combination of these transforms are
+essentially the same puzzle, and have the same solution and the same logical solve path,
+after the transform is applied.
+
+The canonical form used here is the lexicographically smallest 81-character string (reading
+left to right, top to bottom, with '0' for blanks) that can be reached through these transforms,
+where digits are relabeled in order of their first appearance.
+"""
+from dataclasses import dataclass
+from itertools import permutations, product
+from typing import Tuple
+
+@dataclass(frozen=True)
+class GridTransform:
+    """
+    One element of the classic sudoku symmetry group.
+
+    The transformed grid is built by first transposing the source grid (if `transpose` is
+    set), then taking `rows[i]` as the i-th row and `columns[j]` as the j-th column, and
+    finally replacing each digit `d` with `digits[d]`. Index 0 of `digits` is unused.
+    """
+    transpose: bool
+    rows: Tuple[int]
+    columns: Tuple[int]
+    digits: Tuple[int]
+
+    def map_coords(self, row, column):
+        "Map coordinates in the source grid to coordinates in the transformed grid"
+        if self.transpose:
+            row, column = column, row
+        return self.rows.index(row), self.columns.index(column)
+
+    def map_value(self, value):
+        "Map a digit in the source grid to a digit in the transformed grid"
+        return self.digits[value] if value else value
+
+    def apply(self, array):
+        "Apply the transform to a 9x9 array of values (using None or 0 for blanks)"
+        if self.transpose:
+            array = list(zip(*array))
+        return [[self.map_value(array[row][column]) for column in self.columns] for row in self.rows]
+
+    def inverse(self):
+        "Get the transform which undoes this one"
+        rows = tuple(self.rows.index(index) for index in range(9))
+        columns = tuple(self.columns.index(index) for index in range(9))
+        digits = [0] * 10
+        for source, target in enumerate(self.digits):
+            digits[target] = source
+        if self.transpose:
+            return GridTransform(True, columns, rows, tuple(digits))
+        return GridTransform(False, rows, columns, tuple(digits))
+
+
+IDENTITY = GridTransform(False, tuple(range(9)), tuple(range(9)), tuple(range(10)))
+
+
+_UNLABELED = 10 # Ranks above every label; see `_refine`
+
+# Before any rows are placed, the three stacks are interchangeable, as are the columns in each
+_INITIAL_COLUMNS = (((0, 1, 2),), ((3, 4, 5),), ((6, 7, 8),)),
+
+
+def _next_rows(used_rows):
+    "Get the source rows which may be placed next, given those already placed, keeping bands together"
+    if len(used_rows) % 3:
+        band = used_rows[-1] // 3
+        return [row for row in range(band * 3, band * 3 + 3) if row not in used_rows]
+    used_bands = {row // 3 for row in used_rows}
+    return [row for row in range(9) if row // 3 not in used_bands]
+
+
+def _refine(columns, row, relabel):
+    """
+    Find the smallest arrangement of a source row, given the column arrangements still allowed.
+
+    `columns` describes every column order which ties for the smallest prefix so far, as a 
+    tuple of groups of interchangeable stacks, where each stack is a tuple of cells of 
+    interchangeable columns. Blanks sort first, then digits which already have a label, in 
+    label order, then unlabeled digits, which all rank the same: whichever comes first gets
+    the next label. 
+
+    Returns the refined arrangement as a list of groups, each a list of `(stacks, new_cells)`
+    pairs, where `new_cells` gives, for each stack, the indices of its cells of unlabeled 
+    digits. Where there are any, the order of the stacks and of the columns in those cells 
+    still has to be chosen (see `_branches`); each choice gives the same line, but assigns the
+    new labels differently.
+    """
+    refined = []
+    for group in columns:
+        stacks = []
+        for stack in group:
+            cells = []
+            signature = []
+            new_cells = []
+            for cell in stack:
+                blanks, labeled, new = [], [], []
+                for column in cell:
+                    value = row[column]
+                    if not value:
+                        blanks.append(column)
+                    elif relabel[value]:
+                        labeled.append((relabel[value], column))
+                    else:
+                        new.append(column)
+                if blanks:
+                    cells.append(tuple(blanks))
+                    signature.extend([0] * len(blanks))
+                for label, column in sorted(labeled):
+                    cells.append((column,))
+                    signature.append(label)
+                if new:
+                    if len(new) > 1:
+                        new_cells.append(len(cells))
+                    cells.append(tuple(new))
+                    signature.extend([_UNLABELED] * len(new))
+            stacks.append((signature, tuple(cells), tuple(new_cells)))
+        stacks.sort(key=lambda stack: stack[0])
+        runs = []
+        for signature, cells, new_cells in stacks:
+            if runs and runs[-1][0] == signature:
+                runs[-1][1].append(cells)
+                runs[-1][2].append(new_cells)
+            else:
+                runs.append((signature, [cells], [new_cells]))
+        refined.append([
+            (tuple(stacks), tuple(new_cells) if _UNLABELED in signature else None)
+            for signature, stacks, new_cells in runs
+        ])
+    return refined
+
+
+def _branches(refined):
+    "Expand the choices left open by `_refine` into every concrete arrangement of groups"
+    options = [()]
+    for group in refined:
+        for stacks, new_cells in group:
+            if new_cells is None:
+                choices = [(stacks,)]
+            else:
+                # Every order of the stacks, and of the columns within each cell of unlabeled digits
+                # Once labeled, the columns of new digits are no longer interchangeable
+                per_stack = [
+                    [sum(cells, ()) for cells in product(*(
+                        [tuple((column,) for column in order) for order in permutations(cell)] if index in new else [(cell,)]
+                        for index, cell in enumerate(stack)
+                    ))]
+                    for stack, new in zip(stacks, new_cells)
+                ]
+                choices = [
+                    tuple((per_stack[index][choice],) for index, choice in zip(order, choice_indices))
+                    for order in permutations(range(len(stacks)))
+                    for choice_indices in product(*(range(len(per_stack[index])) for index in order))
+                ]
+            options = [option + choice for option in options for choice in choices]
+    return options
+
+
+def _flatten(columns):
+    "The representative column order of an arrangement"
+    return tuple(column for group in columns for stack in group for cell in stack for column in cell)
+
+
+def _apply_labels(line_columns, row, relabel, next_label):
+    "Read the row in the given column order, labeling new digits in order of appearance"
+    relabel = list(relabel)
+    line = []
+    for column in line_columns:
+        value = row[column]
+        if value:
+            if not relabel[value]:
+                relabel[value] = next_label
+                next_label += 1
+            value = relabel[value]
+        line.append(value)
+    return tuple(line), relabel, next_label
+
+
+def _state_key(grid, used_rows, order):
+    """
+    Describe the rows still to be placed, read in the given column order. Together with the
+    labels and the shape of the column arrangement, this is everything that can still affect
+    the remainder of the canonical form, so search states with the same key are interchangeable.
+    """
+    def line(row):
+        return tuple(grid[row][column] for column in order)
+    current_band = ()
+    if len(used_rows) % 3:
+        current_band = tuple(sorted(line(row) for row in _next_rows(used_rows)))
+    used_bands = {row // 3 for row in used_rows}
+    remaining_bands = tuple(sorted(
+        tuple(sorted(line(row) for row in range(band * 3, band * 3 + 3)))
+        for band in range(3) if band not in used_bands
+    ))
+    return current_band, remaining_bands
+
+
+def _is_discrete(columns):
+    "Check whether an arrangement allows only a single column order"
+    return all(len(group) == 1 and all(len(cell) == 1 for cell in group[0]) for group in columns)
+
+
+def canonical_form(array):
+    """
+    Find the canonical form of a 9x9 array of values (using None or 0 for blanks).
+
+    Returns a tuple `(canonical, transform)`, where `canonical` is the canonical 81-character
+    string and `transform` is a `GridTransform` mapping the given grid onto it.
+
+    The search builds the canonical form one row at a time, keeping every partial transform
+    which ties for the smallest prefix so far. Rather than trying each of the 1296 column
+    orders, each partial transform keeps track of which columns are still interchangeable
+    (see `_refine`), and only branches where the choice affects how digits are labeled.
+    Partial transforms whose remaining rows are indistinguishable are merged, which keeps 
+    highly symmetrical grids tractable.
+    """
+    grid = tuple(tuple(value or 0 for value in row) for row in array)
+    sources = (grid, tuple(zip(*grid)))
+
+    # Search states are (transpose, used_rows, columns, column order, discrete, relabel, next_label)
+    frontier = [
+        (transpose, (), _INITIAL_COLUMNS, _flatten(_INITIAL_COLUMNS), False, (0,) * 10, 1)
+        for transpose in range(2)
+    ]
+    canonical = []
+    for step in range(9):
+        best = None
+        candidates = []
+        for transpose, used_rows, columns, order, discrete, relabel, next_label in frontier:
+            source = sources[transpose]
+            for row in _next_rows(used_rows):
+                if discrete:
+                    # Nothing left to choose; just read the row
+                    line, new_relabel, new_next_label = _apply_labels(order, source[row], relabel, next_label)
+                    arrangements = ((columns, order, line, new_relabel, new_next_label),)
+                else:
+                    arrangements = []
+                    for arrangement in _branches(_refine(columns, source[row], relabel)):
+                        arrangement_order = _flatten(arrangement)
+                        arrangements.append((arrangement, arrangement_order) + _apply_labels(arrangement_order, source[row], relabel, next_label))
+                for arrangement, arrangement_order, line, new_relabel, new_next_label in arrangements:
+                    if best is not None and line > best:
+                        continue
+                    if best is None or line < best:
+                        best = line
+                        candidates = []
+                    candidates.append((
+                        transpose, used_rows + (row,), arrangement, arrangement_order,
+                        discrete or _is_discrete(arrangement), tuple(new_relabel), new_next_label))
+        canonical.append(best)
+        if step == 8:
+            frontier = candidates
+            break
+        # Merge interchangeable states. Reading the remaining rows is relatively expensive, so 
+        # it is only done for states whose labels and arrangement shape already match another's
+        similar = {}
+        for state in candidates:
+            shape = tuple(tuple(tuple(len(cell) for cell in stack) for stack in group) for group in state[2])
+            similar.setdefault((state[5], shape), []).append(state)
+        frontier = []
+        for states in similar.values():
+            if len(states) == 1:
+                frontier.extend(states)
+                continue
+            seen = set()
+            for state in states:
+                transpose, used_rows, _, order, _, _, _ = state
+                key = _state_key(sources[transpose], used_rows, order)
+                if key not in seen:
+                    seen.add(key)
+                    frontier.append(state)
+
+    transpose, rows, columns, order, _, relabel, next_label = frontier[0]
+    relabel = list(relabel)
+    # Digits which never appear in the grid are still assigned labels, so the transform is invertible
+    for digit in range(1, 10):
+        if not relabel[digit]:
+            relabel[digit] = next_label
+            next_label += 1
+    transform = GridTransform(bool(transpose), rows, order, tuple(relabel))
+    return ''.join(str(value) for line in canonical for value in line), transform
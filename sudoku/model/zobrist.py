@@ -0,0 +1,27 @@
+"""
+Random keys for maintaining an incremental Zobrist hash of the puzzle state.
+
+Every (cell, value) and (cell, candidate) pair gets its own random 64-bit key. The
+hash of a puzzle is the XOR of the keys for every placed value and every remaining
+candidate, so it can be updated in constant time whenever a single value is placed
+or a candidate is removed, rather than walking the whole grid.
+
+The keys are generated from a fixed seed so that hashes are stable between processes.
+"""
+import random
+
+_random = random.Random(0x5D0C0)
+
+# Indexed as KEYS[cell_index][digit], where cell_index is row * 9 + column. Index 0 of
+# the inner tuples is unused, so digits can be used directly as indices.
+VALUE_KEYS = tuple(tuple(_random.getrandbits(64) for digit in range(10)) for cell_index in range(81))
+CANDIDATE_KEYS = tuple(tuple(_random.getrandbits(64) for digit in range(10)) for cell_index in range(81))
+
+
+def hash_candidates(cell_index, candidates):
+    "XOR together the candidate keys for the given candidates of a single cell"
+    keys = CANDIDATE_KEYS[cell_index]
+    result = 0
+    for candidate in candidates:
+        result ^= keys[candidate]
+    return result
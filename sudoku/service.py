@@ -0,0 +1,410 @@
+"""
+A local solver service, speaking JSON over HTTP (or over a Unix socket).
+
+Run it with `python -m sudoku.service --port 8080`. Each endpoint takes a POST with a JSON
+object containing `puzzle`, in any format `Puzzle.parse` accepts, and optionally `variant`
+(one of `VARIANTS`, default 'classic') and `features` (the variant's feature map, with the keys in `VARIANT_FEATURES`, e.g.
+`cage_layout` and `cage_sums` for killer, or `jigsaw_layout` for jigsaw):
+
+* `/solve`: solve the puzzle; also accepts `brute_force_level`
+* `/hint`: the next step the solver would take, without applying the rest of the solve
+* `/validate`: check the puzzle for repeated values and cells with no possible values
+* `/count`: count the solutions, up to `limit` (default 2)
+
+`GET /health` reports the queue length. Puzzles are given back in the 81-character line format.
+
+Requests are solved in a pool of worker processes, which build the variant contexts and solvers
+once at startup, so a request pays for neither the imports nor the context setup. Requests
+waiting in the queue are sent to the workers in batches, so that many small requests share a
+single round trip to a worker. When more than `max_queue` requests are waiting, new requests
+are turned away with a 503 rather than left to wait indefinitely.
+
+Each request has its own deadline, `request_timeout` seconds after it arrives. A request which
+isn't answered by then gets a 504, whether it is still waiting or still being solved; searches
+(brute forcing and counting) give up at the deadline, and requests which have already expired 
+are skipped by the workers. If a worker process dies, the pool is replaced.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .exception import SudokuError, SearchTimeout
+from .algorithms import eliminate_possibilities
+from .solver import Solver
+from .stepper import Stepper
+from .variant_context import ClassicContext
+from .extensions.killer import ClassicKillerContext
+from .extensions.jigsaw import JigsawContext
+from .extensions.index159 import Classic159Context
+from .extensions.regions import ClassicDiagonalContext, ClassicWindowContext, ClassicAsteriskContext, ClassicRelativePositionContext
+
+__all__ = [
+    'VARIANTS',
+    'VARIANT_FEATURES',
+    'ServiceError',
+    'SolverService',
+    'handle_request',
+    'main',
+]
+
+VARIANTS = {
+    'classic': ClassicContext,
+    'killer': ClassicKillerContext,
+    'jigsaw': JigsawContext,
+    'index159': Classic159Context,
+    'diagonal': ClassicDiagonalContext,
+    'window': ClassicWindowContext,
+    'asterisk': ClassicAsteriskContext,
+    'relative_position': ClassicRelativePositionContext,
+}
+
+VARIANT_FEATURES = { # The feature map keys each variant reads; any others are rejected
+    'killer': frozenset(['cages', 'cage_layout', 'cage_sums']),
+    'jigsaw': frozenset(['jigsaw_layout']),
+}
+
+HTTP_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout'}
+MAX_BODY_SIZE = 1 << 16
+
+
+class ServiceError(Exception):
+    "An error to be reported to the client, with the given HTTP status"
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+
+# Worker side
+
+_solvers = None # Solvers for each variant, built once per worker process
+
+def _init_worker():
+    global _solvers
+    _solvers = {name: Solver(Context()) for name, Context in VARIANTS.items()}
+
+
+def _solver_for(request):
+    if _solvers is None:
+        _init_worker()
+    variant = request.get('variant', 'classic')
+    if variant not in _solvers:
+        raise ServiceError(400, f"Unknown variant {variant!r}; expected one of {sorted(VARIANTS)}")
+    return _solvers[variant]
+
+
+def _parse_puzzle(solver, request):
+    puzzle = request.get('puzzle')
+    if not isinstance(puzzle, str):
+        raise ServiceError(400, "The request must include the puzzle as a string")
+    features = request.get('features', {})
+    if not isinstance(features, dict):
+        raise ServiceError(400, "The puzzle features must be an object")
+    unknown = features.keys() - VARIANT_FEATURES.get(request.get('variant', 'classic'), frozenset())
+    if unknown:
+        raise ServiceError(400, f"Unknown feature {min(unknown)!r} for the {request.get('variant', 'classic')} variant")
+    try:
+        return solver.variant_context.Puzzle.parse(puzzle, **features)
+    except (ValueError, TypeError) as err:
+        raise ServiceError(400, f"Error reading puzzle: {err}")
+
+
+def _solve(solver, puzzle, request, deadline):
+    brute_force_level = request.get('brute_force_level', 0)
+    if not isinstance(brute_force_level, int) or not 0 <= brute_force_level <= 2:
+        raise ServiceError(400, "brute_force_level must be 0, 1, or 2")
+    solution = solver.solve(puzzle, brute_force_level, raise_contradictions=False, deadline=deadline)
+    return {'solved': solution.success, 'contradiction': solution.contradiction, 'puzzle': puzzle.to_line()}
+
+
+def _hint(solver, puzzle, request, deadline):
+    stepper = Stepper(puzzle)
+    try:
+        # Requests carry no candidates, so the eliminations implied by the placed values are 
+        # made first, without being reported, and the hint is the first real deduction
+        eliminate_possibilities.run(puzzle, Stepper(puzzle))
+        next(solver.step_through_algorithms(puzzle, stepper), None)
+    except SudokuError as err:
+        return {'hint': None, 'contradiction': True, 'message': err.error_message}
+    if len(stepper) < 2:
+        return {'hint': None, 'contradiction': False}
+    algorithm, step_units = stepper.steps[1]
+    return {
+        'hint': {
+            'algorithm': algorithm,
+            'units': [{'row': unit.row, 'column': unit.column, 'values': list(unit.values), 'mode': unit.mode} for unit in step_units],
+        },
+        'contradiction': False,
+    }
+
+
+def _validate(solver, puzzle, request, deadline):
+    conflicts = puzzle.find_conflicts()
+    return {'valid': not conflicts, 'solved': puzzle.is_solved and not conflicts, 'conflicts': [list(divmod(cell._index, 9)) for cell in conflicts]}
+
+
+def _count(solver, puzzle, request, deadline):
+    limit = request.get('limit', 2)
+    if not isinstance(limit, int) or not 1 <= limit <= 1000:
+        raise ServiceError(400, "limit must be between 1 and 1000")
+    return {'count': solver.count_solutions(puzzle, limit, deadline), 'limit': limit}
+
+
+OPERATIONS = {
+    'solve': _solve,
+    'hint': _hint,
+    'validate': _validate,
+    'count': _count,
+}
+
+
+def handle_request(operation, request, deadline=None):
+    """
+    Handle a single request in this process, returning `(status, response)`. This is what the
+    workers run for each request of a batch.
+
+    `deadline` is the time (as a `time.time()` value, since it is set by another process) at 
+    which to give up on the request with a 504.
+    """
+    try:
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise SearchTimeout()
+            deadline = time.monotonic() + remaining
+        if operation not in OPERATIONS:
+            raise ServiceError(404, f"Unknown operation {operation!r}")
+        if not isinstance(request, dict):
+            raise ServiceError(400, "The request body must be a JSON object")
+        solver = _solver_for(request)
+        puzzle = _parse_puzzle(solver, request)
+        return 200, OPERATIONS[operation](solver, puzzle, request, deadline)
+    except SearchTimeout:
+        return 504, {'error': "The request was not finished before its deadline"}
+    except ServiceError as err:
+        return err.status, {'error': str(err)}
+    except Exception as err:
+        return 500, {'error': f"{type(err).__name__}: {err}"}
+
+
+def _handle_batch(batch):
+    return [handle_request(operation, request, deadline) for operation, request, deadline in batch]
+
+
+
+# Server side
+
+class SolverService:
+    """
+    Accepts requests over HTTP and hands them to a pool of `workers` processes.
+
+    Up to `batch_size` waiting requests are sent to a worker together. A batch is sent as soon
+    as a worker is free; if fewer than `batch_size` requests are waiting, the dispatcher waits
+    up to `batch_delay` seconds for more to arrive first. At most `max_queue` requests may be
+    waiting at once, and each must be answered within `request_timeout` seconds.
+    """
+    def __init__(self, workers=None, max_queue=1000, batch_size=16, batch_delay=0.002, request_timeout=10.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.request_timeout = request_timeout
+        self._executor = None
+        self._queue = None
+        self._dispatchers = []
+
+
+    async def start(self):
+        "Start the worker processes, and wait until every one of them is ready"
+        self._executor = self._new_executor()
+        self._queue = asyncio.Queue(self.max_queue)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _handle_batch, []) for _ in range(self.workers)))
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker)
+
+
+    def _replace_executor(self, broken):
+        "Replace a pool which has lost a worker process, unless another dispatcher already has"
+        if self._executor is broken:
+            broken.shutdown(wait=False)
+            self._executor = self._new_executor()
+
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+    async def submit(self, operation, request):
+        "Queue a request for the workers, and wait for its `(status, response)`"
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((operation, request, time.time() + self.request_timeout, future))
+        except asyncio.QueueFull:
+            return 503, {'error': "The service is busy; try again later"}
+        try:
+            return await asyncio.wait_for(future, self.request_timeout)
+        except asyncio.TimeoutError:
+            return 504, {'error': "The request was not finished before its deadline"}
+
+
+    async def _dispatch(self):
+        "Send batches of waiting requests to a worker, one batch at a time"
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            # Requests which have already timed out have been answered, so needn't be solved
+            batch = [item for item in batch if not item[-1].done()]
+            if not batch:
+                continue
+            executor = self._executor
+            try:
+                results = await loop.run_in_executor(executor, _handle_batch, [item[:-1] for item in batch])
+            except BrokenProcessPool as err:
+                self._replace_executor(executor)
+                results = [(500, {'error': f"A worker process died: {err}"})] * len(batch)
+            except Exception as err:
+                results = [(500, {'error': f"{type(err).__name__}: {err}"})] * len(batch)
+            for (*_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+    async def handle_connection(self, reader, writer):
+        "Serve HTTP/1.1 requests on a connection until the client closes it"
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = await self._handle_http(request_line, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def _handle_http(self, request_line, reader, writer):
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            self._respond(writer, 400, {'error': "Malformed request line"}, False)
+            return False
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+        length = headers.get('content-length') or '0'
+        if not (length.isascii() and length.isdigit()):
+            self._respond(writer, 400, {'error': f"Invalid Content-Length {length!r}"}, False)
+            return False
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            self._respond(writer, 413, {'error': f"Request bodies are limited to {MAX_BODY_SIZE} bytes"}, False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        operation = path.strip('/')
+        if method == 'GET' and operation == 'health':
+            status, response = 200, {'status': 'ok', 'queued': self._queue.qsize(), 'workers': self.workers}
+        elif operation not in OPERATIONS:
+            status, response = 404, {'error': f"Unknown path {path}"}
+        elif method != 'POST':
+            status, response = 405, {'error': "Use POST"}
+        else:
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError as err:
+                status, response = 400, {'error': f"Invalid JSON: {err}"}
+            else:
+                status, response = await self.submit(operation, request)
+        self._respond(writer, status, response, keep_alive)
+        return keep_alive
+
+
+    def _respond(self, writer, status, response, keep_alive):
+        body = json.dumps(response).encode()
+        headers = [
+            f"HTTP/1.1 {status} {HTTP_STATUS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+
+
+    async def serve(self, host='127.0.0.1', port=8080, unix_path=None):
+        "Start the workers and serve requests until cancelled"
+        async with self:
+            if unix_path is not None:
+                server = await asyncio.start_unix_server(self.handle_connection, unix_path)
+            else:
+                server = await asyncio.start_server(self.handle_connection, host, port)
+            async with server:
+                await server.serve_forever()
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local sudoku solver service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--unix', metavar='PATH', help="Listen on a Unix socket at PATH instead of a TCP port")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: one per CPU)")
+    parser.add_argument('--max-queue', type=int, default=1000, help="Number of waiting requests before responding with 503")
+    parser.add_argument('--batch-size', type=int, default=16, help="Most requests sent to a worker at once")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Seconds to answer each request within, before responding with 504")
+    args = parser.parse_args(argv)
+    service = SolverService(args.workers, args.max_queue, args.batch_size, request_timeout=args.timeout)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
-from .exception import SudokuError
+from .exception import SudokuError, Contradiction, SearchTimeout
 from .stepper import Stepper, StepUnit, PLACE
 from .model import Puzzle
+from .transposition import TranspositionTable, CONTRADICTION, SOLVED, UNSOLVED, search_key
+from .cache import CachedSolve, transform_steps
 from dataclasses import dataclass
+import time
 import warnings
 
 
@@ -10,35 +13,68 @@ class Solution:
     success: bool
     steps: Stepper
     puzzle: Puzzle
+    contradiction: bool = False # The puzzle was found to have no solution
  
 class Solver:
-    def __init__(self, variant_context, algorithms='auto'):
+    def __init__(self, variant_context, algorithms='auto', transposition_table_size=100_000, cache=None, batch_steps=False):
+        """
+        `transposition_table_size` bounds the number of puzzle states remembered between
+        brute force branches. Set it to 0 to disable the transposition table.
+
+        `cache` may be a `SolveCache`, which will be used to look up (and store) the logical
+        solve of puzzles that are equivalent under the classic sudoku symmetries. It is only
+        used for variant contexts which support those symmetries.
+
+        If `batch_steps` is True, each single-step algorithm that finds something will be allowed 
+        to run through the rest of its pass, recording each finding as a separate step, before the
+        solver restarts from the simplest algorithm. This avoids re-running the cheaper algorithms 
+        between each of several independent findings, at the cost of occasionally using a harder 
+        technique where a simpler one would have become available.
+        """
         self.variant_context = variant_context
         self.algorithms = algorithms
+        self.cache = cache
+        self.batch_steps = batch_steps
+        self.transposition_table = TranspositionTable(transposition_table_size) if transposition_table_size else None
     
 
-    def solve(self, puzzle: Puzzle, brute_force_level: int = 0, stepper: Stepper = None) -> Solution:
+    def solve(self, puzzle: Puzzle, brute_force_level: int = 0, stepper: Stepper = None, raise_contradictions: bool = True, deadline: float = None) -> Solution:
         """
         Try to solve the given puzzle. 
 
         The puzzle will be modified in-place with the new solution. If you want to keep the
         original value, pass the puzzle with puzzle.copy()
+
+        If the puzzle turns out to have no solution, a `Contradiction` is raised, unless 
+        `raise_contradictions` is False, in which case an unsuccessful `Solution` with 
+        `contradiction` set is returned instead.
+
+        If a `deadline` is given (as a `time.monotonic()` value), brute forcing stops with a 
+        `SearchTimeout` once it has passed.
         """
         if stepper is None:
             stepper = Stepper(puzzle)
         
-        for _ in self.step_through_algorithms(puzzle, stepper):
-            pass
-        
-        if puzzle.is_solved:
-            ok, problem_cell = self.variant_context.check_puzzle(puzzle)
-            if ok:
-                return Solution(True, stepper, puzzle)
+        try:
+            if self._can_use_cache(puzzle):
+                self._solve_through_cache(puzzle, stepper)
             else:
-                raise SudokuError("Invalid Solution", puzzle, cell=problem_cell, stepper=stepper)
+                for _ in self.step_through_algorithms(puzzle, stepper):
+                    pass
+        
+            if puzzle.is_solved:
+                ok, problem_cell = self.variant_context.check_puzzle(puzzle)
+                if ok:
+                    return Solution(True, stepper, puzzle)
+                else:
+                    raise Contradiction("Invalid Solution", puzzle, cell=problem_cell, stepper=stepper)
+        except Contradiction:
+            if raise_contradictions:
+                raise
+            return Solution(False, stepper, puzzle, contradiction=True)
         else:
             if brute_force_level:
-                brute_forced = self.brute_force_solve(puzzle, brute_force_level)
+                brute_forced = self.brute_force_solve(puzzle, brute_force_level, deadline=deadline)
                 if brute_forced is not None:
                     puzzle.update(brute_forced.puzzle)
                     warnings.warn("Brute force used; puzzle may not have a unique solution")
@@ -47,7 +83,42 @@ class Solver:
             return Solution(False, stepper, puzzle)
 
 
-    def brute_force_solve(self, puzzle: Puzzle, recurse_level: int, stepper: Stepper = None) -> Solution:
+    def _can_use_cache(self, puzzle):
+        """
+        The cache can only be used for symmetric variants, and for puzzles that have not been 
+        partially solved. It is not worth canonicalizing a puzzle which is already solved.
+        """
+        if self.cache is None or not self.variant_context.supports_symmetry or puzzle.is_solved:
+            return False
+        for cell in puzzle.open_cells:
+            if len(cell.possible) != 9:
+                return False
+        return True
+    
+
+    def _solve_through_cache(self, puzzle: Puzzle, stepper: Stepper):
+        """
+        Run the algorithms on the puzzle, unless an equivalent puzzle is already in the cache,
+        in which case the cached steps are replayed through the inverse transform instead.
+        """
+        canonical, transform = puzzle.canonicalize()
+        key = f"{type(self.variant_context).__qualname__}:{self.algorithms}:{int(self.batch_steps)}:{canonical}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            stepper.replay(puzzle, transform_steps(cached.steps, transform.inverse()))
+            return
+        
+        first_step = len(stepper)
+        for _ in self.step_through_algorithms(puzzle, stepper):
+            pass
+        canonical_grid = transform.apply([[cell.value for cell in row] for row in puzzle.cells])
+        self.cache.put(key, CachedSolve(
+            ''.join(str(value or 0) for row in canonical_grid for value in row),
+            transform_steps(stepper.steps[first_step:], transform)
+        ))
+
+
+    def brute_force_solve(self, puzzle: Puzzle, recurse_level: int, stepper: Stepper = None, deadline: float = None) -> Solution:
         """
         Try to brute force a solution. This will loop through each possibility 
         of each empty cell, and call solve() on a puzzle with that cell set
@@ -60,7 +131,25 @@ class Solver:
         one or two recursion layers however.
 
         Return a solved copy of the puzzle if a solution is found.
+
+        States already explored (possibly through a different branch order, or by an earlier 
+        solve with this solver) are looked up in the transposition table, so repeated subtrees 
+        are only searched once, and solutions already found are reused.
+
+        If a `deadline` is given (as a `time.monotonic()` value), a `SearchTimeout` is raised 
+        once it has passed. Branches finished before then are still kept in the table.
         """
+        table = self.transposition_table
+        if table is not None:
+            puzzle_hash = search_key(puzzle)
+            entry = table.lookup(puzzle_hash)
+            if entry is not None:
+                outcome, recorded_level, solution = entry
+                if outcome == SOLVED:
+                    return solution
+                if outcome == UNSOLVED and recorded_level >= recurse_level:
+                    return None
+
         if stepper is None:
             stepper = Stepper(puzzle)
         for cell in puzzle.iter_cells():
@@ -71,13 +160,68 @@ class Solver:
                 copy_cell = copy_puzzle[cell_index]
                 copy_cell.value = possible
                 copy_stepper.record_step('brute_force', StepUnit(*cell_index, (possible,), PLACE))
+                _check_deadline(deadline)
+                branch_level = (recurse_level-1) if recurse_level else 0
+                if table is not None:
+                    branch_hash = search_key(copy_puzzle)
+                    entry = table.lookup(branch_hash)
+                    if entry is not None:
+                        outcome, recorded_level, solution = entry
+                        if outcome == SOLVED:
+                            # Already solved from this branch (possibly by an earlier solve), so reuse it
+                            table.record(puzzle_hash, SOLVED, recurse_level, solution)
+                            return solution
+                        if outcome == CONTRADICTION or recorded_level >= branch_level:
+                            continue
+                # Dead branches are reported as a status rather than raised, as they are by far the most common outcome
                 try:
-                    solution = self.solve(copy_puzzle, brute_force_level = (recurse_level-1) if recurse_level else 0)
+                    solution = self.solve(copy_puzzle, brute_force_level = branch_level, raise_contradictions=False, deadline=deadline)
                 except SudokuError:
+                    # Any other error in the branch (such as from a variant's own checks) also ends it
+                    solution = None
+                if solution is None or solution.contradiction:
+                    if table is not None:
+                        table.record(branch_hash, CONTRADICTION)
                     continue #Try the next possibility
-                else:
-                    if solution.success:
-                        return solution
+                if solution.success:
+                    if table is not None:
+                        table.record(branch_hash, SOLVED, branch_level, solution)
+                        table.record(puzzle_hash, SOLVED, recurse_level, solution)
+                    return solution
+                elif table is not None:
+                    table.record(branch_hash, UNSOLVED, branch_level)
+        if table is not None:
+            table.record(puzzle_hash, UNSOLVED, recurse_level)
+    
+
+    def count_solutions(self, puzzle: Puzzle, limit: int = 2, deadline: float = None) -> int:
+        """
+        Count the solutions of the puzzle, stopping once `limit` have been found (so the default
+        of 2 is enough to tell whether a puzzle has a unique solution). The puzzle is not modified.
+
+        The solver's algorithms are applied first, then each candidate of the open cell with the
+        fewest candidates is tried in turn, and so on recursively. If a `deadline` is given (as a
+        `time.monotonic()` value), a `SearchTimeout` is raised once it has passed.
+        """
+        puzzle = puzzle.copy()
+        solution = self.solve(puzzle, raise_contradictions=False)
+        if solution.contradiction:
+            return 0
+        if solution.success:
+            return 1
+        cell = min(puzzle.open_cells, key=lambda cell: len(cell.possible))
+        count = 0
+        for possible in sorted(cell.possible):
+            _check_deadline(deadline)
+            branch = puzzle.copy()
+            branch[divmod(cell._index, 9)].value = possible
+            try:
+                count += self.count_solutions(branch, limit - count, deadline)
+            except SudokuError:
+                pass # As in `brute_force_solve`, an error ends only the branch
+            if count >= limit:
+                break
+        return count
     
 
     def step_through_algorithms(self, puzzle: Puzzle, stepper: Stepper):
@@ -96,7 +240,7 @@ class Solver:
         while True:
             try:
                 for alg in algorithms:
-                    if alg.run(puzzle, stepper):
+                    if alg.run(puzzle, stepper, self.batch_steps):
                         # break out of the for loop and start over with the most basic algorithm. This ensures 
                         # we are always using the most simple techniques possible, only reaching for advanced 
                         # techniques when required
@@ -110,3 +254,8 @@ class Solver:
                 # We want to add the stepper to any raised sudoku errors for debug purposes
                 err.stepper = stepper
                 raise err
+
+
+def _check_deadline(deadline):
+    if deadline is not None and time.monotonic() > deadline:
+        raise SearchTimeout("The search did not finish before its deadline")
@@ -47,6 +47,26 @@ class Stepper:
     
     def record_step(self, algorithm_name, step_units):
         self._steps.append((algorithm_name, step_units))
+
+    def replay(self, puzzle, steps):
+        """
+        Apply a sequence of `(algorithm_name, step_units)` pairs (such as those from `steps`) 
+        to the puzzle, recording each one as a step
+        """
+        for algorithm_name, step_units in steps:
+            apply_steps(puzzle, step_units)
+            self.record_step(algorithm_name, step_units)
+
+    @property
+    def steps(self):
+        """
+        The recorded steps, as `(algorithm_name, step_units)` pairs. The first is always the 
+        'start' step, which has no step units.
+        """
+        return tuple(self._steps)
+
+    def __len__(self):
+        return len(self._steps)
     
     def get_puzzle_before_step(self, step_index):
         """
@@ -72,7 +92,7 @@ class Stepper:
             raise IndexError("Step index not yet recorded")
         puzzle = self._starting_puzzle.copy()
         for _, step_units in self._steps[:step_index+1]: 
-            _apply_steps(puzzle, step_units)
+            apply_steps(puzzle, step_units)
         return puzzle
     
 
@@ -80,7 +100,7 @@ class Stepper:
         puzzle_before = self._starting_puzzle.copy()
         for algorithm, step_units in self._steps:
             puzzle_after = puzzle_before.copy()
-            _apply_steps(puzzle_after, step_units)
+            apply_steps(puzzle_after, step_units)
             yield Step(algorithm, step_units, puzzle_before, puzzle_after)
             puzzle_before = puzzle_after
     
@@ -105,7 +125,8 @@ class Stepper:
     
 
 
-def _apply_steps(puzzle, step_units):
+def apply_steps(puzzle, step_units):
+    "Apply the changes described by the step units of a single step to the puzzle"
     for unit in step_units:
         if unit.mode == PLACE:
             puzzle[unit.row, unit.column].value = unit.values[0]
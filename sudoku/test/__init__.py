@@ -1,4 +1,10 @@
 from .test_algorithms import *
 from .test_solver import *
 from .test_misc import *
-from .test_index159 import *
\ No newline at end of file
+from .test_index159 import *
+from .test_batch import *
+from .test_killer import *
+from .test_regions import *
+from .test_jigsaw import *
+from .test_io import *
+from .test_service import *
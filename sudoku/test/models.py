@@ -25,8 +25,7 @@ class TestCell(Cell):
     def value(self, value):
         if value != self.expected_value:
             raise PresolvedTestPuzzleViolation(f"Solver placed {value} where {self.expected_value} was the correct solution", self.puzzle, self)
-        self._value = value
-        self.possible.clear()
+        Cell.value.fset(self, value)
     
     def remove_possible(self, *values):
         if self.expected_value in values:
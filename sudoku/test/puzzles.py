@@ -261,4 +261,146 @@ index_159_puzzles = {
             [_, _, _,   _, _, 9,    5, 3, _],
             [_, 7, _,   2, _, _,    _, _, _]
         ],
-}
\ No newline at end of file
+}
+
+killer_puzzles = {
+
+    "Generated": # Built from a known solution; not solvable by the classic algorithms alone
+        {
+            "givens": [
+                [_, _, _,   _, 7, 8,    9, _, _],
+                [_, _, _,   1, _, _,    _, _, 8],
+                [1, 9, _,   _, _, _,    _, _, _],
+                
+                [8, _, _,   _, _, 1,    4, _, _],
+                [4, _, 6,   _, _, _,    _, _, _],
+                [7, 1, _,   _, 2, _,    8, _, 6],
+                
+                [_, _, _,   _, _, _,    _, 8, 4],
+                [_, 8, 7,   _, _, 9,    _, _, _],
+                [_, _, _,   _, _, _,    _, _, _]
+            ],
+            "cage_layout": """
+                aabbbccdd
+                eabfghcid
+                eefffhiid
+                jkkllmnno
+                jkpqlmrno
+                sspqqtrru
+                vwwxxtyyu
+                vwzzxAAyB
+                CCCzDDABB
+            """,
+            "cage_sums": "a=15 b=19 c=20 d=18 e=16 f=16 g=9 h=7 i=15 j=12 k=16 l=18 m=4 n=15 o=4 p=9 q=19 r=20 s=8 t=11 u=10 v=11 w=15 x=9 y=13 z=13 A=16 B=21 C=12 D=14",
+            "solution": "534678912672195348198342567859761423426853791713924856961537284287419635345286179",
+        },
+}
+
+
+region_puzzles = { # Generated from known solutions; not solvable by the classic algorithms alone
+
+    "Diagonal":
+        {
+            "givens": [
+                [2, _, _,   3, _, 7,    _, _, 8],
+                [_, _, 6,   _, 9, _,    _, _, _],
+                [_, 8, _,   _, _, _,    _, _, _],
+                
+                [_, _, _,   _, 8, 6,    7, 3, 1],
+                [_, _, 7,   _, 5, _,    8, _, _],
+                [_, _, 8,   _, 2, _,    _, 5, _],
+                
+                [_, 2, _,   _, _, 4,    _, 1, _],
+                [_, _, _,   6, _, _,    _, _, 5],
+                [_, _, _,   _, _, _,    4, _, _]
+            ],
+            "solution": "254367198376198524981245367592486731637951842418723956829574613743619285165832479",
+        },
+
+    "Window":
+        {
+            "givens": [
+                [_, _, _,   _, _, 7,    _, 9, _],
+                [3, _, _,   _, _, _,    5, 2, _],
+                [_, _, 8,   _, 5, _,    _, 6, _],
+                
+                [_, _, _,   4, _, _,    _, _, _],
+                [_, 2, _,   _, _, 3,    _, _, _],
+                [_, _, _,   _, _, _,    _, _, _],
+                
+                [_, _, _,   _, _, _,    _, _, _],
+                [_, 1, _,   _, _, 2,    7, _, _],
+                [_, 6, _,   8, 3, 5,    _, 4, _]
+            ],
+            "solution": "254367198376198524198254367635481972421973685789526413542719836813642759967835241",
+        },
+
+    "Asterisk":
+        {
+            "givens": [
+                [_, _, _,   3, _, _,    _, _, 8],
+                [3, _, _,   1, _, _,    _, 2, _],
+                [9, _, 1,   _, _, 5,    3, _, _],
+                
+                [_, _, _,   _, _, _,    _, _, _],
+                [_, 6, _,   _, _, _,    _, _, _],
+                [4, _, _,   _, _, _,    9, 7, _],
+                
+                [_, 2, _,   4, _, _,    _, 8, _],
+                [_, _, _,   6, _, _,    _, _, _],
+                [_, _, 9,   _, _, 3,    _, _, _]
+            ],
+            "solution": "254367198376198524981245367592874631763921845418536972625419783137682459849753216",
+        },
+
+    "Relative Position":
+        {
+            "givens": [
+                [2, _, 4,   _, _, _,    1, 9, _],
+                [_, _, _,   _, _, _,    _, 2, _],
+                [_, 8, _,   _, _, 5,    _, _, _],
+                
+                [_, _, _,   _, _, _,    7, _, _],
+                [_, _, _,   _, _, _,    _, _, _],
+                [_, 3, _,   _, _, _,    4, _, 6],
+                
+                [_, _, _,   _, 3, _,    _, _, _],
+                [_, 6, 3,   8, 5, _,    2, _, _],
+                [_, _, _,   _, _, 4,    6, _, _]
+            ],
+            "solution": "254367198376198524981245367549613782617482935832579416425936871763851249198724653",
+        },
+}
+
+
+jigsaw_puzzles = {
+
+    "Generated": # Built by reshaping the squares of a known solution
+        {
+            "givens": [
+                [_, _, _,   _, _, 7,    _, 9, _],
+                [_, _, _,   _, _, 8,    _, _, 4],
+                [_, _, _,   _, _, _,    3, 6, _],
+                
+                [5, _, 2,   _, _, _,    _, _, _],
+                [_, 3, _,   9, 5, _,    8, _, _],
+                [_, _, 8,   _, _, _,    _, _, 6],
+                
+                [_, _, 9,   _, _, _,    _, 1, _],
+                [_, 4, _,   _, 1, _,    _, 8, _],
+                [_, _, _,   _, _, 2,    _, _, 9]
+            ],
+            "jigsaw_layout": """
+                aaabbbccc
+                aaabbbbcc
+                aaabecccf
+                dddbeecff
+                ddeeeefff
+                ddddeefff
+                ggghhhiii
+                ggghhhhii
+                ggghhiiii
+            """,
+            "solution": "254367198376198524981245367592486731637951842418723956829574613743619285165832479",
+        },
+}
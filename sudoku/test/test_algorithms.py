@@ -213,6 +213,25 @@ class TestFindHiddenMultiples(unittest.TestCase):
         self.assertEqual(house.cells[7].possible, set([1, 2, 3, 4, 5, 6]))
         self.assertEqual(house.cells[8].possible, set([1, 2, 3, 4, 5, 6]))
 
+    def test_non_identical_3(self):
+        puzzle = empty_grid()
+        stepper = Stepper(puzzle)
+        
+        # 4 is in cells 0 and 1, 5 is in cells 1 and 2, and 6 is in cells 0 and 2
+        house = puzzle.rows[0]
+        house[0].remove_possible(5)
+        house[1].remove_possible(6)
+        house[2].remove_possible(4)
+        for index in range(3, 9):
+            house[index].remove_possible(4, 5, 6)
+
+        find_hidden_multiples.run(puzzle, stepper)
+
+        self.assertEqual(house.cells[0].possible, set([4, 6]))
+        self.assertEqual(house.cells[1].possible, set([4, 5]))
+        self.assertEqual(house.cells[2].possible, set([5, 6]))
+        self.assertEqual(house.cells[3].possible, set([1, 2, 3, 7, 8, 9]))
+
 
 class TestFindNakedMultiples(unittest.TestCase):
     def test_simple_2(self):
@@ -256,6 +275,23 @@ class TestFindNakedMultiples(unittest.TestCase):
         self.assertEqual(house.cells[7].possible, set([1, 2, 3, 4, 5, 6]))
         self.assertEqual(house.cells[8].possible, set([1, 2, 3, 4, 5, 6]))
     
+    def test_non_identical_3(self):
+        puzzle = empty_grid()
+        stepper = Stepper(puzzle)
+        
+        house = puzzle.rows[0]
+        house[0].limit_possible(1, 2)
+        house[4].limit_possible(2, 3)
+        house[8].limit_possible(1, 3)
+
+        find_naked_multiples.run(puzzle, stepper)
+
+        self.assertEqual(house.cells[0].possible, set([1, 2]))
+        self.assertEqual(house.cells[4].possible, set([2, 3]))
+        self.assertEqual(house.cells[8].possible, set([1, 3]))
+        for index in (1, 2, 3, 5, 6, 7):
+            self.assertEqual(house.cells[index].possible, set([4, 5, 6, 7, 8, 9]))
+    
     def test_some_filled(self):
         puzzle = empty_grid()
         stepper = Stepper(puzzle)
@@ -338,3 +374,142 @@ class TestXwingSwordfish(unittest.TestCase):
         self.assertTrue(puzzle[0, 0].has_possible(1), "1 should not be removed from cell (0, 0)")
         self.assertTrue(puzzle[1, 1].has_possible(1), "1 should not be removed from cell (1, 1)")
         self.assertTrue(puzzle[1, 6].has_possible(1), "1 should not be removed from cell (1, 6)")
+
+    def test_find_xwing_columns(self):
+        puzzle = grid_with_possible_only_at_coordinates(
+            # The 4 wings
+            (1, 3),
+            (1, 7),
+            (5, 3),
+            (5, 7),
+            # Some values to eliminate
+            (1, 0),
+            (5, 8),
+            # Some values to leave alone
+            (0, 0),
+            (8, 8),
+        )
+        stepper = Stepper(puzzle)
+
+        success = find_x_wing.run(puzzle, stepper)
+
+        self.assertTrue(success, "Algorithm should detect x-wing")
+        self.assertFalse(puzzle[1, 0].has_possible(1), "1 should be removed from cell (1, 0)")
+        self.assertFalse(puzzle[5, 8].has_possible(1), "1 should be removed from cell (5, 8)")
+        self.assertTrue(puzzle[0, 0].has_possible(1), "1 should not be removed from cell (0, 0)")
+        self.assertTrue(puzzle[8, 8].has_possible(1), "1 should not be removed from cell (8, 8)")
+
+    def test_find_swordfish(self):
+        puzzle = grid_with_possible_only_at_coordinates(
+            # The swordfish, in rows 1, 4, and 7 and columns 2, 5, and 8
+            (1, 2),
+            (1, 5),
+            (4, 5),
+            (4, 8),
+            (7, 2),
+            (7, 8),
+            # Some values to eliminate
+            (0, 2),
+            (3, 5),
+            (8, 8),
+            # Some values to leave alone
+            (0, 0),
+            (3, 3),
+            (8, 6),
+        )
+        stepper = Stepper(puzzle)
+
+        self.assertFalse(find_x_wing.run(puzzle, stepper), "There is no x-wing here")
+        success = find_swordfish.run(puzzle, stepper)
+
+        self.assertTrue(success, "Algorithm should detect swordfish")
+        self.assertFalse(puzzle[0, 2].has_possible(1), "1 should be removed from cell (0, 2)")
+        self.assertFalse(puzzle[3, 5].has_possible(1), "1 should be removed from cell (3, 5)")
+        self.assertFalse(puzzle[8, 8].has_possible(1), "1 should be removed from cell (8, 8)")
+        self.assertTrue(puzzle[0, 0].has_possible(1), "1 should not be removed from cell (0, 0)")
+        self.assertTrue(puzzle[3, 3].has_possible(1), "1 should not be removed from cell (3, 3)")
+        self.assertTrue(puzzle[8, 6].has_possible(1), "1 should not be removed from cell (8, 6)")
+
+    def test_find_jellyfish(self):
+        puzzle = grid_with_possible_only_at_coordinates(
+            # The jellyfish, in columns 0, 2, 4, and 6 and rows 1, 3, 5, and 7
+            (1, 0),
+            (3, 0),
+            (3, 2),
+            (5, 2),
+            (5, 4),
+            (7, 4),
+            (7, 6),
+            (1, 6),
+            # Some values to eliminate
+            (1, 8),
+            (7, 7),
+            # Some values to leave alone
+            (0, 8),
+            (8, 7),
+        )
+        stepper = Stepper(puzzle)
+
+        success = find_jellyfish.run(puzzle, stepper)
+
+        self.assertTrue(success, "Algorithm should detect jellyfish")
+        self.assertFalse(puzzle[1, 8].has_possible(1), "1 should be removed from cell (1, 8)")
+        self.assertFalse(puzzle[7, 7].has_possible(1), "1 should be removed from cell (7, 7)")
+        self.assertTrue(puzzle[0, 8].has_possible(1), "1 should not be removed from cell (0, 8)")
+        self.assertTrue(puzzle[8, 7].has_possible(1), "1 should not be removed from cell (8, 7)")
+
+
+class TestBivalueChains(unittest.TestCase):
+    def test_find_y_wing(self):
+        puzzle = empty_grid()
+        stepper = Stepper(puzzle)
+        puzzle[0, 0].limit_possible(1, 2) # Stem
+        puzzle[0, 4].limit_possible(1, 3) # Branch sharing a row
+        puzzle[4, 0].limit_possible(2, 3) # Branch sharing a column
+
+        success = find_y_wing.run(puzzle, stepper)
+
+        self.assertTrue(success, "Algorithm should detect y-wing")
+        self.assertFalse(puzzle[4, 4].has_possible(3), "3 should be removed from cell (4, 4)")
+        self.assertTrue(puzzle[0, 5].has_possible(3), "3 should not be removed from cell (0, 5)")
+        self.assertTrue(puzzle[5, 0].has_possible(3), "3 should not be removed from cell (5, 0)")
+        self.assertEqual(puzzle[0, 0].possible, set([1, 2]), "The stem should be unaffected")
+
+    def test_find_xy_chain(self):
+        puzzle = empty_grid()
+        stepper = Stepper(puzzle)
+        puzzle[0, 0].limit_possible(1, 2)
+        puzzle[0, 6].limit_possible(2, 4)
+        puzzle[6, 6].limit_possible(4, 5)
+        puzzle[6, 0].limit_possible(5, 1)
+
+        self.assertFalse(find_y_wing.run(puzzle, stepper), "There is no y-wing here")
+        success = find_xy_chain.run(puzzle, stepper)
+
+        self.assertTrue(success, "Algorithm should detect xy-chain")
+        self.assertFalse(puzzle[3, 0].has_possible(1), "1 should be removed from cell (3, 0)")
+        self.assertTrue(puzzle[3, 1].has_possible(1), "1 should not be removed from cell (3, 1)")
+        self.assertEqual(puzzle[0, 0].possible, set([1, 2]), "Chain cells should be unaffected")
+        self.assertEqual(puzzle[6, 0].possible, set([1, 5]), "Chain cells should be unaffected")
+
+    def test_find_long_xy_chain(self):
+        puzzle = empty_grid()
+        stepper = Stepper(puzzle)
+        chain = (((0, 0), (1, 2)), ((0, 4), (2, 3)), ((4, 4), (3, 4)), ((4, 7), (4, 5)), ((8, 7), (5, 6)), ((8, 0), (6, 1)))
+        for coords, values in chain:
+            puzzle[coords].limit_possible(*values)
+
+        success = find_xy_chain.run(puzzle, stepper)
+
+        self.assertTrue(success, "Algorithm should detect a six cell xy-chain")
+        self.assertFalse(puzzle[3, 0].has_possible(1), "1 should be removed from cell (3, 0)")
+        self.assertTrue(puzzle[3, 1].has_possible(1), "1 should not be removed from cell (3, 1)")
+
+    def test_bivalue_cells_are_tracked(self):
+        puzzle = empty_grid()
+        puzzle[0, 0].limit_possible(1, 2, 3)
+        self.assertEqual(puzzle.bivalue_cells, set())
+        puzzle[0, 0].remove_possible(3)
+        self.assertEqual(puzzle.bivalue_cells, {puzzle[0, 0]})
+        puzzle[0, 0].value = 1
+        self.assertEqual(puzzle.bivalue_cells, set())
@@ -0,0 +1,42 @@
+import unittest
+
+from ..batch import CandidateBatch, np
+from ..stepper import Stepper
+from .models import ClassicTestContext
+from .puzzles import puzzles, solutions
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestCandidateBatch(unittest.TestCase):
+    names = ['Ridiculously Easy', 'Easy 7,797,002,451', 'Medium 1,465,295,375', 'Already Solved']
+
+    def make_batch(self):
+        return CandidateBatch([[value or 0 for row in puzzles[name] for value in row] for name in self.names])
+
+    def test_solves_easy_puzzles(self):
+        batch = self.make_batch()
+        batch.run()
+        self.assertFalse(batch.broken.any())
+        for index, name in enumerate(self.names):
+            if name in solutions:
+                self.assertTrue(batch.solved[index], f"{name} should be solved with singles")
+                self.assertEqual(batch.to_array(index), solutions[name])
+        self.assertEqual(batch.placements[self.names.index('Already Solved')], [])
+
+    def test_eliminate_possibilities(self):
+        batch = CandidateBatch.from_lines(['1' + '.' * 80])
+        batch.eliminate_possibilities()
+        self.assertFalse(batch.candidates[0, 1, 0], "1 should be removed from the rest of the row")
+        self.assertFalse(batch.candidates[0, 9 * 8, 0], "1 should be removed from the rest of the column")
+        self.assertFalse(batch.candidates[0, 20, 0], "1 should be removed from the rest of the square")
+        self.assertTrue(batch.candidates[0, 40, 0], "1 should not be removed from unrelated cells")
+
+    def test_record_steps(self):
+        name = 'Easy 7,797,002,451'
+        puzzle = ClassicTestContext().Puzzle(puzzles[name], solutions[name])
+        batch = CandidateBatch.from_puzzles([puzzle])
+        batch.run()
+        stepper = Stepper(puzzle)
+        batch.record_steps(0, stepper)
+        # Replaying the steps onto the test puzzle validates every placement
+        self.assertTrue(stepper.get_puzzle_after_step(len(stepper) - 1).is_solved)
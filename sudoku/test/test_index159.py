@@ -25,6 +25,34 @@ class TestIndex159Algorithms(unittest.TestCase):
         self.assertEqual(puzzle[0, 0].value, 7)
     
 
+    def test_apply_pointer_possibilities_backward(self):
+        puzzle = Classic159Context().Puzzle()
+        stepper = Stepper(puzzle)
+        puzzle[0, 3].remove_possible(1)
+        apply_pointer_possibilities_backward.run(puzzle, stepper)
+
+        self.assertNotIn(4, puzzle[0, 0].possible)
+    
+
+    def test_pointer_index(self):
+        puzzle = Classic159Context().Puzzle()
+        pointer = puzzle[2, 4].pointer
+        self.assertEqual(pointer.value, 5)
+        self.assertIs(pointer.target(7), puzzle[2, 6])
+        self.assertIn((pointer, 7), puzzle[2, 6].indexed_by)
+    
+
+    def test_apply_pointer_triads(self):
+        puzzle = Classic159Context().Puzzle()
+        stepper = Stepper(puzzle)
+        puzzle[0, 0].value = 2
+        puzzle[1, 0].limit_possible(4, 6)
+        while apply_pointer_triads.run(puzzle, stepper):
+            pass
+
+        self.assertEqual(puzzle[2, 0].possible, set([7, 8, 9]))
+    
+
     def test_solve(self):
         context = Classic159Context()
         puzzle = context.Puzzle(index_159_puzzles['CTC Intro'])
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from ..io import CorpusReader, CorpusWriter, shard_range
+from ..variant_context import ClassicContext
+from .puzzles import puzzles
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'corpus.txt')
+        Puzzle = ClassicContext().Puzzle
+        self.puzzles = [
+            Puzzle(puzzles[name])
+            for name in ('Easy 7,797,002,451', 'Medium 1,465,295,375', 'Hard 4,658,865,853', 'Only 17', 'Ridiculously Easy')
+        ]
+
+    def test_round_trip(self):
+        with CorpusWriter(self.path, buffer_size=200) as writer:
+            writer.write_all(self.puzzles)
+        self.assertEqual(os.path.getsize(self.path), 82 * len(self.puzzles))
+        with CorpusReader(self.path) as reader:
+            self.assertEqual(len(reader), len(self.puzzles))
+            self.assertEqual(reader[2], self.puzzles[2].to_line().encode())
+            self.assertEqual(reader[-1], self.puzzles[-1].to_line().encode())
+            self.assertEqual(reader.puzzle(3).to_line(), self.puzzles[3].to_line())
+            self.assertEqual(
+                [puzzle.to_line() for puzzle in reader.iter_puzzles(1, 3)],
+                [puzzle.to_line() for puzzle in self.puzzles[1:3]])
+            with self.assertRaises(IndexError):
+                reader[len(self.puzzles)]
+
+    def test_last_record_without_newline(self):
+        with open(self.path, 'w') as file:
+            file.write('\n'.join(puzzle.to_line('0') for puzzle in self.puzzles[:2]))
+        with CorpusReader(self.path) as reader:
+            self.assertEqual(len(reader), 2)
+            self.assertEqual(reader.puzzle(1).to_line(), self.puzzles[1].to_line())
+
+    def test_rejects_ragged_file(self):
+        with open(self.path, 'w') as file:
+            file.write(self.puzzles[0].to_line() + '\n' + '1234\n')
+        with self.assertRaises(ValueError):
+            CorpusReader(self.path)
+
+    def test_rejects_misaligned_record(self):
+        # The first record is a cell short, so every later record is read from the wrong offset
+        with open(self.path, 'w') as file:
+            file.write(self.puzzles[0].to_line()[1:] + '\n' + self.puzzles[1].to_line() + '\n0')
+        with CorpusReader(self.path) as reader:
+            self.assertEqual(len(reader), 2)
+            with self.assertRaises(ValueError):
+                reader[0]
+            with self.assertRaises(ValueError):
+                list(reader.iter_records())
+
+    def test_crlf_records(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'\r\n'.join(puzzle.to_line().encode() for puzzle in self.puzzles[:3]))
+        with CorpusReader(self.path, record_size=83) as reader:
+            self.assertEqual(list(reader), [puzzle.to_line().encode() for puzzle in self.puzzles[:3]])
+
+    def test_shards_cover_every_record(self):
+        shards = [shard_range(10, shard, 3) for shard in range(3)]
+        self.assertEqual([index for shard in shards for index in shard], list(range(10)))
+        with self.assertRaises(ValueError):
+            shard_range(10, 3, 3)
@@ -0,0 +1,54 @@
+from ..extensions.jigsaw import *
+from ..algorithms import find_locked_candidates_squares, find_locked_candidates_rows_columns
+from ..stepper import Stepper
+from .puzzles import jigsaw_puzzles
+from .utils import solve_puzzle
+import unittest
+
+LAYOUT = jigsaw_puzzles['Generated']['jigsaw_layout']
+
+class TestJigsaw(unittest.TestCase):
+
+    def test_layout_interned(self):
+        layout = JigsawLayout.parse(LAYOUT)
+        relabeled = LAYOUT.translate(str.maketrans('abcdefghi', '123456789'))
+        self.assertIs(JigsawLayout.parse(relabeled), layout)
+        self.assertEqual(len(layout.regions), 9)
+        self.assertEqual(layout.cell_regions[13], layout.cell_regions[3]) # r2c5 belongs to the second region
+        self.assertIs(
+            JigsawContext().Puzzle(jigsaw_layout=LAYOUT).constraint_graph,
+            JigsawContext().Puzzle(jigsaw_layout=relabeled).constraint_graph)
+    
+
+    def test_invalid_layout(self):
+        with self.assertRaises(ValueError):
+            JigsawLayout.parse('a' * 81)
+        with self.assertRaises(ValueError):
+            JigsawLayout.parse(LAYOUT[:-1] + 'a')
+    
+
+    def test_regions_replace_squares(self):
+        puzzle = JigsawContext().Puzzle(jigsaw_layout=LAYOUT)
+        self.assertIn(puzzle[1, 4], puzzle[0, 3].square.cells)
+        self.assertNotIn(puzzle[1, 4], puzzle[2, 4].square.cells)
+        self.assertFalse(puzzle.constraint_graph.are_peers(13, 23))
+    
+
+    def test_locked_candidates(self):
+        puzzle = JigsawContext().Puzzle(jigsaw_layout=LAYOUT)
+        stepper = Stepper(puzzle)
+        # Confine the 1s of the second region (r1c4-r1c6, r2c4-r2c7, r3c4, r4c4) to row 1
+        for index in (12, 13, 14, 15, 21, 30):
+            puzzle.flat_cells[index].remove_possible(1)
+        find_locked_candidates_squares.run(puzzle, stepper)
+
+        self.assertNotIn(1, puzzle[0, 0].possible)
+        self.assertNotIn(1, puzzle[0, 8].possible)
+        self.assertIn(1, puzzle[2, 0].possible)
+    
+
+    def test_solve(self):
+        clues = jigsaw_puzzles['Generated']
+        puzzle = JigsawContext().Puzzle(clues['givens'], jigsaw_layout=clues['jigsaw_layout'])
+        solve_puzzle(self, JigsawContext(), puzzle)
+        self.assertEqual(''.join(str(cell.value) for cell in puzzle.flat_cells), clues['solution'])
@@ -0,0 +1,167 @@
+import unittest
+
+from ..extensions.killer.utils import *
+from ..utils import values_to_mask
+from ..extensions.killer.cage import Cage
+from ..extensions.killer.algorithms import evaluate_permutations, apply_permutations, _virtual_cage_layouts
+from ..extensions.killer import *
+from ..algorithms import eliminate_possibilities
+from ..stepper import Stepper
+from .puzzles import killer_puzzles
+from .utils import empty_grid, solve_puzzle
+
+
+class TestCageCombinations(unittest.TestCase):
+    def test_calculate_cage_combinations(self):
+        self.assertEqual(calculate_cage_combinations(3, 2), (frozenset([1, 2]),))
+        self.assertEqual(calculate_cage_combinations(17, 2), (frozenset([8, 9]),))
+        self.assertEqual(calculate_cage_combinations(45, 9), (frozenset(range(1, 10)),))
+        self.assertEqual(calculate_cage_combinations(10, 3), (
+            frozenset([1, 2, 7]), frozenset([1, 3, 6]), frozenset([1, 4, 5]), frozenset([2, 3, 5])))
+        self.assertEqual(calculate_cage_combinations(2, 2), (), "No combinations should be possible")
+
+    def test_calculate_cage_possibilities(self):
+        self.assertEqual(calculate_cage_possibilities(4, 2), frozenset([1, 3]))
+        self.assertEqual(calculate_cage_possibilities(23, 3), frozenset([6, 8, 9]))
+        self.assertEqual(cage_possibility_mask(4, 2), values_to_mask([1, 3]))
+
+    def test_filter_combination_masks(self):
+        masks = cage_combination_masks(10, 3)
+        self.assertCountEqual(
+            filter_combination_masks(masks, forbid=values_to_mask([7])),
+            [values_to_mask(digits) for digits in ([1, 3, 6], [1, 4, 5], [2, 3, 5])])
+        self.assertCountEqual(
+            filter_combination_masks(masks, require=values_to_mask([1, 4])),
+            [values_to_mask([1, 4, 5])])
+        self.assertCountEqual(
+            filter_combination_masks(masks, allow=values_to_mask([1, 2, 3, 5, 6])),
+            [values_to_mask(digits) for digits in ([1, 3, 6], [2, 3, 5])])
+
+    def test_set_based_helpers(self):
+        combinations = calculate_cage_combinations(10, 3)
+        self.assertCountEqual(filter_combinations(combinations, forbid=[1]), [frozenset([2, 3, 5])])
+        self.assertEqual(filter_combinations(combinations, allow=[]), combinations, "An empty allow list allows every digit")
+        self.assertEqual(combinations_to_possibilities(filter_combinations(combinations, require=[5])), frozenset([1, 2, 3, 4, 5]))
+
+
+class TestCageDomain(unittest.TestCase):
+    def test_prune_and_apply(self):
+        puzzle = empty_grid()
+        cage = Cage(10, puzzle[0, 0], puzzle[0, 1], puzzle[0, 2])
+        puzzle[0, 0].limit_possible(7)
+        evaluate_permutations(cage)
+        apply_permutations(cage)
+
+        self.assertEqual(cage.domain.combinations, [values_to_mask([1, 2, 7])])
+        self.assertEqual(puzzle[0, 1].possible, set([1, 2]))
+        self.assertEqual(puzzle[0, 2].possible, set([1, 2]))
+
+    def test_assignment_must_cover_every_cell(self):
+        puzzle = empty_grid()
+        cage = Cage(6, puzzle[0, 0], puzzle[0, 1], puzzle[0, 2])
+        # The only combination is {1, 2, 3}; two cells forced into {1, 2} leaves 3 for the third
+        puzzle[0, 0].limit_possible(1, 2)
+        puzzle[0, 1].limit_possible(1, 2)
+        evaluate_permutations(cage)
+        apply_permutations(cage)
+
+        self.assertEqual(puzzle[0, 2].possible, set([3]))
+
+    def test_large_cage(self):
+        puzzle = empty_grid()
+        cage = Cage(44, *puzzle.rows[0].cells[:8])
+        self.assertEqual(cage.domain.combinations, [values_to_mask([2, 3, 4, 5, 6, 7, 8, 9])])
+        puzzle[0, 0].value = 9
+        evaluate_permutations(cage)
+        apply_permutations(cage)
+        for cell in puzzle.rows[0].cells[1:8]:
+            self.assertEqual(cell.possible, set([2, 3, 4, 5, 6, 7, 8]))
+
+
+class TestKillerContext(unittest.TestCase):
+    def make_puzzle(self, name='Generated'):
+        clues = killer_puzzles[name]
+        return ClassicKillerContext().Puzzle(
+            clues['givens'], cage_layout=clues['cage_layout'], cage_sums=clues['cage_sums'])
+
+    def test_parse_cages(self):
+        cages = parse_cages('aab' + '.' * 77 + 'b', 'a=3, b=10')
+        self.assertEqual(cages, [(3, [(0, 0), (0, 1)]), (10, [(0, 2), (8, 8)])])
+        with self.assertRaises(ValueError):
+            parse_cages('a' * 80, {'a': 3})
+        with self.assertRaises(ValueError):
+            parse_cages('a' * 81, {})
+
+    def test_topology_key_memoized(self):
+        clues = killer_puzzles['Generated']
+        feature_map = {'cage_layout': clues['cage_layout'], 'cage_sums': clues['cage_sums']}
+        context = KillerContext()
+        self.assertIs(context.topology_key(feature_map), context.topology_key(dict(feature_map)))
+
+    def test_cell_to_cage_index(self):
+        puzzle = self.make_puzzle()
+        self.assertEqual(len(puzzle.cages), 30)
+        for cage in puzzle.cages:
+            for cell in cage:
+                self.assertIs(cell.cage, cage)
+
+    def test_cage_peers(self):
+        puzzle = ClassicKillerContext().Puzzle(cages=[(10, [(0, 0), (4, 4)])])
+        self.assertIn(puzzle[4, 4], set(puzzle.iter_cells(central_call=puzzle[0, 0])))
+        puzzle[0, 0].value = 3
+        eliminate_possibilities.run(puzzle, Stepper(puzzle))
+        self.assertNotIn(3, puzzle[4, 4].possible)
+
+    def test_apply_cage_combinations(self):
+        puzzle = ClassicKillerContext().Puzzle(cages=[(10, [(0, 0), (4, 4), (8, 8)])])
+        puzzle[0, 0].limit_possible(7)
+        apply_cage_combinations.run(puzzle, Stepper(puzzle))
+        self.assertEqual(puzzle[4, 4].possible, set([1, 2]))
+        self.assertEqual(puzzle[8, 8].possible, set([1, 2]))
+
+    def test_rule_of_45_innies(self):
+        puzzle = ClassicKillerContext().Puzzle(cages=[
+            (12, [(0, 0), (0, 1), (0, 2)]),
+            (24, [(0, 3), (0, 4), (0, 5)]),
+        ])
+        apply_rule_of_45.run(puzzle, Stepper(puzzle))
+        # The rest of the row sums to 9, so it can only use the digits 1 through 6
+        for column in range(6, 9):
+            self.assertEqual(puzzle[0, column].possible, set(range(1, 7)))
+
+    def test_rule_of_45_outies(self):
+        puzzle = ClassicKillerContext().Puzzle(cages=[
+            (6, [(0, 0), (0, 1), (0, 2)]),
+            (42, [(0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8), (1, 8)]),
+        ])
+        apply_rule_of_45.run(puzzle, Stepper(puzzle))
+        self.assertEqual(puzzle[1, 8].possible, set([3]))
+
+    def test_rule_of_45_layout_cached_per_graph(self):
+        context = ClassicKillerContext()
+        cages = [(6, [(0, 0), (0, 1), (0, 2)]), (39, [(0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8)])]
+        puzzle = context.Puzzle(cages=cages)
+        apply_rule_of_45.run(puzzle, Stepper(puzzle))
+        graph = puzzle.constraint_graph
+        self.assertIn(graph, _virtual_cage_layouts)
+        self.assertNotIn('_virtual_cages', vars(puzzle))
+        # Another puzzle with the same cages shares the graph, and so the cached layout
+        self.assertIs(context.Puzzle(cages=cages).constraint_graph, graph)
+
+    def test_check_puzzle(self):
+        context = ClassicKillerContext()
+        puzzle = context.Puzzle(cages=[(4, [(0, 0), (4, 4)])])
+        puzzle[0, 0].value = 1
+        puzzle[4, 4].value = 2
+        self.assertEqual(context.check_puzzle(puzzle), (False, puzzle[4, 4]))
+
+    def test_solve(self):
+        puzzle = self.make_puzzle()
+        solve_puzzle(self, ClassicKillerContext(), puzzle)
+        self.assertEqual(''.join(str(cell.value) for cell in puzzle.flat_cells), killer_puzzles['Generated']['solution'])
+
+    def test_cages_in_constraint_graph(self):
+        puzzle = ClassicKillerContext().Puzzle(cages=[(10, [(0, 0), (4, 4)])])
+        self.assertTrue(puzzle.constraint_graph.are_peers(0, 40))
+        with self.assertRaises(ValueError):
+            ClassicKillerContext().Puzzle(cages=[(10, [(0, 0), (4, 4)]), (5, [(4, 4), (8, 8)])])
@@ -1,8 +1,11 @@
 import unittest
 
-from ..variant_context import ClassicContext
+from ..variant_context import VariantContext, ClassicContext, HybridContext
 from .puzzles import puzzles
 from .utils import *
+from ..transposition import TranspositionTable, CONTRADICTION, UNSOLVED
+from ..model import GridTransform, Region
+from ..extensions.index159 import Classic159Context, Index159Context
 
 
 class TestTestingUtilities(unittest.TestCase):
@@ -36,4 +39,264 @@ class TestTestingUtilities(unittest.TestCase):
                         "in the original puzzle. A value of {} was incorrectly removed from ({}, {})\n"
                         "Possible for cell: {}, loop value: {}".format(base_cell.value, row, col, cell.possible, value))
         for cell in working_puzzle.iter_cells():
-            self.assertEqual(len(cell.possible), 1, "There should only be one remaining value in each cell after all loops")
\ No newline at end of file
+            self.assertEqual(len(cell.possible), 1, "There should only be one remaining value in each cell after all loops")
+
+class TestStateHash(unittest.TestCase):
+    def test_equal_states_hash_equal(self):
+        puzzle_a = ClassicContext().Puzzle(puzzles["Easy 7,797,002,451"])
+        puzzle_b = ClassicContext().Puzzle(puzzles["Easy 7,797,002,451"])
+        self.assertEqual(puzzle_a.state_hash, puzzle_b.state_hash)
+
+        # Reach the same state through a different order of operations
+        puzzle_a[0, 2].value = 4
+        puzzle_a[1, 0].remove_possible(1, 3)
+        puzzle_b[1, 0].limit_possible(2, 4, 5, 6, 7, 8, 9)
+        puzzle_b[0, 2].value = 4
+        self.assertEqual(puzzle_a.state_hash, puzzle_b.state_hash)
+        self.assertEqual(puzzle_a.value_hash, puzzle_b.value_hash)
+
+    def test_hash_tracks_changes(self):
+        puzzle = empty_grid()
+        original_hash = puzzle.state_hash
+        original_value_hash = puzzle.value_hash
+
+        puzzle[4, 4].remove_possible(5)
+        self.assertNotEqual(puzzle.state_hash, original_hash)
+        self.assertEqual(puzzle.value_hash, original_value_hash, "Candidate changes should not affect the value hash")
+
+        puzzle[4, 4].value = 3
+        self.assertNotEqual(puzzle.value_hash, original_value_hash)
+
+    def test_incremental_matches_full_rehash(self):
+        puzzle = ClassicContext().Puzzle(puzzles["Medium 1,465,295,375"])
+        solve_puzzle(self, puzzle.variant_context, puzzle)
+        incremental_hash = puzzle.state_hash
+        puzzle._rehash()
+        self.assertEqual(incremental_hash, puzzle.state_hash)
+        self.assertEqual(puzzle.copy().state_hash, puzzle.state_hash)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_lru_eviction(self):
+        table = TranspositionTable(max_size=2)
+        table.record(1, CONTRADICTION)
+        table.record(2, UNSOLVED, 1)
+        table.lookup(1) # Mark 1 as recently used
+        table.record(3, UNSOLVED, 0)
+        self.assertIn(1, table)
+        self.assertNotIn(2, table)
+        self.assertIn(3, table)
+
+    def test_should_skip(self):
+        table = TranspositionTable()
+        table.record(1, CONTRADICTION)
+        table.record(2, UNSOLVED, 1)
+        self.assertTrue(table.should_skip(1, 5))
+        self.assertTrue(table.should_skip(2, 1))
+        self.assertFalse(table.should_skip(2, 2), "A deeper search might still find something")
+        self.assertFalse(table.should_skip(3, 0))
+
+
+class TestCanonicalize(unittest.TestCase):
+    def test_equivalent_puzzles_share_canonical_form(self):
+        puzzle = ClassicContext().Puzzle(puzzles["Hard 4,658,865,853"])
+        transform = GridTransform(True, (3, 5, 4, 0, 1, 2, 7, 8, 6), (2, 1, 0, 8, 6, 7, 5, 3, 4), (0, 9, 8, 7, 6, 5, 4, 3, 2, 1))
+        twin = ClassicContext().Puzzle(transform.apply(puzzles["Hard 4,658,865,853"]))
+
+        canonical, puzzle_transform = puzzle.canonicalize()
+        twin_canonical, _ = twin.canonicalize()
+        self.assertEqual(canonical, twin_canonical)
+        self.assertEqual(len(canonical), 81)
+
+        mapped = puzzle_transform.apply(puzzles["Hard 4,658,865,853"])
+        self.assertEqual(''.join(str(value or 0) for row in mapped for value in row), canonical)
+        self.assertEqual(puzzle_transform.inverse().apply(mapped), puzzles["Hard 4,658,865,853"])
+
+
+class TestHybridPipeline(unittest.TestCase):
+    def test_merged_order(self):
+        algorithms = Classic159Context().get_algorithms('auto')
+        difficulties = [alg.difficulty for alg in algorithms]
+        self.assertEqual(difficulties, sorted(difficulties))
+        self.assertEqual(len(set(algorithms)), len(algorithms))
+        # Within a difficulty, the classic algorithms keep their order and come before the 159 ones
+        classic = [alg for alg in algorithms if alg in ClassicContext().get_algorithms('auto')]
+        self.assertEqual(classic, sorted(ClassicContext().get_algorithms('auto'), key=lambda alg: alg.difficulty))
+        self.assertLess(algorithms.index(ClassicContext().get_algorithms('auto')[3]), algorithms.index(Index159Context().get_algorithms('auto')[2]))
+
+    def test_pipeline_shared_between_hybrids(self):
+        self.assertIs(Classic159Context().get_algorithms('auto'), Classic159Context().get_algorithms('auto'))
+        self.assertEqual(
+            HybridContext(ClassicContext(), ClassicContext()).get_algorithms('auto'),
+            tuple(ClassicContext().get_algorithms('auto')))
+
+
+class TestConstraintGraph(unittest.TestCase):
+    def test_classic_graph(self):
+        graph = ClassicContext().Puzzle().constraint_graph
+        self.assertEqual(len(graph.houses), 27)
+        self.assertEqual(graph.house_kinds.count('square'), 9)
+        for peers in graph.peers:
+            self.assertEqual(len(peers), 20)
+        self.assertTrue(graph.are_peers(0, 20))
+        self.assertFalse(graph.are_peers(0, 30))
+        self.assertEqual(len(graph.cell_houses[40]), 3)
+
+    def test_graph_shared_between_puzzles(self):
+        self.assertIs(ClassicContext().Puzzle().constraint_graph, ClassicContext().Puzzle().constraint_graph)
+        self.assertIs(Classic159Context().Puzzle().constraint_graph, Classic159Context().Puzzle().constraint_graph)
+
+    def test_features_built_on_first_use(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        self.assertNotIn('rows', puzzle._features)
+        self.assertIs(puzzle[4, 5].row, puzzle.rows[4])
+        self.assertIn('rows', puzzle._features)
+
+
+    def test_copy_shares_graph(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        copied = puzzle.copy()
+        self.assertIs(copied.constraint_graph, puzzle.constraint_graph)
+        self.assertIs(copied[0, 0]._puzzle, copied)
+        self.assertFalse(hasattr(puzzle, '__missing_special__'))
+        self.assertNotIn('rows', puzzle._features, "Copying should not build the features")
+        self.assertNotIn('rows', copied._features)
+
+    def test_graph_from_features(self):
+        class FeatureOnlyContext(VariantContext):
+            "A context written against the feature API only"
+            init_features = ClassicContext.init_features
+            get_algorithms = ClassicContext.get_algorithms
+        graph = FeatureOnlyContext().Puzzle().constraint_graph
+        classic = ClassicContext().Puzzle().constraint_graph
+        self.assertCountEqual(zip(graph.house_kinds, graph.houses), zip(classic.house_kinds, classic.houses))
+        self.assertEqual(graph.peers, classic.peers)
+
+
+    def test_graph_from_features_per_layout(self):
+        class FeatureLayoutContext(VariantContext):
+            "A context written against the feature API, with an extra house given by the feature map"
+            get_algorithms = ClassicContext.get_algorithms
+            def init_features(self, puzzle, feature_map):
+                ClassicContext.init_features(self, puzzle, feature_map)
+                puzzle._features['extra'] = [Region('extra', *(puzzle.cells[row][column] for row, column in feature_map['extra']))]
+        context = FeatureLayoutContext()
+        diagonal = context.Puzzle(extra=[(index, index) for index in range(9)])
+        anti_diagonal = context.Puzzle(extra=[(index, 8 - index) for index in range(9)])
+        self.assertIsNot(diagonal.constraint_graph, anti_diagonal.constraint_graph)
+        self.assertTrue(diagonal.constraint_graph.are_peers(0, 80))
+        self.assertFalse(anti_diagonal.constraint_graph.are_peers(0, 80))
+        self.assertTrue(anti_diagonal.constraint_graph.are_peers(8, 72))
+        self.assertIs(context.Puzzle(extra=[(index, index) for index in range(9)]).constraint_graph, diagonal.constraint_graph)
+
+
+class TestConflicts(unittest.TestCase):
+    def test_check_reports_first_conflict(self):
+        puzzle = ClassicContext().Puzzle()
+        self.assertEqual(puzzle.check(), (True, None))
+        puzzle[4, 7].value = 3
+        puzzle[4, 2].value = 3
+        self.assertEqual(puzzle.check(), (False, puzzle[4, 2]))
+
+    def test_find_all_conflicts(self):
+        puzzle = ClassicContext().Puzzle()
+        puzzle[0, 0].value = 5
+        puzzle[1, 1].value = 5
+        puzzle[8, 1].value = 5
+        puzzle[6, 6].possible = set()
+        self.assertEqual(puzzle.find_conflicts(), [puzzle[0, 0], puzzle[1, 1], puzzle[6, 6], puzzle[8, 1]])
+
+    def test_incremental_matches_full_check(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        self.assertEqual(puzzle.find_conflicts(incremental=True), [])
+        open_cell = next(cell for cell in puzzle.iter_cells() if cell.is_open)
+        full_peer = next(cell for cell in puzzle.iter_cells(central_call=open_cell) if cell.is_full)
+        open_cell.value = full_peer.value
+        conflicts = puzzle.find_conflicts(incremental=True)
+        self.assertEqual(conflicts, puzzle.find_conflicts())
+        self.assertIn(open_cell, conflicts)
+        self.assertIn(full_peer, conflicts)
+        open_cell.clear()
+        self.assertEqual(puzzle.find_conflicts(incremental=True), puzzle.find_conflicts())
+        self.assertEqual(puzzle.find_conflicts(), [])
+
+
+    def test_full_check_does_not_disturb_incremental_state(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        self.assertEqual(puzzle.find_conflicts(incremental=True), [])
+        open_cell = next(cell for cell in puzzle.iter_cells() if cell.is_open)
+        full_peer = next(cell for cell in puzzle.iter_cells(central_call=open_cell) if cell.is_full)
+        open_cell.value = full_peer.value
+        self.assertFalse(puzzle.check()[0])
+        self.assertEqual(puzzle.find_conflicts(incremental=True), puzzle.find_conflicts())
+        self.assertIn(open_cell, puzzle.find_conflicts(incremental=True))
+
+    def test_clear_restores_candidates(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        open_cell = next(cell for cell in puzzle.iter_cells() if cell.is_open)
+        fresh = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        fresh_cell = fresh[divmod(open_cell._index, 9)]
+        fresh_cell.clear()
+        open_cell.value = 1
+        open_cell.clear()
+        self.assertEqual(open_cell.possible, fresh_cell.possible)
+        self.assertEqual(puzzle.state_hash, fresh.state_hash)
+        self.assertIn(open_cell, puzzle.open_cells)
+        self.assertEqual(puzzle.find_conflicts(), [])
+
+
+class TestOpenCells(unittest.TestCase):
+    def test_open_cells_tracked(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        expected = [cell for cell in puzzle.flat_cells if cell.is_open]
+        self.assertEqual(puzzle.open_cells, expected)
+        self.assertEqual(puzzle.open_count, len(expected))
+        expected[0].value = 1
+        expected[0].value = 2 # Changing a full cell does not change the count
+        self.assertEqual(puzzle.open_cells, expected[1:])
+        self.assertEqual(puzzle.open_count, len(expected) - 1)
+        expected[0].value = None
+        self.assertEqual(puzzle.open_cells, expected)
+
+    def test_is_solved(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        self.assertFalse(puzzle.is_solved)
+        for cell in puzzle.open_cells:
+            cell.value = 1
+        self.assertTrue(puzzle.is_solved)
+        self.assertTrue(puzzle.copy().is_solved)
+
+
+class TestParsing(unittest.TestCase):
+    line = '35.....2....96.7........5.91....84.....324.....41....22.1........8.46....7.....95'
+
+    def test_parse_grid_and_line(self):
+        Puzzle = ClassicContext().Puzzle
+        grid = '\n'.join(' '.join(self.line[row:row + 9].replace('.', '-')) for row in range(0, 81, 9))
+        self.assertEqual(Puzzle.parse(grid).to_line(), self.line)
+        self.assertEqual(Puzzle.parse('\n' + self.line.replace('.', '0') + '\n').to_line(), self.line)
+        self.assertEqual(Puzzle.parse(self.line)[0, 1].value, 5)
+
+    def test_parse_unicode(self):
+        from ..model.puzzle import _PARSE_TABLE
+        table_size = len(_PARSE_TABLE)
+        Puzzle = ClassicContext().Puzzle
+        # Box drawing and other whitespace is ignored, and any other character is a blank
+        line = self.line.replace('.', '\u00b7')
+        grid = '\n'.join('\u2551\u3000' + line[row:row + 9] + '\u2551' for row in range(0, 81, 9))
+        self.assertEqual(Puzzle.parse(grid).to_line(), self.line)
+        self.assertEqual(len(_PARSE_TABLE), table_size, "Unusual characters should not be added to the table")
+
+    def test_parse_rejects_ragged_rows(self):
+        Puzzle = ClassicContext().Puzzle
+        rows = [self.line[row:row + 9] for row in range(0, 81, 9)]
+        rows[4] = rows[4][:8]
+        with self.assertRaises(ValueError):
+            Puzzle.parse('\n'.join(rows))
+        with self.assertRaises(ValueError):
+            Puzzle.parse(self.line[:80])
+
+    def test_from_line_buffer(self):
+        Puzzle = ClassicContext().Puzzle
+        puzzle = Puzzle.from_line(memoryview(self.line.encode()))
+        self.assertEqual(puzzle.to_line('0'), self.line.replace('.', '0'))
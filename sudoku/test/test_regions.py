@@ -0,0 +1,58 @@
+from ..extensions.regions import *
+from ..algorithms import eliminate_possibilities, find_hidden_singles
+from ..stepper import Stepper
+from .puzzles import region_puzzles
+from .utils import solve_puzzle
+import unittest
+
+class TestExtraRegions(unittest.TestCase):
+
+    def test_regions_in_constraint_graph(self):
+        graph = ClassicDiagonalContext().Puzzle().constraint_graph
+        self.assertEqual(len(graph.houses), 29)
+        self.assertTrue(graph.are_peers(0, 80))
+        self.assertEqual(len(graph.peers[40]), 32) # The centre cell is on both diagonals
+        self.assertEqual(len(ClassicWindowContext().Puzzle().constraint_graph.houses_of_kind('window')), 4)
+    
+
+    def test_eliminate_possibilities(self):
+        puzzle = ClassicDiagonalContext().Puzzle()
+        stepper = Stepper(puzzle)
+        puzzle[0, 0].value = 5
+        eliminate_possibilities.run(puzzle, stepper)
+
+        self.assertNotIn(5, puzzle[8, 8].possible)
+        self.assertIn(5, puzzle[8, 1].possible)
+    
+
+    def test_find_hidden_singles(self):
+        puzzle = ClassicWindowContext().Puzzle()
+        stepper = Stepper(puzzle)
+        for row, column in ((1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (2, 3), (3, 1), (3, 2)):
+            puzzle[row, column].remove_possible(4)
+        find_hidden_singles.run(puzzle, stepper)
+
+        self.assertEqual(puzzle[3, 3].value, 4)
+        self.assertIn(puzzle.windows[0], list(puzzle.iter_houses()))
+    
+
+    def test_check_puzzle(self):
+        context = ClassicAsteriskContext()
+        puzzle = context.Puzzle()
+        puzzle[1, 4].value = 3
+        puzzle[7, 4].value = 3
+        okay, _ = AsteriskContext().check_puzzle(puzzle)
+        self.assertFalse(okay)
+    
+
+    def test_solve(self):
+        for name, context in (
+            ('Diagonal', ClassicDiagonalContext()),
+            ('Window', ClassicWindowContext()),
+            ('Asterisk', ClassicAsteriskContext()),
+            ('Relative Position', ClassicRelativePositionContext()),
+        ):
+            with self.subTest(name):
+                puzzle = context.Puzzle(region_puzzles[name]['givens'])
+                solve_puzzle(self, context, puzzle)
+                self.assertEqual(''.join(str(cell.value) for cell in puzzle.flat_cells), region_puzzles[name]['solution'])
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import signal
+import time
+import unittest
+
+from ..service import SolverService, handle_request
+from .puzzles import puzzles
+
+
+def puzzle_line(name):
+    return ''.join(str(value or '.') for row in puzzles[name] for value in row)
+
+
+class TestServiceRequests(unittest.TestCase):
+    def test_solve(self):
+        status, response = handle_request('solve', {'puzzle': puzzle_line('Easy 7,797,002,451')})
+        self.assertEqual(status, 200)
+        self.assertTrue(response['solved'])
+        self.assertNotIn('.', response['puzzle'])
+
+    def test_hint(self):
+        status, response = handle_request('hint', {'puzzle': puzzle_line('Easy 7,797,002,451')})
+        self.assertEqual(status, 200)
+        hint = response['hint']
+        self.assertNotEqual(hint['algorithm'], 'eliminate_possibilities', "The basic eliminations should not be given as a hint")
+        # The easy puzzle has a single to place straight away
+        self.assertIn('place', [unit['mode'] for unit in hint['units']])
+
+    def test_validate(self):
+        line = puzzle_line('Easy 7,797,002,451')
+        self.assertEqual(handle_request('validate', {'puzzle': line}), (200, {'valid': True, 'solved': False, 'conflicts': []}))
+        first_given = next(index for index, char in enumerate(line) if char != '.')
+        row_start = first_given - first_given % 9
+        blank = next(index for index in range(row_start, row_start + 9) if line[index] == '.')
+        broken = line[:blank] + line[first_given] + line[blank + 1:]
+        status, response = handle_request('validate', {'puzzle': broken})
+        self.assertFalse(response['valid'])
+        self.assertIn([blank // 9, blank % 9], response['conflicts'])
+
+    def test_count(self):
+        self.assertEqual(handle_request('count', {'puzzle': puzzle_line('Brute Force Prevails')})[1]['count'], 2)
+
+    def test_deadline(self):
+        # Far too many solutions to search through in time
+        request = {'puzzle': '1' + '.' * 80, 'brute_force_level': 2}
+        start = time.monotonic()
+        status, response = handle_request('solve', request, deadline=time.time() + 0.2)
+        self.assertEqual(status, 504)
+        self.assertLess(time.monotonic() - start, 5, "The search should stop soon after the deadline")
+        self.assertEqual(handle_request('count', {'puzzle': '1' + '.' * 80, 'limit': 1000}, deadline=time.time() + 0.2)[0], 504)
+        self.assertEqual(handle_request('validate', {'puzzle': '.' * 81}, deadline=time.time() - 1)[0], 504, "Expired requests should be skipped")
+
+    def test_errors(self):
+        self.assertEqual(handle_request('solve', {'puzzle': '123'})[0], 400)
+        self.assertEqual(handle_request('solve', {'puzzle': '.' * 81, 'variant': 'nonsense'})[0], 400)
+        self.assertEqual(handle_request('nonsense', {'puzzle': '.' * 81})[0], 404)
+
+    def test_unknown_features(self):
+        status, response = handle_request('solve', {'puzzle': '.' * 81, 'variant': 'jigsaw', 'features': {'jigsaw_layot': ''}})
+        self.assertEqual(status, 400)
+        self.assertIn('jigsaw_layot', response['error'])
+        self.assertEqual(handle_request('validate', {'puzzle': '.' * 81, 'features': {'cage_layout': ''}})[0], 400)
+
+
+class TestSolverService(unittest.TestCase):
+    def test_http_round_trip_and_backpressure(self):
+        line = puzzle_line('Easy 7,797,002,451')
+
+        async def post(port, path, body):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            data = json.dumps(body).encode()
+            writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+            response = await reader.read()
+            writer.close()
+            head, _, body = response.partition(b'\r\n\r\n')
+            return int(head.split()[1]), json.loads(body)
+
+        async def run():
+            async with SolverService(workers=1, max_queue=1) as service:
+                server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+                port = server.sockets[0].getsockname()[1]
+                async with server:
+                    status, response = await post(port, '/solve', {'puzzle': line})
+                    self.assertEqual(status, 200)
+                    self.assertTrue(response['solved'])
+                    statuses = await asyncio.gather(*(post(port, '/count', {'puzzle': line}) for _ in range(20)))
+                    self.assertIn(503, [status for status, _ in statuses])
+                    self.assertIn(200, [status for status, _ in statuses])
+
+        asyncio.run(run())
+
+    def test_timeout_and_worker_crash(self):
+        line = puzzle_line('Easy 7,797,002,451')
+
+        async def run():
+            async with SolverService(workers=1, request_timeout=0.5) as service:
+                status, response = await service.submit('solve', {'puzzle': '1' + '.' * 80, 'brute_force_level': 2})
+                self.assertEqual(status, 504)
+                # The worker gives up on the search at the deadline, so it is free for the next request
+                status, response = await service.submit('solve', {'puzzle': line})
+                self.assertEqual(status, 200)
+
+                for pid in list(service._executor._processes):
+                    os.kill(pid, signal.SIGKILL)
+                status, response = await service.submit('solve', {'puzzle': line})
+                self.assertEqual(status, 500)
+                status, response = await service.submit('solve', {'puzzle': line})
+                self.assertEqual(status, 200, "The pool should be replaced after a worker dies")
+
+        asyncio.run(run())
+
+    def test_bad_content_length(self):
+        async def send(port, content_length):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f"POST /solve HTTP/1.1\r\nContent-Length: {content_length}\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return int(response.split()[1])
+
+        async def run():
+            async with SolverService(workers=1) as service:
+                server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+                port = server.sockets[0].getsockname()[1]
+                async with server:
+                    self.assertEqual(await send(port, 'abc'), 400)
+                    self.assertEqual(await send(port, '-5'), 400)
+                    self.assertEqual(await send(port, 1 << 30), 413)
+
+        asyncio.run(run())
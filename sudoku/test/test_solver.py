@@ -1,12 +1,24 @@
 from ..model import *
+from ..cache import SolveCache
 from .models import ClassicTestContext
 from ..solver import Solver
+import os
+import sqlite3
 import sys
+import tempfile
 import unittest
-from .puzzles import puzzles, solutions
+from .puzzles import puzzles, solutions, killer_puzzles
+from ..extensions.killer import ClassicKillerContext
 import traceback
 from ..variant_context import ClassicContext
-from .utils import solve_puzzle
+from .utils import solve_puzzle, empty_grid
+from ..algorithms import find_locked_candidates_squares
+from ..stepper import Stepper
+from ..transposition import search_key, SOLVED
+from ..exception import SudokuError, Contradiction
+import copy
+import pickle
+import warnings
 
 class TestSolver(unittest.TestCase):
     def solve_named_puzzle(self, name, *solver_args, **solver_kwargs):
@@ -45,3 +57,147 @@ class TestSolver(unittest.TestCase):
         # This puzzle has 2 solutions and therefore can only be solved with brute force
         with self.assertWarns(Warning):
             self.solve_named_puzzle('Brute Force Prevails', brute_force_level=1)
+
+    def test_batch_steps(self):
+        name = 'Medium 1,465,295,375'
+        context = ClassicTestContext()
+        solver = Solver(context, batch_steps=True)
+        solution = solver.solve(context.Puzzle(puzzles[name], solutions[name]))
+        self.assertTrue(solution.success)
+
+        solution = solver.solve(ClassicContext().Puzzle(puzzles['Evil 7,360,298,562']))
+        self.assertTrue(solution.success)
+
+    def test_batch_steps_records_each_finding(self):
+        puzzle = empty_grid()
+        # Two independent pointing pairs, in the first and last squares
+        for row, col in ((1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)):
+            puzzle[row, col].remove_possible(1)
+        for row, col in ((6, 6), (6, 7), (6, 8), (7, 6), (7, 7), (7, 8)):
+            puzzle[row, col].remove_possible(1)
+        stepper = Stepper(puzzle)
+        find_locked_candidates_squares.run(puzzle, stepper, batch=True)
+        self.assertEqual(len(stepper), 3, "Both findings should be recorded as separate steps")
+
+    def test_brute_force_transposition_table(self):
+        solver = Solver(ClassicContext())
+        puzzle = ClassicContext().Puzzle(puzzles['Brute Force Prevails'])
+        with self.assertWarns(Warning):
+            solution = solver.solve(puzzle, brute_force_level=1)
+        self.assertTrue(solution.success)
+        self.assertGreater(len(solver.transposition_table), 0, "Explored states should be recorded")
+
+        # Solving the same puzzle again should be answered from the table
+        puzzle = ClassicContext().Puzzle(puzzles['Brute Force Prevails'])
+        with self.assertWarns(Warning):
+            solution = solver.solve(puzzle, brute_force_level=1)
+        self.assertTrue(solution.success)
+        self.assertTrue(puzzle.is_solved)
+
+    def test_brute_force_reuses_solved_branches(self):
+        solver = Solver(ClassicContext())
+        puzzle = ClassicContext().Puzzle(puzzles['Brute Force Prevails'])
+        solver.solve(puzzle)
+        self.assertFalse(puzzle.is_solved)
+        # Mark the first branch as already solved; the search should take the stored solution
+        cell = next(cell for cell in puzzle.iter_cells() if cell.possible)
+        branch = puzzle.copy()
+        branch[puzzle.index(cell)].value = next(iter(cell.possible))
+        stored = object()
+        solver.transposition_table.record(search_key(branch), SOLVED, 0, stored)
+        self.assertIs(solver.brute_force_solve(puzzle, 1), stored)
+        self.assertEqual(solver.transposition_table.lookup(search_key(puzzle))[0], SOLVED)
+
+    def test_solve_cache_replays_equivalent_puzzle(self):
+        cache = SolveCache()
+        solver = Solver(ClassicContext(), cache=cache)
+        name = 'Medium 1,465,295,375'
+        solver.solve(ClassicContext().Puzzle(puzzles[name]))
+        self.assertEqual(len(cache), 1)
+
+        # An equivalent puzzle, with transformed solution to check every step of the replay against
+        transform = GridTransform(True, (5, 3, 4, 2, 0, 1, 8, 6, 7), (6, 8, 7, 0, 1, 2, 4, 3, 5), (0, 3, 1, 2, 9, 8, 7, 6, 5, 4))
+        context = ClassicTestContext()
+        puzzle = context.Puzzle(transform.apply(puzzles[name]), transform.apply(solutions[name]))
+        solution = solver.solve(puzzle)
+        self.assertTrue(solution.success)
+        self.assertEqual(len(cache), 1, "The equivalent puzzle should be served from the cache")
+        self.assertGreater(len(solution.steps), 1, "The cached steps should be replayed into the stepper")
+        # The replayed steps should also be valid on a fresh copy of the puzzle
+        self.assertTrue(solution.steps.get_puzzle_after_step(len(solution.steps) - 1).is_solved)
+
+    def test_solve_cache_skips_solved_puzzles(self):
+        cache = SolveCache()
+        solver = Solver(ClassicContext(), cache=cache)
+        solution = solver.solve(ClassicContext().Puzzle(solutions['Medium 1,465,295,375']))
+        self.assertTrue(solution.success)
+        self.assertEqual(len(cache), 0, "A solved puzzle should not be canonicalized or cached")
+
+    def test_solve_cache_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+            cache = SolveCache(path=path)
+            Solver(ClassicContext(), cache=cache).solve(ClassicContext().Puzzle(puzzles['Easy 7,797,002,451']))
+            cache.close()
+
+            cache = SolveCache(path=path)
+            key = next(iter(sqlite3.connect(path).execute("SELECT key FROM solves")))[0]
+            self.assertTrue(cache.get(key).success)
+            cache.close()
+
+    def test_contradiction_status(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        open_cell = puzzle.open_cells[0]
+        open_cell.possible = {next(puzzle.iter_cells(central_call=open_cell, skip_open_cells=True)).value}
+        solver = Solver(ClassicContext())
+        with self.assertRaises(Contradiction) as context:
+            solver.solve(puzzle.copy())
+        self.assertIn("Problem Cell Details", str(context.exception))
+        solution = solver.solve(puzzle.copy(), raise_contradictions=False)
+        self.assertFalse(solution.success)
+        self.assertTrue(solution.contradiction)
+
+    def test_brute_force_branch_errors(self):
+        grid = solutions['Easy 7,797,002,451']
+        class RejectingContext(ClassicContext):
+            "Rejects the grid's own solution with a plain SudokuError, rather than a Contradiction"
+            def check_puzzle(self, puzzle):
+                if puzzle[0, 1].value == grid[0][1]:
+                    raise SudokuError("Rejected", puzzle)
+                return super().check_puzzle(puzzle)
+        # An unavoidable rectangle, which has two solutions
+        array = [list(row) for row in grid]
+        for row, col in ((0, 1), (0, 5), (1, 1), (1, 5)):
+            array[row][col] = None
+        puzzle = RejectingContext().Puzzle(array)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            solution = Solver(RejectingContext()).solve(puzzle, brute_force_level=1)
+        self.assertTrue(solution.success, "An error in one branch should not end the whole search")
+        self.assertEqual(puzzle[0, 1].value, grid[0][5])
+
+    def test_error_round_trip(self):
+        puzzle = ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])
+        error = Contradiction("No candidates left", puzzle, cell=puzzle[0, 0])
+        copied = copy.copy(error)
+        self.assertIs(type(copied), Contradiction)
+        self.assertEqual(copied.error_message, error.error_message)
+        self.assertIs(copied.cell, error.cell)
+        # Puzzles can't be pickled, but errors without one can
+        unpickled = pickle.loads(pickle.dumps(SudokuError("Invalid Solution", None)))
+        self.assertEqual((unpickled.error_message, unpickled.puzzle, unpickled.cell), ("Invalid Solution", None, None))
+
+    def test_count_solutions(self):
+        solver = Solver(ClassicContext())
+        self.assertEqual(solver.count_solutions(ClassicContext().Puzzle(puzzles['Easy 7,797,002,451'])), 1)
+        self.assertEqual(solver.count_solutions(ClassicContext().Puzzle(puzzles['Brute Force Prevails'])), 2)
+        self.assertEqual(solver.count_solutions(ClassicContext().Puzzle(), limit=5), 5)
+
+    def test_transposition_table_separates_topologies(self):
+        killer = killer_puzzles['Generated']
+        context = ClassicKillerContext()
+        solver = Solver(context)
+        caged = context.Puzzle(killer['givens'], cage_layout=killer['cage_layout'], cage_sums=killer['cage_sums'])
+        uncaged = context.Puzzle(killer['givens'])
+        self.assertEqual(caged.state_hash, uncaged.state_hash)
+        self.assertNotEqual(search_key(caged), search_key(uncaged))
@@ -0,0 +1,79 @@
+"""
+A transposition table for the brute force search.
+
+Different branch orders in a brute force search frequently arrive at exactly the same
+puzzle state (e.g. placing A then B reaches the same grid as placing B then A). The
+transposition table remembers the outcome of searching from each state, keyed on the
+puzzle's `state_hash`, so repeated subtrees can be pruned rather than solved again.
+
+The same grid state can have a different outcome under different constraints (such as another
+killer cage layout), so the solver keys the table on the state together with the puzzle's 
+constraint graph; see `search_key`.
+"""
+from collections import OrderedDict
+
+CONTRADICTION = 'contradiction' # Searching from this state leads to a broken puzzle
+SOLVED = 'solved' # Searching from this state found a solution
+UNSOLVED = 'unsolved' # Searching from this state (to a given depth) found nothing either way
+
+
+def search_key(puzzle):
+    "The key for a puzzle's current state in a `TranspositionTable`"
+    return (puzzle.constraint_graph.serial, puzzle.state_hash)
+
+
+class TranspositionTable:
+    """
+    A bounded mapping of puzzle state hashes to known search outcomes. When the table is
+    full, the least recently used entry is evicted.
+
+    Entries are tuples of `(outcome, recurse_level, solution)`. `recurse_level` is the
+    remaining brute force depth that was available when an UNSOLVED outcome was recorded;
+    a search with the same or less remaining depth can be skipped. `solution` is only set
+    for SOLVED outcomes.
+    """
+    def __init__(self, max_size=100_000):
+        if max_size < 1:
+            raise ValueError("The transposition table must be able to hold at least one entry")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __contains__(self, state_hash):
+        return state_hash in self._entries
+
+
+    def lookup(self, state_hash):
+        "Returns the entry for the given state, or None if the state has not been recorded"
+        entry = self._entries.get(state_hash)
+        if entry is not None:
+            self._entries.move_to_end(state_hash)
+        return entry
+
+
+    def record(self, state_hash, outcome, recurse_level=0, solution=None):
+        "Record the outcome of searching from the given state"
+        self._entries[state_hash] = (outcome, recurse_level, solution)
+        self._entries.move_to_end(state_hash)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+    def should_skip(self, state_hash, recurse_level):
+        """
+        Check whether searching from the given state, with the given remaining depth, is
+        already known to be fruitless
+        """
+        entry = self.lookup(state_hash)
+        if entry is None:
+            return False
+        outcome, recorded_level, _ = entry
+        return outcome == CONTRADICTION or (outcome == UNSOLVED and recorded_level >= recurse_level)
+
+
+    def clear(self):
+        self._entries.clear()
@@ -27,3 +27,111 @@ def candidate_coordinate_plot(rows_or_columns, value):
                 plot[-1].add(index)
     return plot
 
+
+
+# Number of set bits in every 10-bit mask. This is enough for both digit masks (bits 1-9)
+# and position masks (bits 0-8).
+POPCOUNT = tuple(bin(mask).count('1') for mask in range(1 << 10))
+
+
+def values_to_mask(values):
+    "Converts an iterable of digits (or positions) to a bitmask, with bit `d` set for each digit `d`"
+    mask = 0
+    for value in values:
+        mask |= 1 << value
+    return mask
+
+
+def mask_to_values(mask):
+    "Converts a bitmask back to a tuple of the digits (or positions) it contains, in ascending order"
+    return tuple(bit for bit in range(mask.bit_length()) if mask >> bit & 1)
+
+
+def union_masks(masks):
+    "Get the union of an iterable of bitmasks"
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def candidate_masks(puzzle):
+    """
+    Builds a list of the candidates of every cell in the puzzle as bitmasks, in the same order as 
+    `puzzle.flat_cells`. Full cells have a mask of 0.
+
+    The result is cached against the puzzle's state hash.
+    """
+    cached = puzzle.__dict__.get('_candidate_masks')
+    if cached is not None and cached[0] == puzzle.state_hash:
+        return cached[1]
+    masks = [values_to_mask(cell.possible) for cell in puzzle.flat_cells]
+    puzzle._candidate_masks = (puzzle.state_hash, masks)
+    return masks
+
+
+def candidate_position_masks(puzzle):
+    """
+    Builds bitmasks of which cells in each row and column can contain each value, in a single 
+    pass over the grid. 
+    
+    Returns a tuple `(row_masks, column_masks)`, indexed as `masks[value][house_index]`, where 
+    bit `i` of the mask is set if cell `i` of that house has `value` as a candidate.
+
+    The result is cached against the puzzle's state hash, so consecutive algorithms which 
+    need it share the same masks until the puzzle changes.
+    """
+    cached = puzzle.__dict__.get('_position_masks')
+    if cached is not None and cached[0] == puzzle.state_hash:
+        return cached[1]
+    row_masks = [[0] * 9 for value in range(10)]
+    column_masks = [[0] * 9 for value in range(10)]
+    for row_index, row in enumerate(puzzle.cells):
+        for column_index, cell in enumerate(row):
+            for value in cell.possible:
+                row_masks[value][row_index] |= 1 << column_index
+                column_masks[value][column_index] |= 1 << row_index
+    puzzle._position_masks = (puzzle.state_hash, (row_masks, column_masks))
+    return row_masks, column_masks
+
+
+class BivalueIndex:
+    """
+    An index of the puzzle's bivalue cells (open cells with exactly two candidates), bucketed
+    by candidate pair, for techniques such as y-wings and xy-chains which only ever look at 
+    bivalue cells.
+
+    Built from the puzzle's incrementally maintained `bivalue_cells` set, and cached against 
+    the puzzle's state hash.
+    """
+    def __init__(self, puzzle):
+        self.cells = sorted(puzzle.bivalue_cells, key=lambda cell: cell.coords)
+        self.by_pair = {}
+        self._graph = puzzle.constraint_graph
+        self._by_index = {cell._index: cell for cell in self.cells}
+        for cell in self.cells:
+            self.by_pair.setdefault(values_to_mask(cell.possible), []).append(cell)
+    
+    @classmethod
+    def for_puzzle(cls, puzzle):
+        cached = puzzle.__dict__.get('_bivalue_index')
+        if cached is not None and cached[0] == puzzle.state_hash:
+            return cached[1]
+        index = cls(puzzle)
+        puzzle._bivalue_index = (puzzle.state_hash, index)
+        return index
+    
+    def peers(self, cell):
+        "Get the bivalue cells which share a house (or other group) with the given cell"
+        by_index = self._by_index
+        return [by_index[peer] for peer in self._graph.peers[cell._index] if peer in by_index]
+
+    def peers_with_pair(self, cell, values):
+        "Get the bivalue cells with exactly the given candidates which share a house (or other group) with the given cell"
+        are_peers = self._graph.are_peers
+        return [other for other in self.by_pair.get(values_to_mask(values), ()) if are_peers(cell._index, other._index)]
+
+
+def shares_house(cell_a, cell_b):
+    "Tests if two cells are in the same row, column, or square (or any other house or group)"
+    return cell_a._puzzle.constraint_graph.are_peers(cell_a._index, cell_b._index)
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from .algorithms import *
 from .model import *
 
@@ -7,6 +8,15 @@ class VariantContext:
     appropriate for the solver to use, and provides functionality to check that solution 
     to the puzzle
     """
+    # Whether the rules of the variant are preserved by the classic sudoku symmetries (see 
+    # `Puzzle.canonicalize`). If so, the solver may reuse the results of equivalent puzzles.
+    supports_symmetry = False
+
+    # The compiled constraint graphs, shared between all contexts, keyed on the context and the
+    # topology of the puzzle (see `constraint_graph`). Only the most recently used are kept.
+    _graphs = OrderedDict()
+    max_cached_graphs = 1024
+
     def __new__(cls):
         # Make the class a singleton
         if not '_instance' in cls.__dict__:
@@ -30,9 +40,79 @@ class VariantContext:
     def init_features(self, puzzle, feature_map):
         """
         Initialize the features of the puzzle (houses, regions, cages, and other clues)
+
+        This is called the first time a feature of the puzzle is used, rather than when the 
+        puzzle is created, so puzzles which only need the constraint graph never build them.
         """
         raise NotImplementedError("The variant context must either be a subclass which implements this method, or a HybridContext which combines variants")
 
+    def add_constraints(self, builder, feature_map):
+        """
+        Describe the constraints of the variant to a `ConstraintGraphBuilder`, with cells given
+        as flat indices (`row * 9 + column`)
+
+        By default, the houses are taken from the features which `init_features` builds for a
+        blank puzzle (see `_feature_houses`), so contexts which only describe their features 
+        still get a graph. Contexts which describe neither add no constraints.
+        """
+        for kind, cells in self._feature_houses(feature_map):
+            builder.add_house(kind, cells)
+
+    def _feature_houses(self, feature_map):
+        "Get the `(kind, cells)` of every house among the features `init_features` builds for the feature map"
+        if type(self).init_features is VariantContext.init_features:
+            return ()
+        # A bare puzzle, as building a real one would need the graph
+        puzzle = object.__new__(self.Puzzle)
+        puzzle._features = {}
+        puzzle.cells = tuple(
+            tuple(self.Cell(puzzle=puzzle, coords=(row, column)) for column in range(9))
+            for row in range(9)
+        )
+        puzzle._flat_cells = tuple(cell for row in puzzle.cells for cell in row)
+        self.init_features(puzzle, feature_map)
+        houses = []
+        for feature in puzzle._features.values():
+            for house in (feature if isinstance(feature, (list, tuple)) else (feature,)):
+                if isinstance(house, House):
+                    houses.append((getattr(house, 'kind', type(house).__name__.lower()), tuple(cell._index for cell in house)))
+        return tuple(houses)
+
+    def topology_key(self, feature_map):
+        """
+        Get a hashable key for the parts of the feature map which change the constraint graph. 
+        Puzzles with the same key share a graph. The default of None is for variants whose 
+        constraints are the same for every puzzle. Contexts which rely on the default 
+        `add_constraints` are keyed on the houses their features describe instead, as those
+        may depend on the feature map.
+        """
+        if type(self).add_constraints is VariantContext.add_constraints:
+            return self._feature_houses(feature_map)
+        return None
+
+    @property
+    def context_key(self):
+        "A hashable key identifying this context"
+        return type(self)
+
+    def constraint_graph(self, feature_map):
+        """
+        Get the compiled `ConstraintGraph` for a puzzle with the given feature map. The graph is 
+        only built the first time it is needed for each context and topology.
+        """
+        graphs = VariantContext._graphs
+        key = (self.context_key, self.topology_key(feature_map))
+        graph = graphs.get(key)
+        if graph is not None:
+            graphs.move_to_end(key)
+            return graph
+        builder = ConstraintGraphBuilder()
+        self.add_constraints(builder, feature_map)
+        graph = graphs[key] = builder.compile()
+        if len(graphs) > self.max_cached_graphs:
+            graphs.popitem(last=False)
+        return graph
+
     def check_puzzle(self, puzzle):
         """
         Verify that the puzzle, in it's current state, does not violate any constraints for this context
@@ -47,6 +127,7 @@ class ClassicContext(VariantContext):
     # TODO I want to generalize this a lot more and allow composing hybrid contexts by 
     # combining constraints from different variants. This is a placeholder to allow 
     # testing things until I can code all that functionality
+    supports_symmetry = True
 
     def get_algorithms(self, description):
         #TODO actually use the description to filter algorithms
@@ -59,8 +140,21 @@ class ClassicContext(VariantContext):
             find_hidden_multiples,
             find_naked_multiples,
             find_x_wing,
+            find_y_wing,
+            find_swordfish,
+            find_xy_chain,
+            find_jellyfish,
         ]
     
+    def add_constraints(self, builder, feature_map):
+        for row in range(9):
+            builder.add_house('row', (row * 9 + column for column in range(9)))
+        for column in range(9):
+            builder.add_house('column', (row * 9 + column for row in range(9)))
+        for Y in range(0, 9, 3):
+            for X in range(0, 9, 3):
+                builder.add_house('square', ((Y + y) * 9 + X + x for y in range(3) for x in range(3)))
+    
     def init_features(self, puzzle, feature_map):
         rows=[Row(*(cell for cell in row)) for row in puzzle.cells]
         columns=[Column(*(cell for cell in column)) for column in zip(*puzzle.cells)]
@@ -92,24 +186,63 @@ class ClassicContext(VariantContext):
 
 
 class HybridContext(VariantContext):
+    # The merged algorithm pipelines, shared by all hybrids with the same subcontexts. Hybrids 
+    # are not singletons, so caching on the instance would not survive building a new hybrid.
+    _pipelines = {}
+
     def __new__(cls, *args, **kwargs):
         # Revert back to a non-singleton, only for hybrids
-        return object.__new__(cls, *args, **kwargs)
+        return object.__new__(cls)
     
     def __init__(self, *contexts):
         self._subcontexts = contexts
         super().__init__()
     
+    @property
+    def supports_symmetry(self):
+        return all(context.supports_symmetry for context in self._subcontexts)
+    
+    @property
+    def context_key(self):
+        "A hashable key identifying the combination of contexts in this hybrid"
+        return (type(self),) + tuple(context.context_key for context in self._subcontexts)
+    
     def get_algorithms(self, description):
-        algs = set()
+        """
+        Merge the algorithms of the subcontexts, ordered by difficulty. Algorithms of the same
+        difficulty keep the order given by the subcontexts, earlier subcontexts first, and
+        algorithms shared between subcontexts are only included once.
+
+        The merged pipeline is built once for each combination of subcontexts and description.
+        """
+        try:
+            key = (self.context_key, description)
+            return HybridContext._pipelines[key]
+        except TypeError:
+            return self._merge_algorithms(description) # Unhashable description, so it can't be cached
+        except KeyError:
+            pipeline = HybridContext._pipelines[key] = self._merge_algorithms(description)
+            return pipeline
+    
+    def _merge_algorithms(self, description):
+        algs = []
         for context in self._subcontexts:
-            algs = algs.union(context.get_algorithms(description))
-        return sorted(algs, key=lambda alg: alg.difficulty)
+            for alg in context.get_algorithms(description):
+                if alg not in algs:
+                    algs.append(alg)
+        return tuple(sorted(algs, key=lambda alg: alg.difficulty))
     
     def init_features(self, puzzle, feature_map):
         for context in self._subcontexts:
             context.init_features(puzzle, feature_map)
     
+    def add_constraints(self, builder, feature_map):
+        for context in self._subcontexts:
+            context.add_constraints(builder, feature_map)
+    
+    def topology_key(self, feature_map):
+        return tuple(context.topology_key(feature_map) for context in self._subcontexts)
+    
 
     def check_puzzle(self, puzzle):
         for context in self._subcontexts: